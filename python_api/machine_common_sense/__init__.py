@@ -1,16 +1,58 @@
-from .mcs import MCS
+"""
+The MCS Python API. The constants, enums, and data classes import without any heavy dependency; everything else (like
+the AI2-THOR controller, which imports ai2thor and numpy) is imported on first use, so "import machine_common_sense"
+stays fast for code that only reads scenes or step outputs.
+"""
+import importlib
+
 from .mcs_action import MCS_Action
 from .mcs_action_api_desc import MCS_Action_API_DESC
 from .mcs_action_keys import MCS_Action_Keys
-from .mcs_controller import MCS_Controller
-from .mcs_controller_ai2thor import MCS_Controller_AI2THOR
+from .mcs_constants import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUALITY, MAX_MOVE_DISTANCE, MAX_REACH_DISTANCE
 from .mcs_goal import MCS_Goal
 from .mcs_goal_category import MCS_Goal_Category
 from .mcs_material import MCS_Material
 from .mcs_object import MCS_Object
+from .mcs_object_delta import MCS_Object_Delta
 from .mcs_pose import MCS_Pose
 from .mcs_return_status import MCS_Return_Status
-from .mcs_reward import MCS_Reward
-from .mcs_step_output import MCS_Step_Output
+from .mcs_step_output import MCS_Step_Output, MCS_Transform_Error
 from .mcs_util import MCS_Util
-from .run_mcs_human_input import main
\ No newline at end of file
+
+# The name of each lazily imported attribute, and the submodule that defines it.
+_LAZY_ATTRIBUTE_DICT = {
+    'MCS': '.mcs',
+    'MCS_Controller': '.mcs_controller',
+    'MCS_Controller_AI2THOR': '.mcs_controller_ai2thor',
+    'MCS_Controller_Client': '.mcs_controller_client',
+    'MCS_Controller_Server': '.mcs_controller_server',
+    'MCS_Episode_Reader': '.mcs_episode_recorder',
+    'MCS_Episode_Recorder': '.mcs_episode_recorder',
+    'MCS_IntPhys_Agent': '.mcs_intphys_submission',
+    'MCS_Relationships': '.mcs_relationships',
+    'MCS_Reward': '.mcs_reward',
+    'MCS_Shared_Frame': '.mcs_shared_memory',
+    'MCS_Shared_Memory_Consumer': '.mcs_shared_memory',
+    'MCS_Shared_Memory_Publisher': '.mcs_shared_memory',
+    'MCS_Spatial_Index': '.mcs_spatial_index',
+    'MCS_Submission_Writer': '.mcs_intphys_submission',
+    'MCS_Transform_Pipeline': '.mcs_transform_pipeline',
+    'MCS_Vector_Controller': '.mcs_vector_controller',
+    'main': '.run_mcs_human_input'
+}
+
+__all__ = sorted([name for name in globals() if name.startswith(('MCS_', 'DEFAULT_', 'MAX_'))] + \
+        list(_LAZY_ATTRIBUTE_DICT.keys()))
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTE_DICT:
+        raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTE_DICT[name], __name__), name)
+    # Cache the attribute so this function is not called for it again.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTE_DICT.keys()))
@@ -1,6 +1,8 @@
 import json
+import os
 
-from .mcs_controller_ai2thor import MCS_Controller_AI2THOR
+from .mcs_constants import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUALITY
+from .mcs_goal import MCS_Goal
 
 class MCS:
     """
@@ -15,15 +17,55 @@ class MCS:
     unity_app_file_path : str
         The file path to your MCS Unity application.
     debug : boolean, optional
+    enable_noise : boolean, optional
+        Whether to add random noise (see MCS_Controller.generate_noise) to the move, amount, and force of each
+        action. Default: False
+    screen_width : int, optional
+        The width of the rendered images in pixels. Default: 600
+    screen_height : int, optional
+        The height of the rendered images in pixels. Default: 400
+    quality : str, optional
+        The AI2-THOR render quality, like "Very Low" or "Medium". Default: "Medium"
+    resize : (int, int), optional
+        The (width, height) to which each output image is resized by averaging areas of pixels, or None to keep the
+        rendered size. Default: None
+    delta_output : boolean, optional
+        Whether to set the object_delta and structural_object_delta of each step output to the changes in its object
+        lists since the previous step. Default: False
 
     Returns
     -------
     MCS_Controller
     """
     @staticmethod
-    def create_controller(unity_app_file_path, debug=False, enable_noise=False):
+    def create_controller(unity_app_file_path, debug=False, enable_noise=False, screen_width=None,
+            screen_height=None, quality=DEFAULT_QUALITY, resize=None, delta_output=False):
+        # Import the controller here so that importing MCS does not import AI2-THOR.
+        from .mcs_controller_ai2thor import MCS_Controller_AI2THOR
         # TODO: Toggle between AI2-THOR and other controllers like ThreeDWorld?
-        return MCS_Controller_AI2THOR(unity_app_file_path, debug, enable_noise)
+        return MCS_Controller_AI2THOR(unity_app_file_path, debug, enable_noise, screen_width, screen_height, quality,
+                resize, delta_output)
+
+    """
+    Connects to an MCS controller server (started with mcs_run_controller_server) and returns a new MCS_Controller
+    object that runs scenes on that server's already running Unity application.
+
+    Parameters
+    ----------
+    address : str or (str, int), optional
+        The "host:port" string, (host, port) tuple, or UNIX socket file path of the server.
+        Default: ("127.0.0.1", 9870)
+    timeout : float, optional
+        The number of seconds to wait for each server response, or None to wait forever. Default: None
+
+    Returns
+    -------
+    MCS_Controller
+    """
+    @staticmethod
+    def connect_controller(address=(DEFAULT_HOST, DEFAULT_PORT), timeout=None):
+        from .mcs_controller_client import MCS_Controller_Client
+        return MCS_Controller_Client(address, timeout)
 
     """
     Loads the given JSON config file and returns its data.
@@ -45,9 +87,14 @@ class MCS:
         try:
             with open(config_json_file_path, encoding='utf-8-sig') as config_json_file_object:
                 try:
-                    return json.load(config_json_file_object), None
+                    config_data = json.load(config_json_file_object)
                 except ValueError:
                     return {}, "The given file '" + config_json_file_path + "' does not contain valid JSON."
         except IOError:
             return {}, "The given file '" + config_json_file_path + "' cannot be found."
 
+        # Target images may be given as files next to the scene configuration file.
+        if isinstance(config_data, dict) and 'goal' in config_data:
+            MCS_Goal.resolve_image_files(config_data['goal'], os.path.dirname(os.path.abspath(config_json_file_path)))
+        return config_data, None
+
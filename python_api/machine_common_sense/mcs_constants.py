@@ -0,0 +1,19 @@
+"""
+Constants shared by the MCS controllers, rewards, and utilities. This module must not import any third-party library
+(like ai2thor, numpy, or shapely) so that everything depending only on these constants imports quickly.
+"""
+
+# How far the player can reach.  I think this value needs to be bigger than the MAX_MOVE_DISTANCE or else the
+# player may not be able to move into a position to reach some objects (it may be mathematically impossible).
+# TODO Reduce this number once the player can crouch down to reach and pickup small objects on the floor.
+MAX_REACH_DISTANCE = 1.0
+
+# How far the player can move with a single step.
+MAX_MOVE_DISTANCE = 0.5
+
+# The default AI2-THOR render quality of a new controller.
+DEFAULT_QUALITY = 'Medium'
+
+# The default address of the MCS controller server.
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9870
@@ -9,23 +9,18 @@ from PIL import Image
 import ai2thor.controller
 import ai2thor.server
 
-# How far the player can reach.  I think this value needs to be bigger than the MAX_MOVE_DISTANCE or else the
-# player may not be able to move into a position to reach some objects (it may be mathematically impossible).
-# TODO Reduce this number once the player can crouch down to reach and pickup small objects on the floor.
-MAX_REACH_DISTANCE = 1.0
-
-# How far the player can move with a single step.
-MAX_MOVE_DISTANCE = 0.5
-
 from .mcs_action import MCS_Action
+from .mcs_constants import DEFAULT_QUALITY, MAX_MOVE_DISTANCE, MAX_REACH_DISTANCE
 from .mcs_controller import MCS_Controller
 from .mcs_goal import MCS_Goal
 from .mcs_goal_category import MCS_Goal_Category
 from .mcs_object import MCS_Object
+from .mcs_object_delta import MCS_Object_Delta
 from .mcs_pose import MCS_Pose
 from .mcs_return_status import MCS_Return_Status
 from .mcs_reward import MCS_Reward
-from .mcs_step_output import MCS_Step_Output
+from .mcs_step_output import MCS_Lazy_Value, MCS_Step_Output
+from .mcs_transform_pipeline import MCS_Transform_Pipeline
 from .mcs_util import MCS_Util
 
 # From https://github.com/NextCenturyCorporation/ai2thor/blob/master/ai2thor/server.py#L232-L240
@@ -50,6 +45,10 @@ class MCS_Controller_AI2THOR(MCS_Controller):
     SCREEN_HEIGHT = 400
     SCREEN_WIDTH = 600
 
+    # The render quality names supported by AI2-THOR (see ai2thor.controller.QUALITY_SETTINGS).
+    DEFAULT_QUALITY = DEFAULT_QUALITY
+    QUALITY_LIST = ['Very Low', 'Low', 'Medium', 'MediumCloseFitShadows', 'High', 'Very High', 'Ultra']
+
     # AI2-THOR creates a square grid across the scene that is uses for "snap-to-grid" movement.
     # (This value may not really matter because we set continuous to True in the step input.)
     GRID_SIZE = 0.1
@@ -94,17 +93,20 @@ class MCS_Controller_AI2THOR(MCS_Controller):
 
     HISTORY_DIRECTORY = "SCENE_HISTORY"
 
-    def __init__(self, unity_app_file_path, debug=False, enable_noise=False):
+    def __init__(self, unity_app_file_path, debug=False, enable_noise=False, screen_width=None, screen_height=None,
+            quality=DEFAULT_QUALITY, resize=None, delta_output=False):
         super().__init__()
 
+        self.on_init(debug, enable_noise, screen_width, screen_height, quality, resize, delta_output)
+
         self.__controller = ai2thor.controller.Controller(
-            quality='Medium',
+            quality=self.__quality,
             fullscreen=False,
             # The headless flag does not work for me
             headless=False,
             local_executable_path=unity_app_file_path,
-            width=self.SCREEN_WIDTH,
-            height=self.SCREEN_HEIGHT,
+            width=self.__screen_width,
+            height=self.__screen_height,
             # Set the name of our Scene in our Unity app
             scene='MCS',
             logs=True,
@@ -114,19 +116,37 @@ class MCS_Controller_AI2THOR(MCS_Controller):
             }
         )
 
-        self.on_init(debug, enable_noise)
-
-    def on_init(self, debug=False, enable_noise=False):
+    def on_init(self, debug=False, enable_noise=False, screen_width=None, screen_height=None,
+            quality=DEFAULT_QUALITY, resize=None, delta_output=False):
         self.__debug_to_file = True if (debug is True or debug is 'file') else False
         self.__debug_to_terminal = True if (debug is True or debug is 'terminal') else False
 
         self.__enable_noise = enable_noise
 
+        self.__screen_width = self.SCREEN_WIDTH if screen_width is None else int(screen_width)
+        self.__screen_height = self.SCREEN_HEIGHT if screen_height is None else int(screen_height)
+
+        if quality not in self.QUALITY_LIST:
+            print("MCS Warning: The given quality '" + str(quality) + "' is not valid. Exchanging it with the '" + \
+                    self.DEFAULT_QUALITY + "' quality.")
+            quality = self.DEFAULT_QUALITY
+        self.__quality = quality
+
+        # The (width, height) to which each output image is resized, or None to keep the rendered size.
+        self.__resize = (int(resize[0]), int(resize[1])) if resize is not None else None
+
+        # Whether to add the changes to the object lists since the previously returned step output to each output.
+        self.__delta_output = delta_output
+        self.__previous_object_list = []
+        self.__previous_structural_object_list = []
+
         self.__scene_configuration = None
         self.__head_tilt = 0
         self.__output_folder = None # Save output image files to debug
         self.__step_number = 0
         self.__goal = None
+        self.__in_preview_phase = False
+        self.__transform_pipeline = MCS_Transform_Pipeline()
 
         if not os.path.exists(self.HISTORY_DIRECTORY):
             os.makedirs(self.HISTORY_DIRECTORY)
@@ -143,6 +163,8 @@ class MCS_Controller_AI2THOR(MCS_Controller):
         self.write_history_file(history_item)
 
         super().end_scene(classification, confidence)
+        # Finish the scene's transforms and stop their threads (the next submitted step output starts them again).
+        self.__transform_pipeline.close()
         # TODO MCS-54 Save classification, confidence, and list of actions (steps) taken in this scene for scoring (maybe save to file?)
         pass
 
@@ -154,6 +176,8 @@ class MCS_Controller_AI2THOR(MCS_Controller):
         self.__step_number = 0
         self.__history_list = []
         self.__goal = self.retrieve_goal(self.__scene_configuration)
+        self.__previous_object_list = []
+        self.__previous_structural_object_list = []
         self.__scene_file = os.path.join(self.HISTORY_DIRECTORY, self.__scene_configuration['name'].replace('.json','') + "-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".txt")
         skip_preview_phase = True if 'goal' in config_data and 'skip_preview_phase' in config_data['goal'] else False
 
@@ -175,11 +199,16 @@ class MCS_Controller_AI2THOR(MCS_Controller):
                 if self.__debug_to_terminal:
                     print('STARTING PREVIEW PHASE...')
 
-                for i in range(0, self.__goal.last_preview_phase_step):
-                    output = self.step('Pass')
-                    image_list = image_list + output.image_list
-                    depth_mask_list = depth_mask_list + output.depth_mask_list
-                    object_mask_list = object_mask_list + output.object_mask_list
+                # Only run the transforms on the final output of the preview phase.
+                self.__in_preview_phase = True
+                try:
+                    for i in range(0, self.__goal.last_preview_phase_step):
+                        output = self.step('Pass')
+                        image_list = image_list + output.image_list
+                        depth_mask_list = depth_mask_list + output.depth_mask_list
+                        object_mask_list = object_mask_list + output.object_mask_list
+                finally:
+                    self.__in_preview_phase = False
 
                 if self.__debug_to_terminal:
                     print('ENDING PREVIEW PHASE')
@@ -190,7 +219,7 @@ class MCS_Controller_AI2THOR(MCS_Controller):
             elif self.__debug_to_terminal:
                 print('NO PREVIEW PHASE')
 
-        return output
+        return self.__finish_output(output)
 
     # TODO: may need to reevaluate validation strategy/error handling in the future
     """
@@ -333,7 +362,18 @@ class MCS_Controller_AI2THOR(MCS_Controller):
             print("MCS Warning: This is your last step for this scene. All your future actions will be skipped. " + \
                     "Please call controller.end_scene() now.")
 
-        return self.wrap_output(self.__controller.step(self.wrap_step(action=action, **params)))
+        output = self.wrap_output(self.__controller.step(self.wrap_step(action=action, **params)))
+        return output if self.__in_preview_phase else self.__finish_output(output)
+
+    def __finish_output(self, output):
+        # Only called on the step outputs that are returned to the caller, and never on the preview phase outputs.
+        if self.__delta_output:
+            output.object_delta = MCS_Object_Delta.create(self.__previous_object_list, output.object_list)
+            output.structural_object_delta = MCS_Object_Delta.create(self.__previous_structural_object_list, \
+                    output.structural_object_list)
+            self.__previous_object_list = output.object_list
+            self.__previous_structural_object_list = output.structural_object_list
+        return self.__transform_pipeline.submit(output)
 
     def mcs_action_to_ai2thor_action(self, action):
         if action == MCS_Action.CLOSE_OBJECT.value:
@@ -354,6 +394,24 @@ class MCS_Controller_AI2THOR(MCS_Controller):
 
         return action
 
+    def register_transform(self, name, function):
+        """
+        Registers a function (like a resize, normalization, or feature extraction) to run on each future step output
+        in a background thread, while your next action is already being simulated. Retrieve its result with
+        step_output.retrieve_transform_result(name).
+
+        Parameters
+        ----------
+        name : string
+            The transform name.
+        function : callable
+            A function that takes an MCS_Step_Output and returns any result. It must not modify the step output.
+        """
+        self.__transform_pipeline.register_transform(name, function)
+
+    def unregister_transform(self, name):
+        self.__transform_pipeline.unregister_transform(name)
+
     def retrieve_action_list(self, goal, step_number):
         if goal is not None and goal.action_list is not None:
             if step_number < goal.last_preview_phase_step:
@@ -365,6 +423,10 @@ class MCS_Controller_AI2THOR(MCS_Controller):
 
         return self.ACTION_LIST
 
+    def retrieve_camera_aspect_ratio(self):
+        # The (width, height) of the output images, which may have been resized from the rendered images.
+        return self.__resize if self.__resize is not None else (self.__screen_width, self.__screen_height)
+
     def retrieve_goal(self, scene_configuration):
         goal_config = scene_configuration['goal'] if 'goal' in scene_configuration else {}
         if 'category' in goal_config:
@@ -392,9 +454,12 @@ class MCS_Controller_AI2THOR(MCS_Controller):
         return scene_event.events[len(scene_event.events) - 1].object_id_to_color
 
     def retrieve_object_list(self, scene_event):
-        return sorted([self.retrieve_object_output(object_metadata, self.retrieve_object_colors(scene_event)) for \
-                object_metadata in scene_event.metadata['objects'] if object_metadata['visibleInCamera'] or \
-                object_metadata['isPickedUp']], key=lambda x: x.uuid)
+        return self.create_object_list(scene_event.metadata, self.retrieve_object_colors(scene_event))
+
+    def create_object_list(self, metadata, object_id_to_color):
+        return sorted([self.retrieve_object_output(object_metadata, object_id_to_color) for object_metadata in \
+                metadata['objects'] if object_metadata['visibleInCamera'] or object_metadata['isPickedUp']], \
+                key=lambda x: x.uuid)
 
     def retrieve_object_output(self, object_metadata, object_id_to_color):
         material_list = list(filter(MCS_Util.verify_material_enum_string, [material.upper() for material in \
@@ -434,21 +499,26 @@ class MCS_Controller_AI2THOR(MCS_Controller):
         return scene_event.metadata['agent']['position']
 
     def retrieve_return_status(self, scene_event):
+        return self.create_return_status(scene_event.metadata)
+
+    def create_return_status(self, metadata):
         # TODO MCS-47 Need to implement all proper step statuses on the Unity side
         return_status = MCS_Return_Status.UNDEFINED.name
 
         try:
-            if scene_event.metadata['lastActionStatus']:
-                return_status = MCS_Return_Status[scene_event.metadata['lastActionStatus']].name
+            if metadata['lastActionStatus']:
+                return_status = MCS_Return_Status[metadata['lastActionStatus']].name
         except KeyError:
-            print("Return status " + scene_event.metadata['lastActionStatus'] + " is not currently supported.")
+            print("Return status " + metadata['lastActionStatus'] + " is not currently supported.")
         finally:
             return return_status
 
     def retrieve_structural_object_list(self, scene_event):
-        return sorted([self.retrieve_object_output(object_metadata, self.retrieve_object_colors(scene_event)) for \
-                object_metadata in scene_event.metadata['structuralObjects'] if object_metadata['visibleInCamera']], \
-                key=lambda x: x.uuid)
+        return self.create_structural_object_list(scene_event.metadata, self.retrieve_object_colors(scene_event))
+
+    def create_structural_object_list(self, metadata, object_id_to_color):
+        return sorted([self.retrieve_object_output(object_metadata, object_id_to_color) for object_metadata in \
+                metadata['structuralObjects'] if object_metadata['visibleInCamera']], key=lambda x: x.uuid)
 
     def save_images(self, scene_event):
         image_list = []
@@ -457,13 +527,19 @@ class MCS_Controller_AI2THOR(MCS_Controller):
 
         for index, event in enumerate(scene_event.events):
             scene_image = Image.fromarray(event.frame)
-            image_list.append(scene_image)
-
             depth_mask = Image.fromarray(event.depth_frame)
             depth_mask = depth_mask.convert('L')
-            depth_mask_list.append(depth_mask)
-
             object_mask = Image.fromarray(event.instance_segmentation_frame)
+
+            if self.__resize is not None and self.__resize != scene_image.size:
+                # Average each area of pixels in the RGB and depth images. Never blend the object mask colors, since
+                # each color must still correspond to a single object.
+                scene_image = scene_image.resize(self.__resize, resample=Image.BOX)
+                depth_mask = depth_mask.resize(self.__resize, resample=Image.BOX)
+                object_mask = object_mask.resize(self.__resize, resample=Image.NEAREST)
+
+            image_list.append(scene_image)
+            depth_mask_list.append(depth_mask)
             object_mask_list.append(object_mask)
 
             if self.__debug_to_file and self.__output_folder is not None:
@@ -484,11 +560,16 @@ class MCS_Controller_AI2THOR(MCS_Controller):
 
         image_list, depth_mask_list, object_mask_list = self.save_images(scene_event)
 
-        objects = scene_event.metadata.get('objects', None)
-        agent = scene_event.metadata.get('agent', None)
+        # Build the object lists, return status, and reward from the event metadata only if they are accessed. The
+        # lazy values keep only the metadata and the color map, not the event with all of its frames.
+        metadata = scene_event.metadata
+        object_id_to_color = self.retrieve_object_colors(scene_event)
+        objects = metadata.get('objects', None)
+        agent = metadata.get('agent', None)
+        goal = self.__goal
         step_output = MCS_Step_Output(
             action_list=self.retrieve_action_list(self.__goal, self.__step_number),
-            camera_aspect_ratio=(self.SCREEN_WIDTH, self.SCREEN_HEIGHT),
+            camera_aspect_ratio=self.retrieve_camera_aspect_ratio(),
             camera_clipping_planes=(scene_event.metadata.get('clippingPlaneNear', 0), \
                     scene_event.metadata.get('clippingPlaneFar', 0)),
             camera_field_of_view=scene_event.metadata.get('fov', 0),
@@ -497,15 +578,16 @@ class MCS_Controller_AI2THOR(MCS_Controller):
             goal=self.__goal,
             head_tilt=self.retrieve_head_tilt(scene_event),
             image_list=image_list,
-            object_list=self.retrieve_object_list(scene_event),
+            object_list=MCS_Lazy_Value(lambda: self.create_object_list(metadata, object_id_to_color)),
             object_mask_list=object_mask_list,
             pose=self.retrieve_pose(scene_event),
             position=self.retrieve_position(scene_event),
-            return_status=self.retrieve_return_status(scene_event),
-            reward=MCS_Reward.calculate_reward(self.__goal, objects, agent),
+            return_status=MCS_Lazy_Value(lambda: self.create_return_status(metadata)),
+            reward=MCS_Lazy_Value(lambda: MCS_Reward.calculate_reward(goal, objects, agent)),
             rotation=self.retrieve_rotation(scene_event),
             step_number=self.__step_number,
-            structural_object_list=self.retrieve_structural_object_list(scene_event)
+            structural_object_list=MCS_Lazy_Value(lambda: self.create_structural_object_list(metadata,
+                    object_id_to_color))
         )
 
         self.__head_tilt = step_output.head_tilt
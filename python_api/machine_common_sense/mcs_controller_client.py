@@ -0,0 +1,74 @@
+import socket
+
+from .mcs_controller import MCS_Controller
+from .mcs_controller_server import CLOSE, DEFAULT_HOST, DEFAULT_PORT, END_SCENE, ERROR, OUTPUT, SHUTDOWN, \
+        START_SCENE, STEP, decode_json, decode_step_output, encode_json, parse_address, receive_frame, send_frame
+
+
+class MCS_Controller_Client(MCS_Controller):
+    """
+    MCS Controller class implementation that runs each scene on a long-lived MCS_Controller_Server (started with
+    mcs_run_controller_server) rather than launching its own Unity app.
+
+    Parameters
+    ----------
+    address : str or (str, int), optional
+        The "host:port" string, (host, port) tuple, or UNIX socket file path of the server.
+        Default: ("127.0.0.1", 9870)
+    timeout : float, optional
+        The number of seconds to wait for each server response, or None to wait forever. Default: None
+    """
+
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), timeout=None):
+        super().__init__()
+        family, socket_address = parse_address(address)
+        self.__socket = socket.socket(family, socket.SOCK_STREAM)
+        self.__socket.settimeout(timeout)
+        self.__socket.connect(socket_address)
+        if family == socket.AF_INET:
+            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # The last step output, whose object lists are needed if the server sends only object deltas.
+        self.__previous_output = None
+
+    def close(self):
+        """Disconnects from the server, leaving it running for other clients."""
+        if self.__socket is not None:
+            send_frame(self.__socket, CLOSE)
+            self.__socket.close()
+            self.__socket = None
+
+    def shutdown_server(self):
+        """Stops the server (and its Unity app) and disconnects from it."""
+        self.__request(SHUTDOWN, None)
+        self.__socket.close()
+        self.__socket = None
+
+    # Override
+    def end_scene(self, classification, confidence):
+        self.__request(END_SCENE, {'classification': classification, 'confidence': confidence})
+
+    # Override
+    def start_scene(self, config_data):
+        self.__previous_output = None
+        return self.__request(START_SCENE, {'config_data': config_data})
+
+    # Override
+    def step(self, action, **kwargs):
+        return self.__request(STEP, {'action': action, 'kwargs': kwargs})
+
+    def __request(self, message_type, request):
+        if self.__socket is None:
+            raise ConnectionError('This MCS_Controller_Client is closed')
+
+        send_frame(self.__socket, message_type, encode_json(request) if request is not None else b'')
+        response_type, payload = receive_frame(self.__socket)
+
+        if response_type is None:
+            raise ConnectionError('The MCS_Controller_Server closed the connection')
+        if response_type == ERROR:
+            raise RuntimeError('The MCS_Controller_Server failed: ' + decode_json(payload)['message'])
+        if response_type == OUTPUT:
+            self.__previous_output = decode_step_output(payload, self.__previous_output)
+            return self.__previous_output
+        # The server returns NO_OUTPUT if the step was skipped (because it was past the last step) or OK otherwise.
+        return None
@@ -0,0 +1,222 @@
+"""
+The binary frame protocol shared by the MCS_Controller_Server and the MCS_Controller_Client.
+
+Every message is one frame: a fixed header of the magic bytes, the message type, and the payload length, followed by
+the payload. Requests from the client have JSON payloads. Step output responses from the server have a payload of
+the pickled step output (with its images removed) followed by the raw bytes of each image, so no image is ever
+encoded or compressed. If the step output has object deltas (see delta_output), its full object lists are also
+removed, and the client rebuilds them from the deltas. Only connect clients to servers you trust, since they unpickle the server's responses.
+"""
+import copy
+import json
+import os
+import pickle
+import socket
+import struct
+import traceback
+
+from .mcs_constants import DEFAULT_HOST, DEFAULT_PORT
+
+FRAME_MAGIC = b'MCS1'
+FRAME_HEADER = struct.Struct('!4sBQ')
+IMAGE_HEADER = struct.Struct('!I')
+
+# Request message types (client to server).
+START_SCENE = 1
+STEP = 2
+END_SCENE = 3
+CLOSE = 4
+SHUTDOWN = 5
+
+# Response message types (server to client).
+OUTPUT = 16
+NO_OUTPUT = 17
+OK = 18
+ERROR = 19
+
+IMAGE_LIST_KEYS = ['image_list', 'depth_mask_list', 'object_mask_list']
+
+
+def send_frame(sock, message_type, payload=b''):
+    # Send the header separately so that large payloads are never copied just to prepend it.
+    sock.sendall(FRAME_HEADER.pack(FRAME_MAGIC, message_type, len(payload)))
+    if len(payload) > 0:
+        sock.sendall(payload)
+
+
+def receive_frame(sock):
+    """Returns the (message type, payload) of the next frame, or (None, None) if the socket was closed."""
+    header = receive_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None, None
+    magic, message_type, payload_length = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC:
+        raise ConnectionError('Received a frame with invalid magic bytes ' + str(magic))
+    payload = receive_exactly(sock, payload_length)
+    if payload is None:
+        raise ConnectionError('The socket was closed in the middle of a frame')
+    return message_type, payload
+
+
+def receive_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            return None
+        received += count
+    return bytes(buffer)
+
+
+def encode_json(data):
+    return json.dumps(data).encode('utf-8')
+
+
+def decode_json(payload):
+    return json.loads(payload.decode('utf-8'))
+
+
+def encode_step_output(step_output):
+    metadata_output = copy.copy(step_output)
+    # Send only the object deltas if the step output has them, since the client can rebuild the object lists.
+    delta_only = step_output.object_delta is not None and step_output.structural_object_delta is not None
+    if delta_only:
+        metadata_output.object_list = []
+        metadata_output.structural_object_list = []
+    image_spec_list = []
+    image_data_list = []
+    for key in IMAGE_LIST_KEYS:
+        for image in getattr(step_output, key):
+            image_data = image.tobytes()
+            image_spec_list.append((key, image.mode, image.size, len(image_data)))
+            image_data_list.append(image_data)
+        setattr(metadata_output, key, [])
+
+    metadata = pickle.dumps((metadata_output, image_spec_list, delta_only), protocol=pickle.HIGHEST_PROTOCOL)
+    return b''.join([IMAGE_HEADER.pack(len(metadata)), metadata] + image_data_list)
+
+
+def decode_step_output(payload, previous_output=None):
+    """Returns the step output from the given payload. If the server sent only the object deltas, rebuilds the object
+    lists by applying them to the object lists of the given previous step output (or to empty lists)."""
+    # Import Pillow here so that importing the client does not import it.
+    from PIL import Image
+
+    view = memoryview(payload)
+    metadata_length = IMAGE_HEADER.unpack_from(view)[0]
+    offset = IMAGE_HEADER.size
+    step_output, image_spec_list, delta_only = pickle.loads(view[offset:(offset + metadata_length)])
+    if delta_only:
+        step_output.object_list = step_output.object_delta.apply(previous_output.object_list if \
+                previous_output is not None else [])
+        step_output.structural_object_list = step_output.structural_object_delta.apply( \
+                previous_output.structural_object_list if previous_output is not None else [])
+    offset += metadata_length
+    for key, mode, size, data_length in image_spec_list:
+        getattr(step_output, key).append(Image.frombytes(mode, size, view[offset:(offset + data_length)].tobytes()))
+        offset += data_length
+    return step_output
+
+
+def parse_address(address):
+    """Returns the socket family and address for the given "host:port" string, (host, port) tuple, or UNIX socket
+    file path."""
+    if isinstance(address, tuple):
+        return socket.AF_INET, address
+    if isinstance(address, int):
+        return socket.AF_INET, (DEFAULT_HOST, address)
+    if ':' in address and '/' not in address:
+        host, port = address.rsplit(':', 1)
+        return socket.AF_INET, (host or DEFAULT_HOST, int(port))
+    return socket.AF_UNIX, address
+
+
+class MCS_Controller_Server:
+    """
+    Serves a long-lived MCS controller (normally an MCS_Controller_AI2THOR with a running Unity app) to clients on a
+    local socket, so short scripts can attach to an already warm simulator with an MCS_Controller_Client rather than
+    launching Unity themselves. Clients are served one at a time, in the order they connect.
+
+    Parameters
+    ----------
+    controller : MCS_Controller
+        The controller to serve.
+    address : str or (str, int), optional
+        The "host:port" string, (host, port) tuple, or UNIX socket file path on which to listen.
+        Default: ("127.0.0.1", 9870)
+    """
+
+    def __init__(self, controller, address=(DEFAULT_HOST, DEFAULT_PORT)):
+        self.__controller = controller
+        family, self.__address = parse_address(address)
+        self.__socket = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.__socket.bind(self.__address)
+        self.__socket.listen()
+        self.__running = False
+
+    def close(self):
+        self.__running = False
+        try:
+            # Wake up serve_forever if it is waiting for a client in another thread.
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__socket.close()
+        if self.__socket.family == socket.AF_UNIX and os.path.exists(self.__address):
+            os.remove(self.__address)
+
+    def retrieve_address(self):
+        """Returns the address on which this server is listening (with its actual port, if it was given port 0)."""
+        return self.__socket.getsockname()
+
+    def serve_forever(self):
+        """Serves clients until a client sends a shutdown request."""
+        self.__running = True
+        while self.__running:
+            try:
+                client_socket, _ = self.__socket.accept()
+            except OSError:
+                # The server socket was closed.
+                break
+            with client_socket:
+                if client_socket.family == socket.AF_INET:
+                    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                try:
+                    self.serve_client(client_socket)
+                except (ConnectionError, OSError) as e:
+                    print('MCS Warning: Lost the connection to a client: ' + repr(e))
+        self.close()
+
+    def serve_client(self, client_socket):
+        """Handles requests from the given client socket until it closes its connection."""
+        while True:
+            message_type, payload = receive_frame(client_socket)
+            if message_type is None or message_type == CLOSE:
+                return
+            if message_type == SHUTDOWN:
+                send_frame(client_socket, OK)
+                self.__running = False
+                return
+            try:
+                response_type, response_payload = self.handle_request(message_type, decode_json(payload))
+            except Exception as e:
+                traceback.print_exc()
+                response_type, response_payload = ERROR, encode_json({'message': repr(e)})
+            send_frame(client_socket, response_type, response_payload)
+
+    def handle_request(self, message_type, request):
+        if message_type == START_SCENE:
+            return OUTPUT, encode_step_output(self.__controller.start_scene(request['config_data']))
+        if message_type == STEP:
+            step_output = self.__controller.step(request['action'], **request['kwargs'])
+            if step_output is None:
+                return NO_OUTPUT, b''
+            return OUTPUT, encode_step_output(step_output)
+        if message_type == END_SCENE:
+            self.__controller.end_scene(request['classification'], request['confidence'])
+            return OK, b''
+        raise ValueError('Unknown message type ' + str(message_type))
@@ -0,0 +1,342 @@
+"""
+Records MCS episodes (the images, object metadata, actions, and rewards from each step) into a dataset of chunked
+NumPy array files for offline training, and reads random-access minibatches back out of that dataset.
+
+A dataset folder has an index.json file listing its episodes. Each episode has its own folder with an episode.json
+file (the scene name plus the action, reward, return status, and object metadata of each step) and one or more chunks
+of frames. An uncompressed chunk is a folder with one .npy file per array, which the reader maps into memory; a
+compressed chunk is a single .npz file, which the reader decompresses once per chunk.
+"""
+import collections
+import concurrent.futures
+import json
+import os
+import queue
+import threading
+
+import numpy
+
+INDEX_FILE_NAME = 'index.json'
+EPISODE_FILE_NAME = 'episode.json'
+
+# The step output image list attribute for each image array in a chunk.
+IMAGE_ARRAY_KEYS = {'image': 'image_list', 'depth_mask': 'depth_mask_list', 'object_mask': 'object_mask_list'}
+
+
+def write_chunk(chunk_path, frame_list, compress):
+    """Stacks the given frames into arrays and saves them to the given chunk path. Each frame is a tuple of its
+    (image, depth mask, object mask, reward, step index). Runs in the writer thread or in a worker process."""
+    arrays = {
+        'image': numpy.stack([numpy.asarray(frame[0]) for frame in frame_list]),
+        'depth_mask': numpy.stack([numpy.asarray(frame[1]) for frame in frame_list]),
+        'object_mask': numpy.stack([numpy.asarray(frame[2]) for frame in frame_list]),
+        'reward': numpy.array([frame[3] for frame in frame_list], dtype=numpy.float32),
+        'step_index': numpy.array([frame[4] for frame in frame_list], dtype=numpy.int32)
+    }
+    if compress:
+        numpy.savez_compressed(chunk_path + '.npz', **arrays)
+    else:
+        os.makedirs(chunk_path, exist_ok=True)
+        for key, array in arrays.items():
+            numpy.save(os.path.join(chunk_path, key + '.npy'), array)
+    return len(frame_list)
+
+
+def write_json(path, data):
+    # Write to a temporary file first so a reader never sees a partially written file.
+    with open(path + '.tmp', 'w') as json_file:
+        json.dump(data, json_file)
+    os.replace(path + '.tmp', path)
+
+
+class MCS_Episode_Recorder:
+    """
+    Streams the step outputs of MCS episodes into a dataset folder of chunked array files. The arrays are built and
+    saved by a background writer thread (and, optionally, a pool of processes), so recording costs the simulation
+    loop little more than keeping a reference to each step output.
+
+    Parameters
+    ----------
+    output_directory : str
+        The dataset folder. Episodes already in the folder are kept, and new episodes are added after them.
+    chunk_size : int, optional
+        The number of frames in each chunk. Default: 256
+    compress : boolean, optional
+        Whether to save each chunk as a compressed .npz file. Compressed chunks are smaller, but cannot be mapped
+        into memory by the reader. Default: False
+    last_frame_only : boolean, optional
+        Whether to record only the last image of each image list (the state before the next action) rather than
+        every image. Default: False
+    process_count : int, optional
+        The number of processes with which to build and save the chunks, or 0 to save them in the writer thread.
+        Use processes if compression cannot keep up with the simulation. Default: 0
+    queue_size : int, optional
+        The number of chunks that may wait to be saved before record blocks. Default: 4
+    """
+
+    def __init__(self, output_directory, chunk_size=256, compress=False, last_frame_only=False, process_count=0,
+            queue_size=4):
+        self.__output_directory = output_directory
+        self.__chunk_size = chunk_size
+        self.__compress = compress
+        self.__last_frame_only = last_frame_only
+        os.makedirs(output_directory, exist_ok=True)
+
+        index_path = os.path.join(output_directory, INDEX_FILE_NAME)
+        self.__index = {'episodes': []}
+        if os.path.exists(index_path):
+            with open(index_path) as index_file:
+                self.__index = json.load(index_file)
+
+        self.__episode = None
+        self.__episode_directory = None
+        self.__frame_list = []
+        self.__pool = concurrent.futures.ProcessPoolExecutor(max_workers=process_count) if process_count > 0 \
+                else None
+        self.__future_list = []
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__error = None
+        self.__writer = threading.Thread(target=self.__write_forever, name='MCS_Episode_Writer', daemon=True)
+        self.__writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        """Ends the current episode, if any, and waits for every file to be saved."""
+        if self.__writer is None:
+            return
+        if self.__episode is not None:
+            self.end_episode()
+        self.__queue.put(None)
+        self.__writer.join()
+        self.__writer = None
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=True)
+        self.__raise_error()
+
+    def start_episode(self, name, step_output=None):
+        """
+        Starts recording a new episode.
+
+        Parameters
+        ----------
+        name : str
+            The episode name (normally the scene name).
+        step_output : MCS_Step_Output, optional
+            The output from controller.start_scene, to record as the episode's first step.
+        """
+        self.__raise_error()
+        if self.__episode is not None:
+            self.end_episode()
+        episode_name = 'episode_' + str(len(self.__index['episodes'])).zfill(6)
+        self.__episode_directory = os.path.join(self.__output_directory, episode_name)
+        os.makedirs(self.__episode_directory, exist_ok=True)
+        self.__episode = {'name': name, 'directory': episode_name, 'steps': [], 'chunks': [], 'frame_count': 0}
+        if step_output is not None:
+            self.record(None, step_output)
+
+    def record(self, action, step_output, **params):
+        """
+        Records the given step output and the action (and action parameters) that produced it.
+
+        Parameters
+        ----------
+        action : str or None
+            The action string, or None for the output from controller.start_scene.
+        step_output : MCS_Step_Output
+            The output from the action.
+        """
+        self.__raise_error()
+        if self.__episode is None:
+            raise RuntimeError('Please call start_episode before record')
+        if step_output is None:
+            return
+
+        step_index = len(self.__episode['steps'])
+        self.__episode['steps'].append({
+            'action': action,
+            'params': params,
+            'return_status': str(step_output.return_status),
+            'reward': step_output.reward,
+            'step_number': step_output.step_number,
+            'objects': [vars(instance) for instance in step_output.object_list]
+        })
+
+        image_count = min(len(step_output.image_list), len(step_output.depth_mask_list),
+                len(step_output.object_mask_list))
+        start = image_count - 1 if self.__last_frame_only and image_count > 0 else 0
+        for index in range(start, image_count):
+            # Keep only the image references here; the writer converts them into arrays.
+            self.__frame_list.append((step_output.image_list[index], step_output.depth_mask_list[index],
+                    step_output.object_mask_list[index], step_output.reward, step_index))
+            if len(self.__frame_list) >= self.__chunk_size:
+                self.__flush_chunk()
+
+    def end_episode(self):
+        """Finishes the current episode and saves its episode.json file and the dataset index.json file."""
+        if self.__episode is None:
+            return
+        self.__flush_chunk()
+        episode = self.__episode
+        self.__episode = None
+        self.__index['episodes'].append({
+            'name': episode['name'],
+            'directory': episode['directory'],
+            'frame_count': episode['frame_count'],
+            'step_count': len(episode['steps'])
+        })
+        self.__queue.put(('episode', os.path.join(self.__output_directory, episode['directory'], EPISODE_FILE_NAME),
+                episode, {'episodes': list(self.__index['episodes'])}))
+
+    def __flush_chunk(self):
+        if len(self.__frame_list) == 0:
+            return
+        chunk_name = 'chunk_' + str(len(self.__episode['chunks'])).zfill(6)
+        self.__episode['chunks'].append({
+            'name': chunk_name,
+            'compressed': self.__compress,
+            'frame_count': len(self.__frame_list)
+        })
+        self.__episode['frame_count'] += len(self.__frame_list)
+        self.__queue.put(('chunk', os.path.join(self.__episode_directory, chunk_name), self.__frame_list))
+        self.__frame_list = []
+
+    def __raise_error(self):
+        if self.__error is not None:
+            raise RuntimeError('MCS_Episode_Recorder failed to save a file') from self.__error
+
+    def __write_forever(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            try:
+                if item[0] == 'chunk':
+                    _, chunk_path, frame_list = item
+                    if self.__pool is not None:
+                        self.__future_list.append(self.__pool.submit(write_chunk, chunk_path, frame_list,
+                                self.__compress))
+                    else:
+                        write_chunk(chunk_path, frame_list, self.__compress)
+                else:
+                    _, episode_path, episode, index = item
+                    # Save the episode only after all its chunks, so a listed episode is always complete.
+                    for future in self.__future_list:
+                        future.result()
+                    self.__future_list = []
+                    write_json(episode_path, episode)
+                    write_json(os.path.join(self.__output_directory, INDEX_FILE_NAME), index)
+            except Exception as e:
+                self.__error = e
+
+
+class MCS_Episode_Reader:
+    """
+    Reads the frames recorded by an MCS_Episode_Recorder, with random access across all episodes. Uncompressed chunks
+    are mapped into memory, so reading a minibatch only reads the frames in that minibatch.
+
+    Parameters
+    ----------
+    dataset_directory : str
+        The dataset folder.
+    cache_chunk_count : int, optional
+        The number of most recently read uncompressed chunks to keep mapped into memory. Each mapped array holds a
+        file descriptor, so reading the older chunks again maps them again instead. Default: 8
+    """
+
+    def __init__(self, dataset_directory, cache_chunk_count=8):
+        self.__dataset_directory = dataset_directory
+        self.__cache_chunk_count = max(1, cache_chunk_count)
+        with open(os.path.join(dataset_directory, INDEX_FILE_NAME)) as index_file:
+            self.episode_list = json.load(index_file)['episodes']
+
+        self.__chunk_list = []
+        chunk_index_list = []
+        row_list = []
+        self.__episode_data_list = []
+        for episode_index, episode_summary in enumerate(self.episode_list):
+            episode_directory = os.path.join(dataset_directory, episode_summary['directory'])
+            with open(os.path.join(episode_directory, EPISODE_FILE_NAME)) as episode_file:
+                episode = json.load(episode_file)
+            self.__episode_data_list.append(episode)
+            for chunk in episode['chunks']:
+                chunk_index_list.append(numpy.full(chunk['frame_count'], len(self.__chunk_list), dtype=numpy.int32))
+                row_list.append(numpy.arange(chunk['frame_count'], dtype=numpy.int32))
+                self.__chunk_list.append((episode_index, os.path.join(episode_directory, chunk['name']),
+                        chunk['compressed']))
+
+        # The chunk and the row inside that chunk of each frame, in recording order.
+        self.__frame_chunk = numpy.concatenate(chunk_index_list) if chunk_index_list else numpy.zeros(0, numpy.int32)
+        self.__frame_row = numpy.concatenate(row_list) if row_list else numpy.zeros(0, numpy.int32)
+        # The arrays of the most recently read chunks, by chunk index, from the least to the most recently read.
+        self.__array_cache = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__frame_chunk)
+
+    def retrieve_episode(self, episode_index):
+        """Returns the episode.json data (the name and per-step metadata) of the episode with the given index."""
+        return self.__episode_data_list[episode_index]
+
+    def read_batch(self, frame_index_list):
+        """
+        Returns the frames with the given indexes (across all episodes, in recording order).
+
+        Returns
+        -------
+        dict
+            The "image" (B x H x W x 3), "depth_mask" (B x H x W), "object_mask" (B x H x W x 3), "reward" (B),
+            "episode_index" (B), and "step_index" (B) arrays, plus the "action" list, for the B frames.
+        """
+        frame_index_array = numpy.asarray(frame_index_list, dtype=numpy.int64)
+        chunk_array = self.__frame_chunk[frame_index_array]
+        row_array = self.__frame_row[frame_index_array]
+
+        batch = {}
+        for chunk_index in numpy.unique(chunk_array):
+            positions = numpy.nonzero(chunk_array == chunk_index)[0]
+            arrays = self.__load_chunk(int(chunk_index))
+            rows = row_array[positions]
+            for key, array in arrays.items():
+                if key not in batch:
+                    batch[key] = numpy.empty((len(frame_index_array),) + array.shape[1:], dtype=array.dtype)
+                batch[key][positions] = array[rows]
+
+        batch['episode_index'] = numpy.array([self.__chunk_list[chunk_index][0] for chunk_index in chunk_array],
+                dtype=numpy.int32)
+        batch['action'] = [self.__episode_data_list[episode_index]['steps'][step_index]['action'] for \
+                episode_index, step_index in zip(batch['episode_index'], batch.get('step_index', []))]
+        return batch
+
+    def iterate_batches(self, batch_size, shuffle=True, seed=None):
+        """Yields minibatches (see read_batch) that together include every frame once."""
+        order = numpy.arange(len(self))
+        if shuffle:
+            numpy.random.RandomState(seed).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            yield self.read_batch(order[start:(start + batch_size)])
+
+    def __load_chunk(self, chunk_index):
+        if chunk_index in self.__array_cache:
+            self.__array_cache.move_to_end(chunk_index)
+            return self.__array_cache[chunk_index]
+
+        _, chunk_path, compressed = self.__chunk_list[chunk_index]
+        if compressed:
+            # A compressed chunk cannot be mapped, so keep only the most recently decompressed one.
+            with numpy.load(chunk_path + '.npz') as chunk_file:
+                arrays = {key: chunk_file[key] for key in chunk_file.files}
+            for key in [key for key in self.__array_cache if self.__chunk_list[key][2]]:
+                del self.__array_cache[key]
+        else:
+            arrays = {file_name[:-4]: numpy.load(os.path.join(chunk_path, file_name), mmap_mode='r') for \
+                    file_name in os.listdir(chunk_path) if file_name.endswith('.npy')}
+        self.__array_cache[chunk_index] = arrays
+        # Dropping the least recently read chunk's arrays unmaps them (read_batch copies the frames it returns).
+        while len(self.__array_cache) > self.__cache_chunk_count:
+            self.__array_cache.popitem(last=False)
+        return arrays
@@ -1,3 +1,8 @@
+import base64
+import io
+import json
+import os
+
 from .mcs_util import MCS_Util
 
 class MCS_Goal:
@@ -22,9 +27,13 @@ class MCS_Goal:
     type_list : list of strings
         The list of types for the visualization interface associated with this goal, including relevant core domains.
     metadata : dict
-        The metadata specific to this goal.
+        The metadata specific to this goal. The images of the goal's targets (like metadata['target']['image']) are
+        kept as they were given in the scene configuration; use retrieve_target_image to decode them.
     """
 
+    # The prefix of an image given as a base64 data URI, like "data:image/png;base64,iVBORw0KGgo...".
+    DATA_URI_PREFIX = 'data:'
+
     def __init__(
         self,
         action_list=None,
@@ -42,7 +51,78 @@ class MCS_Goal:
         self.task_list = [] if task_list is None else task_list
         self.type_list = [] if type_list is None else type_list
         self.metadata = {} if metadata is None else metadata
+        # The decoded target images, by target key.
+        self.__image_dict = {}
 
     def __str__(self):
         return MCS_Util.class_to_str(self)
 
+    """
+    Returns the image of the given goal target, decoded into a NumPy array the first time it is retrieved.
+
+    Parameters
+    ----------
+    target_key : string, optional
+        The key of the target in the goal metadata, like "target", "target_1", or "target_2". Default: "target"
+
+    Returns
+    -------
+    numpy.ndarray or None
+        The (height, width, 3) array of RGB pixels, or None if the target has no image.
+    """
+    def retrieve_target_image(self, target_key='target'):
+        if target_key not in self.__image_dict:
+            target = self.metadata.get(target_key, None)
+            image = target.get('image', None) if isinstance(target, dict) else None
+            self.__image_dict[target_key] = MCS_Goal.decode_image(image) if image is not None else None
+        return self.__image_dict[target_key]
+
+    """
+    Decodes the given goal target image into a NumPy array.
+
+    Parameters
+    ----------
+    image : list or string
+        A nested list of RGB pixels; a JSON string of that nested list; a base64 data URI of a PNG image; or the file
+        path of an image file (like a PNG) or of a NumPy .npy file.
+
+    Returns
+    -------
+    numpy.ndarray
+        The (height, width, 3) array of RGB pixels.
+    """
+    @staticmethod
+    def decode_image(image):
+        # Import these here so that importing the goal does not import them.
+        import numpy
+        from PIL import Image
+
+        if isinstance(image, str):
+            text = image.lstrip()
+            if text.startswith('['):
+                image = json.loads(text)
+            elif text.startswith(MCS_Goal.DATA_URI_PREFIX):
+                with Image.open(io.BytesIO(base64.b64decode(text.split(',', 1)[1]))) as pillow_image:
+                    return numpy.asarray(pillow_image.convert('RGB'))
+            elif text.endswith('.npy'):
+                return numpy.load(text)
+            else:
+                with Image.open(text) as pillow_image:
+                    return numpy.asarray(pillow_image.convert('RGB'))
+        return numpy.asarray(image, dtype=numpy.uint8)
+
+    """
+    Makes any relative target image file paths in the given goal configuration relative to the given directory
+    (normally the directory of the scene configuration file).
+    """
+    @staticmethod
+    def resolve_image_files(goal_config, directory):
+        metadata = goal_config.get('metadata', None) if isinstance(goal_config, dict) else None
+        if not isinstance(metadata, dict):
+            return
+        for target in metadata.values():
+            image = target.get('image', None) if isinstance(target, dict) else None
+            if isinstance(image, str) and not image.lstrip().startswith(('[', MCS_Goal.DATA_URI_PREFIX)) and \
+                    not os.path.isabs(image):
+                target['image'] = os.path.join(directory, image)
+
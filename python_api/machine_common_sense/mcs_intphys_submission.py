@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import zipfile
+
+# Like "O1/0005/4": the block, the test (quartet) number, and the scene number in the quartet.
+SCENE_KEY_PATTERN = re.compile(r'^(O\d+)/(\d{4})/([1-4])$')
+# Like "O1-0005-4.json" (as named by the scene generator with the prefix "O1") or "O1_0005_4.json".
+SCENE_FILE_NAME_PATTERN = re.compile(r'(O\d+)[-_](\d{1,4})[-_]([1-4])$')
+
+
+def parse_scene_key(scene_file_path):
+    """Returns the "block/test/scene" key (like "O1/0005/4") of the given IntPhys scene file path (like
+    "O1-0005-4.json"), or None if the file name does not have one."""
+    match = SCENE_FILE_NAME_PATTERN.search(os.path.splitext(os.path.basename(scene_file_path))[0])
+    if match is None:
+        return None
+    return match.group(1) + '/' + str(int(match.group(2))).zfill(4) + '/' + match.group(3)
+
+
+class MCS_IntPhys_Agent:
+    """
+    The agent called by the IntPhys submission harness (see run_mcs_intphys_submission) on each frame of each scene.
+    Override step to return your violation of expectation (VOE) value for each frame, and end_scene to return your
+    plausibility and location for each scene. A new agent is created for each scene.
+    """
+
+    def start_scene(self, config_data, step_output):
+        """
+        Called once the scene starts, with its scene configuration data and the step output from its start.
+        """
+        pass
+
+    def step(self, step_output):
+        """
+        Called on each frame of the scene, with its step output.
+
+        Returns
+        -------
+        float
+            The VOE value of the frame, between 0 (a violation) and 1 (no violation). Default: 1.0
+        """
+        return 1.0
+
+    def end_scene(self, voe_list):
+        """
+        Called once the scene ends, with the VOE values that step returned for each frame.
+
+        Returns
+        -------
+        float
+            The plausibility of the scene, between 0 (implausible) and 1 (plausible). Default: the lowest VOE value
+        (int, int, int) or None
+            The frame, x, and y of the violation, or None if there is not one. Default: None
+        """
+        return (min(voe_list) if len(voe_list) > 0 else 1.0), None
+
+
+class MCS_Submission_Writer:
+    """
+    Writes an IntPhys evaluation submission zip file, in the format checked by validation/mcs_validate.py and read by
+    ingest_results, directly as the results of each scene arrive, without any temporary files. The VOE file of each
+    scene is written to the zip at once. The answer.txt and location.txt files (one short line per scene) are written,
+    sorted by scene key, when the writer is closed.
+
+    Parameters
+    ----------
+    zip_file_path : str
+        The submission zip file to create. Any existing file is replaced.
+    description : dict
+        The description.json data, which must have the "Performer" and the "Submission".
+    compression : int, optional
+        The zipfile compression method. Default: zipfile.ZIP_DEFLATED
+    """
+
+    ANSWER_FILE_NAME = 'answer.txt'
+    DESCRIPTION_FILE_NAME = 'description.json'
+    LOCATION_FILE_NAME = 'location.txt'
+
+    def __init__(self, zip_file_path, description, compression=zipfile.ZIP_DEFLATED):
+        for key in ('Performer', 'Submission'):
+            if key not in description:
+                raise ValueError('The submission description needs a "' + key + '"')
+        self.zip_file_path = zip_file_path
+        self.__description = description
+        self.__answer_dict = {}
+        self.__location_dict = {}
+        self.__zip_file = zipfile.ZipFile(zip_file_path, 'w', compression=compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.__answer_dict)
+
+    def __contains__(self, key):
+        return key in self.__answer_dict
+
+    def close(self):
+        """Writes the answer, location, and description files, and finishes the zip file."""
+        if self.__zip_file is None:
+            return
+        key_list = sorted(self.__answer_dict.keys())
+        self.__zip_file.writestr(self.ANSWER_FILE_NAME, ''.join([key + ' ' + self.__answer_dict[key] + '\n' for key in \
+                key_list]))
+        self.__zip_file.writestr(self.LOCATION_FILE_NAME, ''.join([key + ' ' + self.__location_dict[key] + '\n' for \
+                key in key_list]))
+        self.__zip_file.writestr(self.DESCRIPTION_FILE_NAME, json.dumps(self.__description, indent=4))
+        self.__zip_file.close()
+        self.__zip_file = None
+
+    def write_scene(self, key, plausibility, voe_list, location=None):
+        """
+        Adds the results of a scene to the submission. Ignores any scene that was already added.
+
+        Parameters
+        ----------
+        key : str
+            The "block/test/scene" key of the scene, like "O1/0005/4".
+        plausibility : float
+            The plausibility of the scene, between 0 and 1.
+        voe_list : list of floats
+            The VOE value of each frame of the scene, between 0 and 1.
+        location : (int, int, int), optional
+            The frame, x, and y of the violation, or None if there is not one. Default: None
+
+        Returns
+        -------
+        boolean
+            Whether the scene was added.
+        """
+        if SCENE_KEY_PATTERN.match(key) is None:
+            raise ValueError('Invalid IntPhys scene key ' + repr(key) + ' (should be like "O1/0005/4")')
+        if key in self.__answer_dict:
+            return False
+        self.__zip_file.writestr('voe_' + key.replace('/', '_') + '.txt', ''.join(['{} {:.4f}\n'.format(frame, \
+                float(value)) for frame, value in enumerate(voe_list, start=1)]))
+        self.__answer_dict[key] = '{:04f}'.format(float(plausibility))
+        self.__location_dict[key] = ' '.join(str(int(value)) for value in location) if location is not None else \
+                '-1 -1 -1'
+        return True
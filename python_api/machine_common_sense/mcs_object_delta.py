@@ -0,0 +1,96 @@
+import copy
+
+from .mcs_util import MCS_Util
+
+
+class MCS_Object_Delta:
+    """
+    Defines the changes to a list of MCS_Object objects between two steps in the MCS 3D environment.
+
+    Attributes
+    ----------
+    added : list of MCS_Object objects
+        The objects that are in the list now but were not in the list after the previous step.
+    changed : dict
+        The changed attributes of each object that was in the list after both steps, by object UUID. Each value is a
+        dict of only the attributes that changed, by attribute name, with their new values.
+    removed : list of strings
+        The UUIDs of the objects that were in the list after the previous step but are not in the list now.
+    """
+
+    def __init__(
+        self,
+        added=None,
+        changed=None,
+        removed=None
+    ):
+        self.added = [] if added is None else added
+        self.changed = {} if changed is None else changed
+        self.removed = [] if removed is None else removed
+
+    def __str__(self):
+        return MCS_Util.class_to_str(self)
+
+    def is_empty(self):
+        return len(self.added) == 0 and len(self.changed) == 0 and len(self.removed) == 0
+
+    """
+    Returns the delta between the given object lists.
+
+    Parameters
+    ----------
+    previous_object_list : list of MCS_Object objects
+        The object list from the previous step.
+    object_list : list of MCS_Object objects
+        The object list from the current step.
+
+    Returns
+    -------
+    MCS_Object_Delta
+    """
+    @staticmethod
+    def create(previous_object_list, object_list):
+        previous_object_dict = {instance.uuid: instance for instance in previous_object_list}
+        current_uuid_set = set()
+        added = []
+        changed = {}
+        for instance in object_list:
+            current_uuid_set.add(instance.uuid)
+            previous_instance = previous_object_dict.get(instance.uuid, None)
+            if previous_instance is None:
+                added.append(instance)
+                continue
+            previous_vars = vars(previous_instance)
+            changed_vars = {key: value for key, value in vars(instance).items() if key not in previous_vars or \
+                    previous_vars[key] != value}
+            if len(changed_vars) > 0:
+                changed[instance.uuid] = changed_vars
+        removed = [instance.uuid for instance in previous_object_list if instance.uuid not in current_uuid_set]
+        return MCS_Object_Delta(added=added, changed=changed, removed=removed)
+
+    """
+    Returns a new object list made by applying this delta to the given object list, which is not modified.
+
+    Parameters
+    ----------
+    previous_object_list : list of MCS_Object objects
+        The object list from the previous step.
+
+    Returns
+    -------
+    list of MCS_Object objects
+        The object list from the current step, sorted by UUID.
+    """
+    def apply(self, previous_object_list):
+        removed_set = set(self.removed)
+        object_list = []
+        for instance in previous_object_list:
+            if instance.uuid in removed_set:
+                continue
+            changed_vars = self.changed.get(instance.uuid, None)
+            if changed_vars is not None:
+                instance = copy.copy(instance)
+                for key, value in changed_vars.items():
+                    setattr(instance, key, value)
+            object_list.append(instance)
+        return sorted(object_list + self.added, key=lambda x: x.uuid)
@@ -0,0 +1,242 @@
+from typing import Dict, List
+
+import numpy
+
+from .mcs_constants import MAX_MOVE_DISTANCE
+
+
+def _convert_points_to_planar_hull(points: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the counterclockwise convex hull of the given XZ points without
+    collinear points (like shapely's convex_hull), using the monotone chain
+    algorithm.
+
+    Args:
+        points: numpy.ndarray of shape (N, 2)
+
+    Returns:
+        hull: numpy.ndarray of shape (M, 2)
+    '''
+    points = numpy.unique(points, axis=0)
+    if len(points) < 3:
+        return points
+
+    def build_chain(sorted_points):
+        chain = []
+        for point in sorted_points:
+            while len(chain) >= 2 and _cross(chain[-2], chain[-1], point) <= 0:
+                chain.pop()
+            chain.append(point)
+        return chain
+
+    point_list = [tuple(point) for point in points.tolist()]
+    lower = build_chain(point_list)
+    upper = build_chain(point_list[::-1])
+    return numpy.array(lower[:-1] + upper[:-1], dtype=numpy.float64)
+
+
+def _cross(origin, point_1, point_2) -> float:
+    return ((point_1[0] - origin[0]) * (point_2[1] - origin[1]) -
+            (point_1[1] - origin[1]) * (point_2[0] - origin[0]))
+
+
+def _convert_object_to_planar_hull(scene_object: Dict) -> numpy.ndarray:
+    '''
+    Project object bounds (x,y,z) to the XZ convex hull, like
+    MCS_Reward._convert_object_to_planar_polygon, but as a NumPy array.
+    Objects without bounds are projected to their position.
+
+    Args:
+        scene_object: dict
+
+    Returns:
+        hull: numpy.ndarray of shape (M, 2)
+    '''
+    bounds = scene_object.get('objectBounds', None) or {}
+    corners = bounds.get('objectBoundsCorners', None)
+    if not corners:
+        position = scene_object['position']
+        return numpy.array([[position['x'], position['z']]], dtype=numpy.float64)
+    return _convert_points_to_planar_hull(numpy.array(
+        [(pt['x'], pt['z']) for pt in corners], dtype=numpy.float64))
+
+
+def _pad_hulls(hull_list: List[numpy.ndarray]) -> numpy.ndarray:
+    '''
+    Stacks the given hulls into one array, repeating the first vertex of each
+    hull with fewer vertices than the largest hull. The repeated vertices add
+    only zero-length edges, which change no distance or overlap.
+    '''
+    size = max(len(hull) for hull in hull_list)
+    return numpy.stack([numpy.concatenate(
+        [hull, numpy.repeat(hull[:1], size - len(hull), axis=0)])
+        for hull in hull_list])
+
+
+# The number of polygon pairs compared at once, which bounds the size of the
+# temporary (P, M, M, 2) arrays no matter how many objects are in the scene.
+_PAIR_CHUNK_SIZE = 4096
+
+
+def _calc_bounding_box_overlaps(vertices: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns whether the axis-aligned bounding boxes of each pair of polygons
+    intersect (including touching). Polygons whose boxes are apart cannot
+    overlap, so this is the broad phase for _calc_overlaps.
+
+    Args:
+        vertices: numpy.ndarray of shape (N, M, 2)
+
+    Returns:
+        overlaps: boolean numpy.ndarray of shape (N, N)
+    '''
+    minimums = vertices.min(axis=1)
+    maximums = vertices.max(axis=1)
+    return numpy.all((minimums[:, None, :] <= maximums[None, :, :]) &
+                     (minimums[None, :, :] <= maximums[:, None, :]), axis=-1)
+
+
+def _calc_point_to_edge_distances(points: numpy.ndarray,
+                                  polygons: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the distance from every vertex of each polygon to the nearest
+    edge of the polygon it is paired with.
+
+    Args:
+        points: numpy.ndarray of shape (P, M, 2)
+        polygons: numpy.ndarray of shape (P, M, 2)
+
+    Returns:
+        distances: numpy.ndarray of shape (P,), where [p] is the smallest
+        distance from a vertex of points[p] to an edge of polygons[p]
+    '''
+    starts = polygons
+    edges = numpy.roll(polygons, -1, axis=1) - starts
+    # Shape (P, M, 1, 2) - (P, 1, M, 2): vertex v relative to edge e
+    offsets = points[:, :, None, :] - starts[:, None, :, :]
+    edge_lengths = numpy.sum(edges * edges, axis=-1)[:, None, :]
+    safe_lengths = numpy.where(edge_lengths > 0, edge_lengths, 1)
+    t = numpy.clip(numpy.sum(offsets * edges[:, None, :, :], axis=-1) /
+                   safe_lengths, 0, 1)
+    t = numpy.where(edge_lengths > 0, t, 0)
+    nearest = offsets - t[..., None] * edges[:, None, :, :]
+    return numpy.sqrt(numpy.min(numpy.sum(nearest * nearest, axis=-1),
+                                axis=(1, 2)))
+
+
+def _calc_overlaps(vertices_1: numpy.ndarray,
+                   vertices_2: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns whether each pair of convex polygons intersects (including
+    touching), using the separating axis theorem. Each polygon's candidate
+    axes are its edge normals, plus its edge directions and the X and Z axes
+    so that degenerate polygons (points and segments) are also separated.
+
+    Args:
+        vertices_1: numpy.ndarray of shape (P, M, 2)
+        vertices_2: numpy.ndarray of shape (P, M, 2)
+
+    Returns:
+        overlaps: boolean numpy.ndarray of shape (P,)
+    '''
+    def calc_axes(vertices):
+        edges = numpy.roll(vertices, -1, axis=1) - vertices
+        normals = numpy.stack([-edges[..., 1], edges[..., 0]], axis=-1)
+        unit_axes = numpy.broadcast_to(numpy.eye(2), (len(vertices), 2, 2))
+        return numpy.concatenate([normals, edges, unit_axes], axis=1)
+
+    axes = numpy.concatenate([calc_axes(vertices_1), calc_axes(vertices_2)],
+                             axis=1)
+    # Project every vertex of both polygons onto every axis of either one.
+    projections_1 = numpy.einsum('pvd,pad->pav', vertices_1, axes)
+    projections_2 = numpy.einsum('pvd,pad->pav', vertices_2, axes)
+    separated = numpy.any(
+        (projections_1.max(axis=-1) < projections_2.min(axis=-1)) |
+        (projections_2.max(axis=-1) < projections_1.min(axis=-1)), axis=-1)
+    return ~separated
+
+
+def _calc_distances_and_overlaps(vertices: numpy.ndarray):
+    '''
+    Returns the XZ polygon distance and whether the polygons intersect for
+    each pair of convex polygons. Only the pairs whose bounding boxes
+    intersect get the exact overlap test, and only the pairs that do not
+    overlap get the exact distance, _PAIR_CHUNK_SIZE pairs at a time.
+
+    Args:
+        vertices: numpy.ndarray of shape (N, M, 2)
+
+    Returns:
+        distances: numpy.ndarray of shape (N, N)
+        overlaps: boolean numpy.ndarray of shape (N, N)
+    '''
+    count = len(vertices)
+    distances = numpy.zeros((count, count))
+    overlaps = numpy.eye(count, dtype=bool)
+    candidates = _calc_bounding_box_overlaps(vertices)
+    rows, columns = numpy.triu_indices(count, 1)
+    for start in range(0, len(rows), _PAIR_CHUNK_SIZE):
+        row = rows[start:start + _PAIR_CHUNK_SIZE]
+        column = columns[start:start + _PAIR_CHUNK_SIZE]
+        overlapping = candidates[row, column]
+        overlapping[overlapping] = _calc_overlaps(
+            vertices[row[overlapping]], vertices[column[overlapping]])
+        apart = ~overlapping
+        vertices_1 = vertices[row[apart]]
+        vertices_2 = vertices[column[apart]]
+        distance = numpy.zeros(len(row))
+        distance[apart] = numpy.minimum(
+            _calc_point_to_edge_distances(vertices_1, vertices_2),
+            _calc_point_to_edge_distances(vertices_2, vertices_1))
+        overlaps[row, column] = overlaps[column, row] = overlapping
+        distances[row, column] = distances[column, row] = distance
+    return distances, overlaps
+
+
+class MCS_Relationships(object):
+    '''
+    The pairwise spatial relationships between all the objects in a scene,
+    computed at once with NumPy, for use as a dense training signal.
+
+    Attributes:
+        object_ids: list of the N object IDs, in matrix order
+        distances: (N, N) XZ polygon distances (0 if the footprints overlap)
+        overlaps: (N, N) whether the XZ footprints intersect
+        above: (N, N) whether object i is higher than object j
+        next_to: (N, N) whether object i is within MAX_MOVE_DISTANCE of j
+        on_top_of: (N, N) whether object i overlaps and is above object j
+    '''
+
+    def __init__(self, objects: List[Dict]):
+        self.object_ids = [o['objectId'] for o in objects]
+        self.__index_dict = {object_id: index for index, object_id in
+                             enumerate(self.object_ids)}
+        count = len(objects)
+        if count == 0:
+            self.distances = numpy.zeros((0, 0))
+            self.overlaps = numpy.zeros((0, 0), dtype=bool)
+        else:
+            vertices = _pad_hulls([_convert_object_to_planar_hull(o)
+                                   for o in objects])
+            self.distances, self.overlaps = _calc_distances_and_overlaps(
+                vertices)
+        heights = numpy.array([o['position']['y'] for o in objects],
+                              dtype=numpy.float64)
+        not_self = ~numpy.eye(count, dtype=bool)
+        self.above = heights[:, None] > heights[None, :]
+        self.next_to = (self.distances <= MAX_MOVE_DISTANCE) & not_self
+        self.on_top_of = self.overlaps & self.above
+
+    def retrieve_index(self, object_id: str) -> int:
+        '''Returns the matrix index of the object with the given ID.'''
+        return self.__index_dict[object_id]
+
+    def retrieve_distance(self, object_id_1: str, object_id_2: str) -> float:
+        '''Returns the XZ polygon distance between the two given objects.'''
+        return float(self.distances[self.retrieve_index(object_id_1),
+                                    self.retrieve_index(object_id_2)])
+
+    def retrieve_distances_to(self, object_id: str) -> numpy.ndarray:
+        '''Returns the XZ polygon distance from every object to the given
+        object (the distance-to-target signal).'''
+        return self.distances[:, self.retrieve_index(object_id)]
@@ -1,11 +1,9 @@
 from typing import List, Dict, Tuple
 
-from shapely import geometry
-
+from .mcs_constants import MAX_REACH_DISTANCE, MAX_MOVE_DISTANCE
 from .mcs_goal import MCS_Goal
 from .mcs_goal_category import MCS_Goal_Category
 from .mcs_object import MCS_Object
-from .mcs_controller_ai2thor import MAX_REACH_DISTANCE, MAX_MOVE_DISTANCE
 
 GOAL_ACHIEVED = 1
 GOAL_NOT_ACHIEVED = 0
@@ -30,7 +28,7 @@ class MCS_Reward(object):
         return next((o for o in objects if o['objectId'] == target_id), None)
 
     @staticmethod
-    def _convert_object_to_planar_polygon(goal_object: Dict) -> geometry.Polygon:
+    def _convert_object_to_planar_polygon(goal_object: Dict) -> 'geometry.Polygon':
         '''
         Project goal object bounds (x,y,z) to an XZ planar polygon.
 
@@ -40,6 +38,9 @@ class MCS_Reward(object):
         Returns:
             polygons: shapely.geometry.Polygon
         '''
+        # Import shapely here so that importing the reward does not import it.
+        from shapely import geometry
+
         bbox3d = goal_object['objectBounds']['objectBoundsCorners']
         # project to XZ plane
         xz_pts = [(pt['x'], pt['z']) for pt in bbox3d]
@@ -159,6 +160,26 @@ class MCS_Reward(object):
         '''Returns the default reward of 0; not achieved.'''
         return GOAL_NOT_ACHIEVED
 
+    @staticmethod
+    def calculate_relationships(objects: List[Dict]) -> 'MCS_Relationships':
+        '''
+        Calculate the distance, overlap, above, next to, and on top of
+        relationships between every pair of objects at once, as a dense
+        training signal. Uses the same XZ footprints and thresholds as the
+        transferral reward.
+
+        Args:
+            objects: List[Dict]
+
+        Returns:
+            MCS_Relationships: the (N, N) relationship matrices
+
+        '''
+        # Import the relationships here so that importing the reward does
+        # not import numpy.
+        from .mcs_relationships import MCS_Relationships
+        return MCS_Relationships(objects)
+
     @staticmethod
     def calculate_reward(goal: MCS_Goal, objects: Dict, agent: Dict) -> int:
         '''
@@ -0,0 +1,272 @@
+import copy
+import sys
+import uuid
+
+import numpy
+from PIL import Image
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # The shared_memory module was added in Python 3.8.
+    resource_tracker = None
+    shared_memory = None
+
+from .mcs_util import MCS_Util
+
+
+class MCS_Shared_Frame:
+    """
+    Defines a lightweight, picklable handle to a single image frame published into shared memory by an
+    MCS_Shared_Memory_Publisher.
+
+    Attributes
+    ----------
+    name : string
+        The name of the shared memory block holding the frame's pixel data.
+    shape : tuple of integers
+        The shape of the frame's pixel array.
+    dtype : string
+        The NumPy dtype string of the frame's pixel array.
+    mode : string
+        The Pillow image mode of the original frame (like "RGB" or "L").
+    slot : string
+        The publisher slot that holds the frame. When the publisher replaces a slot's block with a larger one, the
+        frames of that slot get the new block's name.
+    """
+
+    def __init__(
+        self,
+        name="",
+        shape=None,
+        dtype="|u1",
+        mode="RGB",
+        slot=None
+    ):
+        self.name = name
+        self.shape = () if shape is None else tuple(shape)
+        self.dtype = dtype
+        self.mode = mode
+        self.slot = slot
+
+    def __str__(self):
+        return MCS_Util.class_to_str(self)
+
+
+class MCS_Shared_Memory_Publisher:
+    """
+    Publishes the images from MCS_Step_Output objects into multiprocessing shared memory so that they may be sent
+    to other processes without pickling any pixel data.
+
+    The publisher keeps a ring of slots, each holding one shared memory block per image. Publishing a step output
+    overwrites the oldest slot, so a consumer must be finished reading a step output before the publisher has
+    published slot_count more step outputs.
+
+    Parameters
+    ----------
+    slot_count : int, optional
+        The number of step outputs that may be in flight at one time. Default: 2
+    """
+
+    IMAGE_LIST_KEYS = ['image_list', 'depth_mask_list', 'object_mask_list']
+
+    def __init__(self, slot_count=2):
+        if shared_memory is None:
+            raise RuntimeError('MCS_Shared_Memory_Publisher requires Python 3.8 or later.')
+        if slot_count < 1:
+            raise ValueError('slot_count must be at least 1, was given ' + str(slot_count))
+
+        # Identifies this publisher's slots, so a consumer of several publishers can tell their slots apart.
+        self.__id = uuid.uuid4().hex
+        self.__slot_index = 0
+        self.__slot_list = [{} for _ in range(slot_count)]
+
+    def close(self):
+        """
+        Closes and unlinks all the shared memory blocks owned by this publisher. Any handles previously published
+        by this publisher will no longer be valid.
+        """
+        for slot in self.__slot_list:
+            for block in slot.values():
+                block.close()
+                block.unlink()
+            slot.clear()
+
+    def publish(self, step_output):
+        """
+        Copies the images from the given step output into the next shared memory slot.
+
+        Parameters
+        ----------
+        step_output : MCS_Step_Output
+            The output data object from a controller.
+
+        Returns
+        -------
+        MCS_Step_Output
+            A shallow copy of the given step output in which the image_list, depth_mask_list, and object_mask_list
+            contain MCS_Shared_Frame handles rather than Pillow.Image objects.
+        """
+        slot_index = self.__slot_index
+        slot = self.__slot_list[slot_index]
+        self.__slot_index = (self.__slot_index + 1) % len(self.__slot_list)
+
+        shared_output = copy.copy(step_output)
+        for key in self.IMAGE_LIST_KEYS:
+            setattr(shared_output, key, [self.__publish_frame(slot, slot_index, (key, index), image) for index, \
+                    image in enumerate(getattr(step_output, key))])
+        return shared_output
+
+    def __publish_frame(self, slot, slot_index, slot_key, image):
+        pixels = numpy.asarray(image)
+        block = slot.get(slot_key, None)
+
+        # Reuse the block from the last time this slot was published unless the new frame does not fit inside it.
+        if block is None or block.size < pixels.nbytes:
+            if block is not None:
+                block.close()
+                block.unlink()
+            block = shared_memory.SharedMemory(create=True, size=max(pixels.nbytes, 1))
+            slot[slot_key] = block
+
+        view = numpy.ndarray(pixels.shape, dtype=pixels.dtype, buffer=block.buf)
+        view[...] = pixels
+        # Release the exported buffer so the block can be closed later.
+        del view
+
+        return MCS_Shared_Frame(
+            name=block.name,
+            shape=pixels.shape,
+            dtype=pixels.dtype.str,
+            mode=(image.mode if isinstance(image, Image.Image) else None),
+            slot=(self.__id + '/' + str(slot_index) + '/' + slot_key[0] + '/' + str(slot_key[1]))
+        )
+
+
+class MCS_Shared_Memory_Consumer:
+    """
+    Maps MCS_Shared_Frame handles published by an MCS_Shared_Memory_Publisher (normally in another process) into
+    NumPy arrays without copying their pixel data.
+
+    Parameters
+    ----------
+    track : boolean, optional
+        Whether this process's resource tracker should track the mapped shared memory blocks. Processes started with
+        the multiprocessing module share the resource tracker of their parent, so leave this True for them. Set this
+        False if this process was started independently of the publisher's process, or else its own resource tracker
+        will unlink the blocks when this process exits. Default: True
+    """
+
+    def __init__(self, track=True):
+        if shared_memory is None:
+            raise RuntimeError('MCS_Shared_Memory_Consumer requires Python 3.8 or later.')
+
+        self.__block_dict = {}
+        # The name of the block last mapped for each publisher slot.
+        self.__slot_name_dict = {}
+        # The number of references to the memory map of each block while no array uses it, by block name.
+        self.__free_reference_count_dict = {}
+        # The replaced blocks that could not be closed yet because arrays returned by this consumer still use them.
+        self.__stale_block_list = []
+        self.__track = track
+
+    def close(self):
+        """
+        Detaches from all the shared memory blocks mapped by this consumer. Any arrays previously returned by this
+        consumer must be deleted first.
+        """
+        for block in list(self.__block_dict.values()) + self.__stale_block_list:
+            block.close()
+        self.__block_dict.clear()
+        self.__free_reference_count_dict.clear()
+        self.__slot_name_dict.clear()
+        self.__stale_block_list = []
+
+    def retrieve_frame(self, frame):
+        """
+        Returns a read-only NumPy array backed directly by the shared memory of the given frame. Its contents will
+        change if the publisher reuses the frame's slot.
+
+        Parameters
+        ----------
+        frame : MCS_Shared_Frame
+            A frame handle.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        block = self.__block_dict.get(frame.name, None)
+        if block is None:
+            block = self.__attach(frame.name)
+            self.__block_dict[frame.name] = block
+            self.__free_reference_count_dict[frame.name] = sys.getrefcount(block._mmap)
+            slot = getattr(frame, 'slot', None)
+            if slot is not None:
+                # The publisher replaced this slot's block with a larger one, so detach from the old one.
+                stale_name = self.__slot_name_dict.get(slot, None)
+                self.__slot_name_dict[slot] = frame.name
+                if stale_name is not None and stale_name in self.__block_dict:
+                    self.__stale_block_list.append(self.__block_dict.pop(stale_name))
+                self.__close_stale_blocks()
+
+        pixels = numpy.ndarray(frame.shape, dtype=numpy.dtype(frame.dtype), buffer=block.buf)
+        pixels.flags.writeable = False
+        return pixels
+
+    def retrieve_image(self, frame):
+        """
+        Returns a Pillow.Image copy of the given frame.
+
+        Parameters
+        ----------
+        frame : MCS_Shared_Frame
+            A frame handle.
+
+        Returns
+        -------
+        Pillow.Image
+        """
+        return Image.fromarray(numpy.array(self.retrieve_frame(frame)), mode=frame.mode)
+
+    def retrieve_step_output(self, shared_output, as_images=False):
+        """
+        Returns a shallow copy of the given step output with each of its frame handles replaced by its pixel data.
+
+        Parameters
+        ----------
+        shared_output : MCS_Step_Output
+            A step output returned by MCS_Shared_Memory_Publisher.publish
+        as_images : boolean, optional
+            Whether to return copied Pillow.Image objects rather than shared NumPy arrays. Default: False
+
+        Returns
+        -------
+        MCS_Step_Output
+        """
+        retrieve = self.retrieve_image if as_images else self.retrieve_frame
+        step_output = copy.copy(shared_output)
+        for key in MCS_Shared_Memory_Publisher.IMAGE_LIST_KEYS:
+            setattr(step_output, key, [retrieve(frame) for frame in getattr(shared_output, key)])
+        return step_output
+
+    def __close_stale_blocks(self):
+        open_block_list = []
+        for block in self.__stale_block_list:
+            # Each array returned from the block references its memory map, and closing the block while an array
+            # uses it would crash on that array's next access, so wait until no array does.
+            if sys.getrefcount(block._mmap) > self.__free_reference_count_dict[block.name]:
+                open_block_list.append(block)
+            else:
+                del self.__free_reference_count_dict[block.name]
+                block.close()
+        self.__stale_block_list = open_block_list
+
+    def __attach(self, name):
+        block = shared_memory.SharedMemory(name=name)
+        if not self.__track:
+            # Python registers every attached block with its resource tracker, which would unlink the block when
+            # this process exits even though the publisher still owns it.
+            resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
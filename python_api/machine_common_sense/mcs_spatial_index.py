@@ -0,0 +1,175 @@
+import math
+
+import numpy
+
+
+class MCS_Spatial_Index:
+    """
+    A uniform grid over the XZ positions of a list of MCS_Object objects, built once per step, to answer nearest
+    neighbor, radius, and view frustum queries without scanning every object.
+
+    Parameters
+    ----------
+    object_list : list of MCS_Object objects
+        The objects to index. Objects without a position are ignored.
+    cell_size : float, optional
+        The width of each grid cell in the environment's global coordinate system. Default: 1.0
+    """
+
+    def __init__(self, object_list, cell_size=1.0):
+        self.cell_size = cell_size
+        self.object_list = [instance for instance in object_list if instance.position]
+        self.positions = numpy.array([[instance.position.get('x', 0), instance.position.get('y', 0), \
+                instance.position.get('z', 0)] for instance in self.object_list], dtype=numpy.float64).reshape(-1, 3)
+
+        # Map each occupied cell to the indexes of the objects inside it.
+        self.__cell_dict = {}
+        cells = numpy.floor(self.positions[:, [0, 2]] / cell_size).astype(numpy.int64)
+        for index, (cell_x, cell_z) in enumerate(cells.tolist()):
+            self.__cell_dict.setdefault((cell_x, cell_z), []).append(index)
+        self.__cell_min = cells.min(axis=0) if len(cells) > 0 else numpy.zeros(2, dtype=numpy.int64)
+        self.__cell_max = cells.max(axis=0) if len(cells) > 0 else numpy.zeros(2, dtype=numpy.int64)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def nearest(self, position, k=1):
+        """
+        Returns the k objects nearest to the given position, sorted by distance.
+
+        Parameters
+        ----------
+        position : dict
+            The "x", "y", and "z" coordinates of the position.
+        k : int, optional
+            The number of objects to return. Default: 1
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        k = min(k, len(self.object_list))
+        if k <= 0:
+            return []
+        point = self.__to_point(position)
+        center = numpy.floor(point[[0, 2]] / self.cell_size).astype(numpy.int64)
+        max_ring = int(max(numpy.abs(self.__cell_min - center).max(), numpy.abs(self.__cell_max - center).max()))
+
+        index_list = []
+        for ring in range(0, max_ring + 1):
+            index_list.extend(self.__indexes_in_ring(center, ring))
+            if len(index_list) >= k:
+                distances = self.__distances(point, index_list)
+                # Any object outside this ring of cells is at least this far away.
+                if numpy.partition(distances, k - 1)[k - 1] <= ring * self.cell_size:
+                    break
+        distances = self.__distances(point, index_list)
+        order = numpy.argsort(distances, kind='stable')[:k]
+        return [self.object_list[index_list[i]] for i in order]
+
+    def within(self, position, radius):
+        """
+        Returns all the objects within the given distance of the given position, sorted by distance.
+
+        Parameters
+        ----------
+        position : dict
+            The "x", "y", and "z" coordinates of the position.
+        radius : float
+            The distance.
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        point = self.__to_point(position)
+        index_list = self.__indexes_within(point, radius)
+        distances = self.__distances(point, index_list)
+        order = numpy.argsort(distances, kind='stable')
+        return [self.object_list[index_list[i]] for i in order if distances[i] <= radius]
+
+    def in_frustum(self, position, rotation, head_tilt, field_of_view, aspect_ratio=1.0, max_distance=None,
+            min_distance=0.0):
+        """
+        Returns all the objects whose positions are inside the view frustum of a camera, sorted by distance.
+
+        Parameters
+        ----------
+        position : dict
+            The "x", "y", and "z" coordinates of the camera.
+        rotation : float
+            The camera's rotation angle around the Y axis in degrees (0 faces +Z and 90 faces +X).
+        head_tilt : float
+            The camera's tilt in degrees (positive is down).
+        field_of_view : float
+            The camera's vertical field of view in degrees.
+        aspect_ratio : float, optional
+            The camera's width divided by its height. Default: 1.0
+        max_distance : float, optional
+            The far clipping plane, or None for no limit. Default: None
+        min_distance : float, optional
+            The near clipping plane. Default: 0.0
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        point = self.__to_point(position)
+        index_list = self.__indexes_within(point, max_distance) if max_distance is not None else \
+                list(range(len(self.object_list)))
+        if len(index_list) == 0:
+            return []
+
+        yaw = math.radians(rotation)
+        pitch = math.radians(head_tilt)
+        forward = numpy.array([math.sin(yaw) * math.cos(pitch), -math.sin(pitch), math.cos(yaw) * math.cos(pitch)])
+        right = numpy.array([math.cos(yaw), 0.0, -math.sin(yaw)])
+        up = numpy.cross(forward, right)
+
+        offsets = self.positions[index_list] - point
+        depth = offsets @ forward
+        tan_vertical = math.tan(math.radians(field_of_view) / 2.0)
+        tan_horizontal = tan_vertical * aspect_ratio
+        inside = (depth > min_distance) & (numpy.abs(offsets @ right) <= depth * tan_horizontal) & \
+                (numpy.abs(offsets @ up) <= depth * tan_vertical)
+        if max_distance is not None:
+            inside &= depth <= max_distance
+
+        distances = numpy.linalg.norm(offsets, axis=1)
+        order = [i for i in numpy.argsort(distances, kind='stable') if inside[i]]
+        return [self.object_list[index_list[i]] for i in order]
+
+    def __distances(self, point, index_list):
+        return numpy.linalg.norm(self.positions[index_list] - point, axis=1)
+
+    def __indexes_in_ring(self, center, ring):
+        if ring == 0:
+            return list(self.__cell_dict.get((int(center[0]), int(center[1])), []))
+        index_list = []
+        x_min, x_max = int(center[0]) - ring, int(center[0]) + ring
+        z_min, z_max = int(center[1]) - ring, int(center[1]) + ring
+        for cell_x in range(x_min, x_max + 1):
+            index_list.extend(self.__cell_dict.get((cell_x, z_min), []))
+            index_list.extend(self.__cell_dict.get((cell_x, z_max), []))
+        for cell_z in range(z_min + 1, z_max):
+            index_list.extend(self.__cell_dict.get((x_min, cell_z), []))
+            index_list.extend(self.__cell_dict.get((x_max, cell_z), []))
+        return index_list
+
+    def __indexes_within(self, point, radius):
+        cell_min = numpy.maximum(numpy.floor((point[[0, 2]] - radius) / self.cell_size).astype(numpy.int64),
+                self.__cell_min)
+        cell_max = numpy.minimum(numpy.floor((point[[0, 2]] + radius) / self.cell_size).astype(numpy.int64),
+                self.__cell_max)
+        # Scan the occupied cells instead if there are fewer of them than cells in the radius.
+        if (cell_max[0] - cell_min[0] + 1) * (cell_max[1] - cell_min[1] + 1) > len(self.__cell_dict):
+            return [index for (cell_x, cell_z), index_list in self.__cell_dict.items() if cell_min[0] <= cell_x <= \
+                    cell_max[0] and cell_min[1] <= cell_z <= cell_max[1] for index in index_list]
+        index_list = []
+        for cell_x in range(int(cell_min[0]), int(cell_max[0]) + 1):
+            for cell_z in range(int(cell_min[1]), int(cell_max[1]) + 1):
+                index_list.extend(self.__cell_dict.get((cell_x, cell_z), []))
+        return index_list
+
+    def __to_point(self, position):
+        return numpy.array([position.get('x', 0), position.get('y', 0), position.get('z', 0)], dtype=numpy.float64)
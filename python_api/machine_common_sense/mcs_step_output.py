@@ -1,8 +1,35 @@
+import concurrent.futures
+
+from .mcs_constants import MAX_REACH_DISTANCE
 from .mcs_goal import MCS_Goal
 from .mcs_pose import MCS_Pose
 from .mcs_return_status import MCS_Return_Status
 from .mcs_util import MCS_Util
 
+class MCS_Lazy_Value:
+    """
+    Wraps a function that computes the value of an MCS_Step_Output attribute the first time it is accessed, so
+    attributes that nobody reads (like the object lists during a preview phase) are never computed.
+
+    Parameters
+    ----------
+    function : callable
+        A function that takes no arguments and returns the attribute value.
+    """
+
+    __slots__ = ('function',)
+
+    def __init__(self, function):
+        self.function = function
+
+class MCS_Transform_Error(Exception):
+    """
+    Raised by retrieve_transform_result on an unpickled MCS_Step_Output (like one from an MCS_Controller_Client or an
+    MCS_Vector_Controller) in place of the exception that the transform raised before the step output was pickled,
+    which may not be picklable itself.
+    """
+    pass
+
 class MCS_Step_Output:
     """
     Defines attributes of the output from a single step in the MCS 3D environment.
@@ -38,6 +65,9 @@ class MCS_Step_Output:
         little bit between each image, and the final image is the state of the environment before your next
         action. The MCS_Step_Output object returned from a call to controller.start_scene will normally have
         a list with only one image, except for a scene with a scripted Preview Phase.
+    object_delta : MCS_Object_Delta or None
+        The objects added to, removed from, or changed in the object_list since the previous step, if the controller
+        was created with delta_output. Otherwise None.
     object_list : list of MCS_Object objects
         The list of metadata for all the interactive objects in the scene. For metadata on structural objects like
         walls, please see structural_object_list
@@ -61,6 +91,9 @@ class MCS_Step_Output:
         Your current rotation angle in degrees.
     step_number : integer
         The step number of your last action, recorded since you started the current scene.
+    structural_object_delta : MCS_Object_Delta or None
+        The objects added to, removed from, or changed in the structural_object_list since the previous step, if the
+        controller was created with delta_output. Otherwise None.
     structural_object_list : list of MCS_Object objects
         The list of metadata for all the structural objects (like walls) in the scene.
     """
@@ -76,6 +109,7 @@ class MCS_Step_Output:
         goal=None,
         head_tilt=0.0,
         image_list=None,
+        object_delta=None,
         object_list=None,
         object_mask_list=None,
         pose=MCS_Pose.UNDEFINED,
@@ -84,6 +118,7 @@ class MCS_Step_Output:
         reward=0,
         rotation=0.0,
         step_number=0,
+        structural_object_delta=None,
         structural_object_list=None
     ):
         self.action_list = [] if action_list is None else action_list
@@ -95,6 +130,7 @@ class MCS_Step_Output:
         self.goal = MCS_Goal() if goal is None else goal
         self.head_tilt = head_tilt
         self.image_list = [] if image_list is None else image_list
+        self.object_delta = object_delta
         self.object_list = [] if object_list is None else object_list
         self.object_mask_list = [] if object_mask_list is None else object_mask_list
         self.pose = pose
@@ -103,7 +139,146 @@ class MCS_Step_Output:
         self.reward = reward
         self.rotation = rotation
         self.step_number = step_number
+        self.structural_object_delta = structural_object_delta
         self.structural_object_list = [] if structural_object_list is None else structural_object_list
+        # The results (or futures of the results) of each transform registered on the controller, by name.
+        self._transform_result_dict = {}
+        # The spatial index over the object_list, built on the first spatial query, and the list it was built from.
+        self._spatial_index = None
+
+    def __getattribute__(self, name):
+        # Any attribute may be given as an MCS_Lazy_Value, which is replaced by its value on first access.
+        value = object.__getattribute__(self, name)
+        if type(value) is MCS_Lazy_Value:
+            value = value.function()
+            object.__setattr__(self, name, value)
+        return value
+
+    def __getstate__(self):
+        # Lazy value functions and futures cannot be pickled, so compute each lazy value and wait for each transform
+        # result before pickling. A failed transform is pickled as an MCS_Transform_Error, so it fails only its own
+        # retrieve_transform_result after unpickling.
+        self.resolve_lazy_values()
+        state = self.__dict__.copy()
+        state['_spatial_index'] = None
+        state['_transform_result_dict'] = {}
+        for name in self._transform_result_dict:
+            try:
+                state['_transform_result_dict'][name] = self.retrieve_transform_result(name)
+            except Exception as e:
+                state['_transform_result_dict'][name] = MCS_Transform_Error('Transform ' + repr(name) + \
+                        ' failed: ' + repr(e))
+        return state
+
+    def __setstate__(self, state):
+        # Support step outputs pickled before transform results were added.
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_transform_result_dict', {})
+        self.__dict__.setdefault('_spatial_index', None)
 
     def __str__(self):
+        self.resolve_lazy_values()
         return MCS_Util.class_to_str(self)
+
+    def retrieve_spatial_index(self):
+        """Returns the MCS_Spatial_Index over the object_list, building it if it does not exist or is out of date."""
+        if self._spatial_index is None or self._spatial_index[0] is not self.object_list:
+            # Import the spatial index here so that importing the step output does not import numpy.
+            from .mcs_spatial_index import MCS_Spatial_Index
+            self._spatial_index = (self.object_list, MCS_Spatial_Index(self.object_list))
+        return self._spatial_index[1]
+
+    def nearest(self, k=1, position=None):
+        """
+        Returns the k objects in the object_list nearest to your position (or the given position), sorted by distance.
+
+        Parameters
+        ----------
+        k : int, optional
+            The number of objects to return. Default: 1
+        position : dict, optional
+            The "x", "y", and "z" coordinates from which to measure. Default: your position
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        return self.retrieve_spatial_index().nearest(self.position if position is None else position, k)
+
+    def within(self, radius=None, position=None):
+        """
+        Returns all the objects in the object_list within the given distance of your position (or the given
+        position), sorted by distance.
+
+        Parameters
+        ----------
+        radius : float, optional
+            The distance. Default: MAX_REACH_DISTANCE
+        position : dict, optional
+            The "x", "y", and "z" coordinates from which to measure. Default: your position
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        if radius is None:
+            radius = MAX_REACH_DISTANCE
+        return self.retrieve_spatial_index().within(self.position if position is None else position, radius)
+
+    def in_frustum(self, max_distance=None):
+        """
+        Returns all the objects in the object_list whose positions are inside your camera's view frustum, sorted by
+        distance.
+
+        Parameters
+        ----------
+        max_distance : float, optional
+            The greatest distance at which to include objects. Default: the camera's far clipping plane
+
+        Returns
+        -------
+        list of MCS_Object objects
+        """
+        near, far = self.camera_clipping_planes
+        width, height = self.camera_aspect_ratio
+        camera_position = dict(self.position)
+        if self.camera_height:
+            camera_position['y'] = self.camera_height
+        return self.retrieve_spatial_index().in_frustum(camera_position, self.rotation, self.head_tilt,
+                self.camera_field_of_view, aspect_ratio=((width / height) if height else 1.0),
+                max_distance=(max_distance if max_distance is not None else (far or None)), min_distance=near)
+
+    def resolve_lazy_values(self):
+        """Computes the value of every attribute that has not yet been accessed."""
+        for name, value in list(vars(self).items()):
+            if type(value) is MCS_Lazy_Value:
+                getattr(self, name)
+
+    def attach_transform_results(self, transform_result_dict):
+        self._transform_result_dict = {**self._transform_result_dict, **transform_result_dict}
+
+    def retrieve_transform_result(self, name, timeout=None):
+        """
+        Returns the result of the transform with the given name that was registered on the controller, waiting for
+        it to finish running if needed.
+
+        Parameters
+        ----------
+        name : string
+            The transform name.
+        timeout : float, optional
+            The number of seconds to wait, or None to wait forever. Default: None
+
+        Returns
+        -------
+        any
+            The transform result. Raises any exception raised by the transform function (or an MCS_Transform_Error if
+            the step output was pickled after it failed), a KeyError if no transform with the given name ran on this
+            step output, or a concurrent.futures.TimeoutError if it does not finish in time.
+        """
+        result = self._transform_result_dict[name]
+        if isinstance(result, concurrent.futures.Future):
+            return result.result(timeout=timeout)
+        if isinstance(result, MCS_Transform_Error):
+            raise result
+        return result
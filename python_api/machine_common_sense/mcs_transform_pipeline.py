@@ -0,0 +1,59 @@
+import concurrent.futures
+import os
+
+
+class MCS_Transform_Pipeline:
+    """
+    Runs the registered transform functions (like resizing, normalizing, or computing features) on each step output in
+    a pool of background threads, so they can run while the controller is already simulating the next action.
+
+    Parameters
+    ----------
+    worker_count : int, optional
+        The number of threads in the pool. Default: the smaller of 4 and the number of CPUs
+    """
+
+    def __init__(self, worker_count=None):
+        self.__executor = None
+        self.__transform_dict = {}
+        self.__worker_count = worker_count if worker_count is not None else min(4, os.cpu_count() or 1)
+
+    def close(self):
+        """Waits for all the submitted transforms to finish and stops the threads."""
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    def has_transforms(self):
+        return len(self.__transform_dict) > 0
+
+    def register_transform(self, name, function):
+        """
+        Registers the given transform function to run on each future step output.
+
+        Parameters
+        ----------
+        name : string
+            The name with which to retrieve the transform's result from the step output.
+        function : callable
+            A function that takes an MCS_Step_Output and returns the transform's result. It runs in another thread,
+            so it must not modify the step output.
+        """
+        self.__transform_dict[name] = function
+
+    def unregister_transform(self, name):
+        self.__transform_dict.pop(name, None)
+
+    def submit(self, step_output):
+        """
+        Starts running every registered transform on the given step output and attaches their futures to it, so
+        their results can be retrieved with step_output.retrieve_transform_result.
+        """
+        if not self.has_transforms():
+            return step_output
+        if self.__executor is None:
+            self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__worker_count,
+                    thread_name_prefix='MCS_Transform')
+        step_output.attach_transform_results({name: self.__executor.submit(function, step_output) for name, function \
+                in self.__transform_dict.items()})
+        return step_output
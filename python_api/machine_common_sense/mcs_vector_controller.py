@@ -0,0 +1,252 @@
+import functools
+import multiprocessing
+import os
+import traceback
+
+import numpy
+
+from .mcs import MCS
+
+
+def load_scene(scene):
+    """Returns the config data for the given scene config dict or scene config JSON file path."""
+    if isinstance(scene, dict):
+        return scene
+
+    config_data, status = MCS.load_config_json_file(scene)
+    if status is not None:
+        raise ValueError(status)
+    if 'name' not in config_data:
+        config_data['name'] = os.path.splitext(os.path.basename(scene))[0]
+    return config_data
+
+
+def run_worker(connection, controller_factory, max_step_count):
+    """Runs one controller in a worker process, handling the commands sent from an MCS_Vector_Controller."""
+    controller = None
+    goal_last_step = None
+    try:
+        controller = controller_factory()
+        while True:
+            command, data = connection.recv()
+            if command == 'close':
+                break
+            try:
+                if command == 'reset':
+                    step_output = controller.start_scene(load_scene(data))
+                    goal_last_step = step_output.goal.last_step if step_output.goal is not None else None
+                    connection.send(('ok', (summarize_step_output(step_output), False)))
+                elif command == 'step':
+                    action, params = data
+                    step_output = controller.step(action, **params)
+                    # A scene ends on its goal's last step, or on the max_step_count if its goal has no last step.
+                    last_step = goal_last_step if goal_last_step is not None else max_step_count
+                    done = step_output is None or (last_step is not None and step_output.step_number >= last_step)
+                    if done:
+                        controller.end_scene(None, None)
+                    connection.send(('ok', (summarize_step_output(step_output), done)))
+                else:
+                    raise ValueError('Unknown command ' + str(command))
+            except Exception:
+                connection.send(('error', traceback.format_exc()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+
+
+def summarize_step_output(step_output):
+    """Returns the data from the given step output that is sent back to the MCS_Vector_Controller, keeping only the
+    last image of each image list."""
+    if step_output is None:
+        return None
+    return {
+        'image': numpy.asarray(step_output.image_list[-1]) if len(step_output.image_list) > 0 else None,
+        'depth_mask': numpy.asarray(step_output.depth_mask_list[-1]) if len(step_output.depth_mask_list) > 0 \
+                else None,
+        'object_mask': numpy.asarray(step_output.object_mask_list[-1]) if len(step_output.object_mask_list) > 0 \
+                else None,
+        'head_tilt': step_output.head_tilt,
+        'object_list': step_output.object_list,
+        'position': [step_output.position.get(axis, 0.0) for axis in ('x', 'y', 'z')],
+        'return_status': step_output.return_status,
+        'reward': step_output.reward,
+        'rotation': step_output.rotation,
+        'step_number': step_output.step_number,
+        'structural_object_list': step_output.structural_object_list
+    }
+
+
+class MCS_Vector_Controller:
+    """
+    Runs a batch of MCS scenes in lockstep, with one controller in its own process for each scene in the batch, and
+    returns batched NumPy observations for each step. Whenever a scene ends, its controller automatically starts the
+    next scene from the scene list.
+
+    Parameters
+    ----------
+    scene_list : list of strings or dicts
+        The MCS scene configuration JSON file paths (or config data dicts) to run, in order. Scenes are handed out to
+        the controllers in round-robin order, and the list repeats once every scene has been started.
+    controller_count : int
+        The number of scenes to run at once (the batch size), each in its own controller process.
+    unity_app_file_path : str, optional
+        The file path to your MCS Unity application. Required unless controller_factory is given.
+    controller_factory : callable, optional
+        A picklable function that takes no arguments and returns a new MCS_Controller. Use this to customize how the
+        controllers are created (for example, with MCS.connect_controller). Default: MCS.create_controller with the
+        given unity_app_file_path and controller_kwargs
+    max_step_count : int, optional
+        The step after which to end each scene that does not have its own goal.last_step. Default: None
+    start_method : str, optional
+        The multiprocessing start method for the controller processes. Default: the platform default
+    **controller_kwargs
+        Keyword arguments for MCS.create_controller, like screen_width or resize.
+    """
+
+    def __init__(self, scene_list, controller_count, unity_app_file_path=None, controller_factory=None,
+            max_step_count=None, start_method=None, **controller_kwargs):
+        if len(scene_list) == 0:
+            raise ValueError('MCS_Vector_Controller needs at least one scene')
+        if controller_factory is None:
+            if unity_app_file_path is None:
+                raise ValueError('MCS_Vector_Controller needs either a unity_app_file_path or a controller_factory')
+            controller_factory = functools.partial(MCS.create_controller, unity_app_file_path, **controller_kwargs)
+
+        self.__scene_list = list(scene_list)
+        self.__scene_index = 0
+        self.__current_scene_list = [None] * controller_count
+
+        context = multiprocessing.get_context(start_method)
+        self.__connection_list = []
+        self.__process_list = []
+        for _ in range(controller_count):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=run_worker, args=(child_connection, controller_factory, max_step_count),
+                    daemon=True)
+            process.start()
+            child_connection.close()
+            self.__connection_list.append(parent_connection)
+            self.__process_list.append(process)
+
+    def __len__(self):
+        return len(self.__connection_list)
+
+    def close(self):
+        """Ends all the controller processes."""
+        for connection in self.__connection_list:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.__process_list:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        self.__connection_list = []
+        self.__process_list = []
+
+    def reset(self):
+        """
+        Starts the next scene on every controller.
+
+        Returns
+        -------
+        dict
+            The batched observations (see step).
+        """
+        self.__send_all([('reset', self.__next_scene(index)) for index in range(len(self))])
+        summary_list = [summary for summary, _ in self.__receive_all(range(len(self)))]
+        return self.__batch(summary_list)
+
+    def step(self, action_list):
+        """
+        Runs one action on every controller.
+
+        Parameters
+        ----------
+        action_list : list of strings or (string, dict) tuples
+            One action for each controller, either as an action string (like "MoveAhead" or
+            "RotateLook,rotation=45") or as an (action, params) tuple.
+
+        Returns
+        -------
+        dict
+            The batched observations: "image" (K x H x W x 3), "depth_mask" (K x H x W), and "object_mask"
+            (K x H x W x 3) arrays of the last image from each controller; "position" (K x 3), "rotation" (K), and
+            "head_tilt" (K) arrays; and "object_list" and "structural_object_list" lists of K lists of MCS_Object
+            objects. If a scene ended on this step, its observations are from the start of its next scene.
+        numpy.ndarray
+            The reward from each controller.
+        numpy.ndarray
+            Whether the scene on each controller ended on this step.
+        list of dicts
+            The "scene_name", "step_number", and "return_status" from each controller. If a scene ended on this
+            step, its dict also has its final observations in "terminal_observation".
+        """
+        if len(action_list) != len(self):
+            raise ValueError('MCS_Vector_Controller needs ' + str(len(self)) + ' actions but was given ' + \
+                    str(len(action_list)))
+
+        self.__send_all([('step', (action, {}) if isinstance(action, str) else (action[0], dict(action[1]))) for \
+                action in action_list])
+        result_list = self.__receive_all(range(len(self)))
+
+        reward_list = numpy.array([(summary['reward'] if summary is not None else 0) for summary, _ in \
+                result_list], dtype=numpy.float32)
+        done_list = numpy.array([done for _, done in result_list], dtype=bool)
+        info_list = [self.__info(index, summary) for index, (summary, _) in enumerate(result_list)]
+
+        # Automatically start the next scene on each controller whose scene ended.
+        done_index_list = [index for index in range(len(self)) if done_list[index]]
+        summary_list = [summary for summary, _ in result_list]
+        if len(done_index_list) > 0:
+            for index in done_index_list:
+                info_list[index]['terminal_observation'] = summary_list[index]
+                self.__connection_list[index].send(('reset', self.__next_scene(index)))
+            for index, (summary, _) in zip(done_index_list, self.__receive_all(done_index_list)):
+                summary_list[index] = summary
+
+        return self.__batch(summary_list), reward_list, done_list, info_list
+
+    def __batch(self, summary_list):
+        observations = {}
+        for key in ('image', 'depth_mask', 'object_mask'):
+            observations[key] = numpy.stack([summary[key] for summary in summary_list]) if all( \
+                    summary[key] is not None for summary in summary_list) else None
+        for key in ('position', 'rotation', 'head_tilt'):
+            observations[key] = numpy.array([summary[key] for summary in summary_list], dtype=numpy.float32)
+        for key in ('object_list', 'structural_object_list'):
+            observations[key] = [summary[key] for summary in summary_list]
+        return observations
+
+    def __info(self, index, summary):
+        scene = self.__current_scene_list[index]
+        return {
+            'scene_name': (scene.get('name', None) if isinstance(scene, dict) else scene),
+            'step_number': (summary['step_number'] if summary is not None else None),
+            'return_status': (summary['return_status'] if summary is not None else None)
+        }
+
+    def __next_scene(self, index):
+        scene = self.__scene_list[self.__scene_index % len(self.__scene_list)]
+        self.__scene_index += 1
+        self.__current_scene_list[index] = scene
+        return scene
+
+    def __receive_all(self, index_list):
+        # Receive every reply before raising any error, so no stale reply is left in a pipe for the next command.
+        result_list = []
+        error_list = []
+        for index in index_list:
+            status, result = self.__connection_list[index].recv()
+            if status == 'error':
+                error_list.append('MCS_Vector_Controller process ' + str(index) + ' failed:\n' + result)
+            result_list.append(result)
+        if len(error_list) > 0:
+            raise RuntimeError('\n'.join(error_list))
+        return result_list
+
+    def __send_all(self, message_list):
+        for connection, message in zip(self.__connection_list, message_list):
+            connection.send(message)
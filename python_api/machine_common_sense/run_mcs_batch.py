@@ -0,0 +1,318 @@
+"""
+Runs the actions of many MCS scenes across a pool of controller processes, each with its own MCS Unity application,
+and appends the result and timings of each scene to a JSON lines results file as soon as the scene ends. Rerunning
+the same batch with the same results file skips the scenes that already have results, so a batch that stopped (or
+crashed) resumes where it stopped.
+
+The actions of each scene are, in order of preference: the "actions" of the scene in the manifest; the action script
+named after the scene in the action script directory; or the "answer" "actions" of the scene configuration file (like
+the scene generator saves). An action script has one action string per line, like "MoveAhead,amount=0.5" (blank
+lines and lines starting with "#" are ignored), or is a JSON list of action strings or of {"action", "params"} dicts.
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+from machine_common_sense.mcs import MCS
+from machine_common_sense.mcs_util import MCS_Util
+from machine_common_sense.mcs_vector_controller import load_scene
+
+ACTION_SCRIPT_EXTENSION_LIST = ['.txt', '.json']
+OK = 'ok'
+ERROR = 'error'
+
+# The controller of this worker process, created once by initialize_worker and reused for each of its scenes.
+_worker_controller = None
+
+
+def find_task_list(scene_source):
+    """
+    Returns the scene tasks in the given scene directory (each of its JSON files, sorted by name) or manifest file.
+    Each line of a manifest is either a scene configuration JSON file path, or a JSON object with the "scene" file
+    path and optionally its "actions" (an action script file path or a list of actions). Relative paths in a manifest
+    are relative to its directory. Each task is a dict with the absolute "scene" file path and optionally its
+    "actions".
+    """
+    if os.path.isdir(scene_source):
+        return [{'scene': os.path.abspath(os.path.join(scene_source, file_name))} for file_name in \
+                sorted(os.listdir(scene_source)) if os.path.splitext(file_name)[1] == '.json' and \
+                os.path.isfile(os.path.join(scene_source, file_name))]
+
+    directory = os.path.dirname(os.path.abspath(scene_source))
+    task_list = []
+    with open(scene_source) as manifest_file:
+        for line in manifest_file:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            task = json.loads(line) if line.startswith('{') else {'scene': line}
+            task['scene'] = os.path.abspath(os.path.join(directory, task['scene']))
+            if isinstance(task.get('actions', None), str):
+                task['actions'] = os.path.join(directory, task['actions'])
+            task_list.append(task)
+    return task_list
+
+
+def create_scene_key(scene_file_path):
+    """Returns the key that identifies the given scene file path however it was written (like "scenes/a.json",
+    "./scenes/a.json", or its absolute path). Relative paths are relative to the current directory."""
+    return os.path.normcase(os.path.abspath(scene_file_path))
+
+
+def load_action_list(action_source):
+    """Returns the list of (action, params) tuples from the given action script file path, or from the given list of
+    action strings, (action, params) tuples, or {"action", "params"} dicts."""
+    if isinstance(action_source, str):
+        with open(action_source) as action_file:
+            text = action_file.read()
+        action_source = json.loads(text) if text.lstrip().startswith('[') else [line.strip() for line in \
+                text.splitlines() if len(line.strip()) > 0 and not line.strip().startswith('#')]
+
+    action_list = []
+    for action in action_source:
+        if isinstance(action, str):
+            action_name, params = MCS_Util.input_to_action_and_params(action)
+            if action_name is None or params is None:
+                raise ValueError('Invalid action ' + repr(action))
+        elif isinstance(action, dict):
+            action_name, params = action['action'], action.get('params', {})
+        else:
+            action_name, params = action
+        action_list.append((action_name, dict(params)))
+    return action_list
+
+
+def find_action_list(task, config_data, action_directory=None):
+    """Returns the list of (action, params) tuples for the given scene task, or None if it has no actions."""
+    if task.get('actions', None) is not None:
+        return load_action_list(task['actions'])
+    if action_directory is not None:
+        name = os.path.splitext(os.path.basename(task['scene']))[0]
+        for extension in ACTION_SCRIPT_EXTENSION_LIST:
+            action_file_path = os.path.join(action_directory, name + extension)
+            if os.path.isfile(action_file_path):
+                return load_action_list(action_file_path)
+    answer = config_data.get('answer', None)
+    if isinstance(answer, dict) and answer.get('actions', None) is not None:
+        return load_action_list(answer['actions'])
+    return None
+
+
+def run_scene(controller, task, action_directory=None, max_step_count=None):
+    """Runs the actions of the given scene task on the given controller and returns its result dict."""
+    start = time.perf_counter()
+    config_data = load_scene(task['scene'])
+    action_list = find_action_list(task, config_data, action_directory)
+    if action_list is None:
+        raise ValueError('No actions for scene ' + task['scene'])
+
+    scene_start = time.perf_counter()
+    step_output = controller.start_scene(config_data)
+    start_scene_seconds = time.perf_counter() - scene_start
+    last_step = step_output.goal.last_step if step_output is not None and step_output.goal is not None else None
+
+    step_time_list = []
+    for action, params in action_list:
+        if step_output is None or (last_step is not None and step_output.step_number >= last_step) or \
+                (max_step_count is not None and len(step_time_list) >= max_step_count):
+            break
+        step_start = time.perf_counter()
+        step_output = controller.step(action, **params)
+        step_time_list.append(time.perf_counter() - step_start)
+    controller.end_scene(None, None)
+
+    return {
+        'scene': task['scene'],
+        'name': config_data.get('name', None),
+        'status': OK,
+        'action_count': len(action_list),
+        'step_count': len(step_time_list),
+        'reward': step_output.reward if step_output is not None else None,
+        'return_status': step_output.return_status if step_output is not None else None,
+        'start_scene_seconds': start_scene_seconds,
+        'mean_step_seconds': (sum(step_time_list) / len(step_time_list)) if len(step_time_list) > 0 else None,
+        'max_step_seconds': max(step_time_list) if len(step_time_list) > 0 else None,
+        'total_seconds': time.perf_counter() - start
+    }
+
+
+def run_task(controller, task, scene_function=run_scene):
+    """Returns the result dict of running the given scene task with the given scene function, or of its error."""
+    start = time.perf_counter()
+    try:
+        return scene_function(controller, task)
+    except Exception as e:
+        return {
+            'scene': task['scene'],
+            'status': ERROR,
+            'error': str(e) or type(e).__name__,
+            'traceback': traceback.format_exc(),
+            'total_seconds': time.perf_counter() - start
+        }
+
+
+def initialize_worker(controller_factory):
+    global _worker_controller
+    _worker_controller = controller_factory()
+
+
+def run_worker_task(task, scene_function=run_scene):
+    result = run_task(_worker_controller, task, scene_function)
+    result['process'] = os.getpid()
+    return result
+
+
+def read_results(results_file_path):
+    """Returns the result dicts in the given JSON lines results file (if it exists), skipping a last line that was
+    only partly written when its batch stopped."""
+    result_list = []
+    if not os.path.isfile(results_file_path):
+        return result_list
+    with open(results_file_path) as results_file:
+        for line in results_file:
+            try:
+                result_list.append(json.loads(line))
+            except ValueError:
+                pass
+    return result_list
+
+
+def run_batch(task_list, results_file_path, controller_factory, process_count=1, action_directory=None,
+        max_step_count=None, retry_errors=False, start_method=None, callback=None, scene_function=None):
+    """
+    Runs the given scene tasks (see find_task_list) and appends their results to the given JSON lines results file.
+
+    Parameters
+    ----------
+    task_list : list of dicts
+        The scene tasks to run.
+    results_file_path : str
+        The JSON lines file of the scene results. Scenes that already have results in this file are skipped
+        (matched by absolute path, which the new results record).
+    controller_factory : callable
+        A picklable function that takes no arguments and returns a new MCS_Controller, called once in each process.
+    process_count : int, optional
+        The number of controller processes, or 0 to run every scene in this process. Default: 1
+    action_directory : str, optional
+        The directory of the action scripts named after the scenes. Default: None
+    max_step_count : int, optional
+        The most actions to run in each scene. Default: None
+    retry_errors : boolean, optional
+        Whether to rerun the scenes whose existing results are errors. Default: False
+    start_method : str, optional
+        The multiprocessing start method for the controller processes. Default: the platform default
+    callback : callable, optional
+        A function called with each new result dict.
+    scene_function : callable, optional
+        A picklable function that takes a controller and a scene task, runs the scene, and returns its result dict
+        (which must have the "scene" and the "status"). Default: run_scene with the given action_directory and
+        max_step_count
+
+    Returns
+    -------
+    list of dicts
+        The new result dicts, in the order in which their scenes ended.
+    """
+    finished_set = set(create_scene_key(result['scene']) for result in read_results(results_file_path) if not \
+            retry_errors or result.get('status', None) == OK)
+    # Record each scene by its absolute path so later runs from any directory recognize it.
+    pending_task_list = [dict(task, scene=os.path.abspath(task['scene'])) for task in task_list if \
+            create_scene_key(task['scene']) not in finished_set]
+    if scene_function is None:
+        scene_function = functools.partial(run_scene, action_directory=action_directory, max_step_count=max_step_count)
+
+    # Write a newline first if the last line was only partly written so the next result starts on its own line.
+    if os.path.isfile(results_file_path) and os.path.getsize(results_file_path) > 0:
+        with open(results_file_path, 'rb') as results_file:
+            results_file.seek(-1, os.SEEK_END)
+            needs_newline = results_file.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    new_result_list = []
+    with open(results_file_path, 'a') as results_file:
+        if needs_newline:
+            results_file.write('\n')
+
+        def save(result):
+            # Save each result immediately so it survives a crash.
+            results_file.write(json.dumps(result) + '\n')
+            results_file.flush()
+            os.fsync(results_file.fileno())
+            new_result_list.append(result)
+            if callback is not None:
+                callback(result)
+
+        if process_count <= 0:
+            controller = controller_factory()
+            for task in pending_task_list:
+                save(run_task(controller, task, scene_function))
+        elif len(pending_task_list) > 0:
+            context = multiprocessing.get_context(start_method)
+            with context.Pool(min(process_count, len(pending_task_list)), initializer=initialize_worker,
+                    initargs=(controller_factory,)) as pool:
+                for result in pool.imap_unordered(functools.partial(run_worker_task, scene_function=scene_function),
+                        pending_task_list):
+                    save(result)
+                pool.close()
+                pool.join()
+    return new_result_list
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Run the actions of many MCS scenes across a pool of MCS Unity '
+            'applications and save the result of each scene. Rerun with the same results file to resume.')
+    parser.add_argument('unity_app_file_path', help='The file path to the MCS Unity application')
+    parser.add_argument('scene_source', help='A directory of scene configuration JSON files, or a manifest file with '
+            'one scene file path (or {"scene", "actions"} JSON object) per line')
+    parser.add_argument('--results', default='batch_results.jsonl', dest='results_file_path',
+            help='The JSON lines file of the scene results [default=%(default)s]')
+    parser.add_argument('--processes', type=int, default=1, dest='process_count',
+            help='The number of Unity applications to run at once [default=%(default)s]')
+    parser.add_argument('--actions_dir', default=None, dest='action_directory',
+            help='A directory of action scripts named after the scenes (like "scene_1.txt")')
+    parser.add_argument('--max_steps', type=int, default=None, dest='max_step_count',
+            help='The most actions to run in each scene')
+    parser.add_argument('--retry_errors', default=False, action='store_true',
+            help='Rerun the scenes whose existing results are errors')
+    parser.add_argument('--debug', default=False, choices=['true', 'file', 'terminal'],
+            help='Save debug files and/or print debug output from the controllers')
+    parser.add_argument('--screen_width', type=int, default=None, help='Render width in pixels [default=600]')
+    parser.add_argument('--screen_height', type=int, default=None, help='Render height in pixels [default=400]')
+    parser.add_argument('--quality', default='Medium', help='Render quality [default=%(default)s]')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    task_list = find_task_list(args.scene_source)
+    controller_factory = functools.partial(MCS.create_controller, args.unity_app_file_path,
+            debug=(True if args.debug == 'true' else args.debug), screen_width=args.screen_width,
+            screen_height=args.screen_height, quality=args.quality)
+
+    print(f'FOUND {len(task_list)} SCENES... STARTING {args.process_count} MCS UNITY APPS...')
+    start = time.perf_counter()
+
+    def print_result(result):
+        if result['status'] == OK:
+            print(f'FINISHED {result["scene"]} WITH {result["step_count"]} STEPS IN {result["total_seconds"]:0.4f} ' + \
+                    f'SECONDS (REWARD {result["reward"]})')
+        else:
+            print(f'FAILED {result["scene"]}: {result["error"]}')
+
+    result_list = run_batch(task_list, args.results_file_path, controller_factory, args.process_count,
+            args.action_directory, args.max_step_count, args.retry_errors, callback=print_result)
+
+    error_count = len([result for result in result_list if result['status'] != OK])
+    print('================================================================================')
+    print(f'RAN {len(result_list)} SCENES ({len(task_list) - len(result_list)} ALREADY DONE, {error_count} FAILED) ' + \
+            f'IN {(time.perf_counter() - start):0.4f} SECONDS')
+    print(f'SAVED THE RESULTS TO {args.results_file_path}')
+
+
+if __name__ == "__main__":
+    main()
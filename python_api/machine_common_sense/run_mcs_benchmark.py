@@ -0,0 +1,265 @@
+"""
+Micro-benchmarks of the Python step pipeline that do not need the MCS Unity application. Feeds synthetic AI2-THOR
+events (or the metadata of a recorded event, like an ai2thor_output_<step>.json debug file) into the controller's
+output functions, the reward, the parameter validation, and the MCS_Util serialization, and reports the throughput and
+memory allocations of each function.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy
+
+from machine_common_sense.mcs_controller_ai2thor import MCS_Controller_AI2THOR
+from machine_common_sense.mcs_goal import MCS_Goal
+from machine_common_sense.mcs_goal_category import MCS_Goal_Category
+from machine_common_sense.mcs_reward import MCS_Reward
+from machine_common_sense.mcs_util import MCS_Util
+
+MATERIAL_LIST = ['Ceramic', 'Fabric', 'Metal', 'Plastic', 'Wood', 'Unknown']
+
+
+def create_object_metadata(object_id, random_generator, visible=True):
+    """Returns the AI2-THOR metadata of an object with a random position and size."""
+    position = {
+        'x': round(random_generator.uniform(-4.5, 4.5), 4),
+        'y': round(random_generator.uniform(0, 1), 4),
+        'z': round(random_generator.uniform(-4.5, 4.5), 4)
+    }
+    half_size = [random_generator.uniform(0.05, 0.5) for _ in range(3)]
+    corner_list = [{
+        'x': position['x'] + x_sign * half_size[0],
+        'y': position['y'] + y_sign * half_size[1],
+        'z': position['z'] + z_sign * half_size[2]
+    } for y_sign in [1, -1] for x_sign in [1, -1] for z_sign in [1, -1]]
+    distance_xz = (position['x'] ** 2 + position['z'] ** 2) ** 0.5
+    return {
+        'direction': {'x': position['x'], 'y': position['y'], 'z': position['z']},
+        'distance': (distance_xz ** 2 + position['y'] ** 2) ** 0.5,
+        'distanceXZ': distance_xz,
+        'isPickedUp': False,
+        'mass': round(random_generator.uniform(0.1, 10), 4),
+        'objectBounds': {
+            'objectBoundsCorners': corner_list
+        },
+        'objectId': object_id,
+        'position': position,
+        'rotation': {'x': 0, 'y': random_generator.choice([0, 45, 90, 135, 180]), 'z': 0},
+        'salientMaterials': random_generator.sample(MATERIAL_LIST, 2),
+        'visibleInCamera': visible
+    }
+
+
+def create_frame_list(metadata, screen_width, screen_height, frame_count, seed):
+    """Returns the given number of events with random RGB, depth, and object mask frames, and the object color map of
+    the objects in the given metadata. Like the raw Unity buffer that MCS_Controller_AI2THOR's depth override returns,
+    each depth frame is a uint8 (H, W, 3) array."""
+    numpy_generator = numpy.random.default_rng(seed)
+    object_id_to_color = {object_metadata['objectId']: tuple(int(value) for value in numpy_generator.integers(0, 256, \
+            3)) for object_metadata in metadata.get('objects', []) + metadata.get('structuralObjects', [])}
+    return [SimpleNamespace(
+        depth_frame=numpy_generator.integers(0, 256, (screen_height, screen_width, 3), dtype=numpy.uint8),
+        frame=numpy_generator.integers(0, 256, (screen_height, screen_width, 3), dtype=numpy.uint8),
+        instance_segmentation_frame=numpy_generator.integers(0, 256, (screen_height, screen_width, 3), \
+                dtype=numpy.uint8),
+        object_id_to_color=object_id_to_color
+    ) for _ in range(frame_count)]
+
+
+def create_event(object_count=20, structural_object_count=10, screen_width=MCS_Controller_AI2THOR.SCREEN_WIDTH,
+        screen_height=MCS_Controller_AI2THOR.SCREEN_HEIGHT, frame_count=1, seed=0):
+    """Returns a synthetic AI2-THOR step event with the given numbers of objects, structural objects, and frames. Half
+    of the objects are visible in the camera."""
+    random_generator = random.Random(seed)
+    metadata = {
+        'agent': {
+            'cameraHorizon': 0,
+            'position': {'x': 0, 'y': 0.4625, 'z': 0},
+            'rotation': {'x': 0, 'y': 0, 'z': 0}
+        },
+        'cameraPosition': {'y': 0.4625},
+        'clippingPlaneFar': 15,
+        'clippingPlaneNear': 0,
+        'fov': 42.5,
+        'lastActionStatus': 'SUCCESSFUL',
+        'lastActionSuccess': True,
+        'objects': [create_object_metadata('object_' + str(index), random_generator, visible=(index % 2 == 0)) for \
+                index in range(object_count)],
+        'structuralObjects': [create_object_metadata('wall_' + str(index), random_generator) for index in \
+                range(structural_object_count)]
+    }
+    return SimpleNamespace(events=create_frame_list(metadata, screen_width, screen_height, frame_count, seed),
+            metadata=metadata)
+
+
+def load_event(event_file_path, screen_width=MCS_Controller_AI2THOR.SCREEN_WIDTH,
+        screen_height=MCS_Controller_AI2THOR.SCREEN_HEIGHT, frame_count=1, seed=0):
+    """Returns an AI2-THOR step event with the metadata from the given JSON file (like the ai2thor_output_<step>.json
+    files saved in debug mode) and random frames, since the debug files do not keep the frames."""
+    with open(event_file_path) as event_file:
+        data = json.load(event_file)
+    metadata = data.get('metadata', data)
+    metadata.setdefault('objects', [])
+    metadata.setdefault('structuralObjects', [])
+    return SimpleNamespace(events=create_frame_list(metadata, screen_width, screen_height, frame_count, seed),
+            metadata=metadata)
+
+
+def create_controller(resize=None):
+    """Returns an MCS_Controller_AI2THOR that is not connected to the MCS Unity application, which is enough to call
+    its output and validation functions."""
+    controller = MCS_Controller_AI2THOR.__new__(MCS_Controller_AI2THOR)
+    controller.on_init(resize=resize)
+    return controller
+
+
+def create_goal(event):
+    """Returns a transferral goal (the most expensive reward) between the first two objects in the given event."""
+    object_id_list = [object_metadata['objectId'] for object_metadata in event.metadata['objects']]
+    if len(object_id_list) < 2:
+        return MCS_Goal(metadata={'category': MCS_Goal_Category.RETRIEVAL.value, 'target': {
+            'id': object_id_list[0] if len(object_id_list) > 0 else None
+        }})
+    return MCS_Goal(metadata={
+        'category': MCS_Goal_Category.TRANSFERRAL.value,
+        'relationship': ['target_1', 'next to', 'target_2'],
+        'target_1': {'id': object_id_list[0]},
+        'target_2': {'id': object_id_list[1]}
+    })
+
+
+def create_benchmark_dict(controller, event):
+    """Returns each benchmark name and a function that runs it once on the given event."""
+    goal = create_goal(event)
+    objects = event.metadata['objects']
+    agent = event.metadata['agent']
+    step_output = controller.wrap_output(event)
+    step_output.resolve_lazy_values()
+
+    def wrap_output_resolved():
+        controller.wrap_output(event).resolve_lazy_values()
+
+    return {
+        'wrap_output': lambda: controller.wrap_output(event),
+        'wrap_output_resolved': wrap_output_resolved,
+        'save_images': lambda: controller.save_images(event),
+        'retrieve_object_list': lambda: controller.retrieve_object_list(event),
+        'retrieve_structural_object_list': lambda: controller.retrieve_structural_object_list(event),
+        'calculate_reward': lambda: MCS_Reward.calculate_reward(goal, objects, agent),
+        'validate_and_convert_params': lambda: controller.validate_and_convert_params('MoveAhead', amount=0.5, \
+                objectId='object_0', rotation=10, horizon=10),
+        'class_to_str': lambda: MCS_Util.class_to_str(step_output),
+        'value_to_str': lambda: MCS_Util.value_to_str(step_output.object_list)
+    }
+
+
+def measure(function, iteration_count=100, repeat_count=3):
+    """
+    Returns the throughput and allocations of the given function. The time of each call is the mean of each repeat of
+    the given number of calls, keeping the fastest repeat. The allocations are measured separately (since tracing
+    them slows every call) as the mean memory peak of each call and the mean memory each call leaves allocated
+    (including its result). Only Python allocations are traced, so the pixel buffers of Pillow images are not counted.
+    """
+    # Warm up any caches.
+    function()
+    repeat_time_list = []
+    for _ in range(repeat_count):
+        start = time.perf_counter()
+        for _ in range(iteration_count):
+            function()
+        repeat_time_list.append((time.perf_counter() - start) / iteration_count)
+
+    allocation_count = max(1, min(iteration_count, 10))
+    peak_list = []
+    retained_list = []
+    tracemalloc.start()
+    try:
+        for _ in range(allocation_count):
+            # Python 3.9 added reset_peak, and clear_traces also resets the peak in older versions.
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.clear_traces()
+            before, _ = tracemalloc.get_traced_memory()
+            result = function()
+            after, peak = tracemalloc.get_traced_memory()
+            peak_list.append(peak - before)
+            retained_list.append(after - before)
+            del result
+    finally:
+        tracemalloc.stop()
+
+    best_time = min(repeat_time_list)
+    return {
+        'calls_per_second': (1.0 / best_time) if best_time > 0 else float('inf'),
+        'mean_seconds': best_time,
+        'peak_bytes': statistics.mean(peak_list),
+        'retained_bytes': statistics.mean(retained_list)
+    }
+
+
+def run_benchmarks(event, name_list=None, iteration_count=100, repeat_count=3, resize=None):
+    """Returns the measurements of the given benchmarks (or all of them) on the given event, by benchmark name."""
+    benchmark_dict = create_benchmark_dict(create_controller(resize), event)
+    return {name: measure(benchmark_dict[name], iteration_count, repeat_count) for name in (name_list or \
+            benchmark_dict.keys())}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark the MCS Python step pipeline with synthetic or recorded '
+            'AI2-THOR events. Does not need the MCS Unity application.')
+    parser.add_argument('--event_file', default=None,
+            help='A JSON file of AI2-THOR event metadata (like an ai2thor_output_<step>.json debug file) to use '
+            'instead of a synthetic event')
+    parser.add_argument('--object_count', type=int, default=20,
+            help='The number of objects in the synthetic event (half visible) [default=%(default)s]')
+    parser.add_argument('--structural_object_count', type=int, default=10,
+            help='The number of structural objects in the synthetic event [default=%(default)s]')
+    parser.add_argument('--screen_width', type=int, default=MCS_Controller_AI2THOR.SCREEN_WIDTH,
+            help='Frame width in pixels [default=%(default)s]')
+    parser.add_argument('--screen_height', type=int, default=MCS_Controller_AI2THOR.SCREEN_HEIGHT,
+            help='Frame height in pixels [default=%(default)s]')
+    parser.add_argument('--frame_count', type=int, default=1,
+            help='The number of frames in each event, like 5 for a movement action [default=%(default)s]')
+    parser.add_argument('--resize', type=int, nargs=2, default=None, metavar=('WIDTH', 'HEIGHT'),
+            help='Resize each output image to this size')
+    parser.add_argument('--iterations', type=int, default=100,
+            help='The number of calls in each timed repeat [default=%(default)s]')
+    parser.add_argument('--repeat', type=int, default=3,
+            help='The number of timed repeats, keeping the fastest [default=%(default)s]')
+    parser.add_argument('--benchmark', action='append', default=None, dest='benchmark_list',
+            help='Run only this benchmark (may be given more than once)')
+    parser.add_argument('--seed', type=int, default=0, help='The random seed of the synthetic event')
+    parser.add_argument('--json', default=None, dest='json_file_path',
+            help='Also save the results to this JSON file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.event_file is not None:
+        event = load_event(args.event_file, args.screen_width, args.screen_height, args.frame_count, args.seed)
+    else:
+        event = create_event(args.object_count, args.structural_object_count, args.screen_width, args.screen_height,
+                args.frame_count, args.seed)
+
+    print(f'BENCHMARKING {len(event.metadata["objects"])} OBJECTS, {len(event.metadata["structuralObjects"])} ' + \
+            f'STRUCTURAL OBJECTS, AND {len(event.events)} {args.screen_width}x{args.screen_height} FRAMES PER STEP')
+    result_dict = run_benchmarks(event, args.benchmark_list, args.iterations, args.repeat, args.resize)
+
+    print(f'{"FUNCTION":<32}{"CALLS/SEC":>12}{"MEAN MS":>12}{"PEAK KIB":>12}{"RETAINED KIB":>14}')
+    for name, result in result_dict.items():
+        print(f'{name:<32}{result["calls_per_second"]:>12.1f}{(result["mean_seconds"] * 1000):>12.4f}' + \
+                f'{(result["peak_bytes"] / 1024):>12.1f}{(result["retained_bytes"] / 1024):>14.1f}')
+
+    if args.json_file_path is not None:
+        with open(args.json_file_path, 'w') as json_file:
+            json.dump(result_dict, json_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+
+from machine_common_sense.mcs import MCS
+from machine_common_sense.mcs_controller_server import DEFAULT_HOST, DEFAULT_PORT, MCS_Controller_Server
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Start the MCS Unity app once and serve it to MCS_Controller_Client '
+            'objects (see MCS.connect_controller) until one of them shuts it down.')
+    parser.add_argument('unity_app_file_path', help='The file path to the MCS Unity application')
+    parser.add_argument('--address', default=(DEFAULT_HOST + ':' + str(DEFAULT_PORT)),
+            help='The "host:port" or UNIX socket file path on which to listen [default=%(default)s]')
+    parser.add_argument('--debug', default=False, choices=['true', 'file', 'terminal'],
+            help='Save debug files and/or print debug output from the controller')
+    parser.add_argument('--enable_noise', default=False, action='store_true', help='Add noise to actions')
+    parser.add_argument('--screen_width', type=int, default=None, help='Render width in pixels [default=600]')
+    parser.add_argument('--screen_height', type=int, default=None, help='Render height in pixels [default=400]')
+    parser.add_argument('--quality', default='Medium', help='Render quality [default=%(default)s]')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    debug = True if args.debug == 'true' else args.debug
+
+    print('STARTING THE MCS UNITY APP...')
+    controller = MCS.create_controller(args.unity_app_file_path, debug=debug, enable_noise=args.enable_noise,
+            screen_width=args.screen_width, screen_height=args.screen_height, quality=args.quality)
+
+    server = MCS_Controller_Server(controller, args.address)
+    print(f'SERVING THE MCS CONTROLLER ON {server.retrieve_address()}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
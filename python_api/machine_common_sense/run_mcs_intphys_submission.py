@@ -0,0 +1,192 @@
+"""
+Runs the IntPhys evaluation scenes across a pool of controller processes, calls an agent (see MCS_IntPhys_Agent) on
+each frame, and streams the results straight into a submission zip file (see MCS_Submission_Writer) as each scene
+ends, so the submission is ready as soon as the last scene ends.
+
+Like run_mcs_batch, each scene result (with its VOE values) is also appended to a JSON lines results file. If a run
+stops, rerun the same command: the zip is rewritten from the saved results and only the remaining scenes are run.
+"""
+import argparse
+import functools
+import importlib
+import time
+
+from machine_common_sense.mcs import MCS
+from machine_common_sense.mcs_intphys_submission import MCS_IntPhys_Agent, MCS_Submission_Writer, parse_scene_key
+from machine_common_sense.mcs_vector_controller import load_scene
+from machine_common_sense.run_mcs_batch import OK, find_task_list, read_results, run_batch
+
+# The number of steps in each scene without its own goal.last_step.
+DEFAULT_STEP_COUNT = 100
+
+
+def run_intphys_scene(controller, task, agent_factory=MCS_IntPhys_Agent, max_step_count=None):
+    """Runs the given IntPhys scene task on the given controller with a new agent from the given agent factory, and
+    returns its result dict with its "key", "plausibility", "voe_list", and "location"."""
+    start = time.perf_counter()
+    key = task.get('key', None) or parse_scene_key(task['scene'])
+    if key is None:
+        raise ValueError('No IntPhys "block/test/scene" key for scene ' + task['scene'])
+    config_data = load_scene(task['scene'])
+    agent = agent_factory()
+
+    step_output = controller.start_scene(config_data)
+    agent.start_scene(config_data, step_output)
+    last_step = step_output.goal.last_step if step_output.goal is not None else None
+    last_step = last_step if last_step is not None else DEFAULT_STEP_COUNT
+    if max_step_count is not None:
+        last_step = min(last_step, max_step_count)
+
+    voe_list = []
+    for _ in range(step_output.step_number + 1, last_step + 1):
+        action = step_output.action_list[-1] if step_output.action_list else 'Pass'
+        step_output = controller.step(action)
+        if step_output is None:
+            break
+        voe_list.append(float(agent.step(step_output)))
+
+    plausibility, location = agent.end_scene(voe_list)
+    controller.end_scene('plausible' if plausibility >= 0.5 else 'implausible', plausibility)
+
+    return {
+        'scene': task['scene'],
+        'key': key,
+        'status': OK,
+        'plausibility': float(plausibility),
+        'location': [int(value) for value in location] if location is not None else None,
+        'voe_list': voe_list,
+        'total_seconds': time.perf_counter() - start
+    }
+
+
+def write_result(writer, result):
+    """Adds the given scene result to the given MCS_Submission_Writer if the scene finished."""
+    if result.get('status', None) == OK:
+        writer.write_scene(result['key'], result['plausibility'], result['voe_list'], result['location'])
+
+
+def run_submission(task_list, zip_file_path, results_file_path, description, controller_factory,
+        agent_factory=MCS_IntPhys_Agent, process_count=1, max_step_count=None, retry_errors=False, start_method=None,
+        callback=None):
+    """
+    Runs the given IntPhys scene tasks (see run_mcs_batch.find_task_list; each task may have its own "key") and writes
+    the submission zip file.
+
+    Parameters
+    ----------
+    task_list : list of dicts
+        The scene tasks to run.
+    zip_file_path : str
+        The submission zip file to create.
+    results_file_path : str
+        The JSON lines file of the scene results, used to resume a run that stopped.
+    description : dict
+        The description.json data, which must have the "Performer" and the "Submission".
+    controller_factory : callable
+        A picklable function that takes no arguments and returns a new MCS_Controller, called once in each process.
+    agent_factory : callable, optional
+        A picklable function that takes no arguments and returns a new MCS_IntPhys_Agent, called once for each scene.
+        Default: MCS_IntPhys_Agent
+    process_count : int, optional
+        The number of controller processes, or 0 to run every scene in this process. Default: 1
+    max_step_count : int, optional
+        The most steps to run in each scene. Default: None
+    retry_errors : boolean, optional
+        Whether to rerun the scenes whose existing results are errors. Default: False
+    start_method : str, optional
+        The multiprocessing start method for the controller processes. Default: the platform default
+    callback : callable, optional
+        A function called with each new result dict.
+
+    Returns
+    -------
+    list of dicts
+        The new result dicts, in the order in which their scenes ended.
+    """
+    with MCS_Submission_Writer(zip_file_path, description) as writer:
+        # Rewrite the scenes that finished in a previous run, since an unfinished zip file cannot be appended.
+        for result in read_results(results_file_path):
+            write_result(writer, result)
+
+        def save(result):
+            write_result(writer, result)
+            if callback is not None:
+                callback(result)
+
+        return run_batch(task_list, results_file_path, controller_factory, process_count, retry_errors=retry_errors,
+                start_method=start_method, callback=save, scene_function=functools.partial(run_intphys_scene,
+                agent_factory=agent_factory, max_step_count=max_step_count))
+
+
+def import_agent_factory(name):
+    """Returns the agent class (or factory function) with the given "module:name" import path."""
+    module_name, _, attribute_name = name.partition(':')
+    if len(attribute_name) == 0:
+        raise ValueError('The agent should be a "module:name" import path, like "my_agent:My_Agent"')
+    return getattr(importlib.import_module(module_name), attribute_name)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Run the IntPhys evaluation scenes with an agent across a pool of '
+            'MCS Unity applications and write the submission zip file. Rerun with the same results file to resume.')
+    parser.add_argument('unity_app_file_path', help='The file path to the MCS Unity application')
+    parser.add_argument('scene_source', help='A directory of IntPhys scene configuration JSON files named like '
+            '"O1-0005-4.json", or a manifest file with one scene file path (or {"scene", "key"} JSON object) per line')
+    parser.add_argument('--agent', default='machine_common_sense.mcs_intphys_submission:MCS_IntPhys_Agent',
+            help='The "module:name" import path of the MCS_IntPhys_Agent subclass to run [default=%(default)s]')
+    parser.add_argument('--performer', required=True, help='The performer name in description.json')
+    parser.add_argument('--submission', default='submission', help='The submission name in description.json '
+            '[default=%(default)s]')
+    parser.add_argument('--description', default='', help='The description in description.json')
+    parser.add_argument('--zip', default=None, dest='zip_file_path',
+            help='The submission zip file to create [default=<submission>.zip]')
+    parser.add_argument('--results', default=None, dest='results_file_path',
+            help='The JSON lines file of the scene results [default=<submission>.jsonl]')
+    parser.add_argument('--processes', type=int, default=1, dest='process_count',
+            help='The number of Unity applications to run at once [default=%(default)s]')
+    parser.add_argument('--max_steps', type=int, default=None, dest='max_step_count',
+            help='The most steps to run in each scene')
+    parser.add_argument('--retry_errors', default=False, action='store_true',
+            help='Rerun the scenes whose existing results are errors')
+    parser.add_argument('--screen_width', type=int, default=None, help='Render width in pixels [default=600]')
+    parser.add_argument('--screen_height', type=int, default=None, help='Render height in pixels [default=400]')
+    parser.add_argument('--quality', default='Medium', help='Render quality [default=%(default)s]')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    task_list = find_task_list(args.scene_source)
+    controller_factory = functools.partial(MCS.create_controller, args.unity_app_file_path,
+            screen_width=args.screen_width, screen_height=args.screen_height, quality=args.quality)
+    zip_file_path = args.zip_file_path or (args.submission + '.zip')
+    results_file_path = args.results_file_path or (args.submission + '.jsonl')
+    description = {
+        'Performer': args.performer,
+        'Submission': args.submission,
+        'Description': args.description
+    }
+
+    print(f'FOUND {len(task_list)} SCENES... STARTING {args.process_count} MCS UNITY APPS...')
+    start = time.perf_counter()
+
+    def print_result(result):
+        if result['status'] == OK:
+            print(f'FINISHED {result["key"]} WITH PLAUSIBILITY {result["plausibility"]:0.4f} IN ' + \
+                    f'{result["total_seconds"]:0.4f} SECONDS')
+        else:
+            print(f'FAILED {result["scene"]}: {result["error"]}')
+
+    result_list = run_submission(task_list, zip_file_path, results_file_path, description, controller_factory,
+            import_agent_factory(args.agent), args.process_count, args.max_step_count, args.retry_errors,
+            callback=print_result)
+
+    error_count = len([result for result in result_list if result['status'] != OK])
+    print('================================================================================')
+    print(f'RAN {len(result_list)} SCENES ({len(task_list) - len(result_list)} ALREADY DONE, {error_count} FAILED) ' + \
+            f'IN {(time.perf_counter() - start):0.4f} SECONDS')
+    print(f'SAVED THE SUBMISSION TO {zip_file_path}')
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from machine_common_sense.mcs_goal import MCS_Goal
 from machine_common_sense.mcs_object import MCS_Object
 from machine_common_sense.mcs_pose import MCS_Pose
 from machine_common_sense.mcs_return_status import MCS_Return_Status
-from machine_common_sense.mcs_step_output import MCS_Step_Output
+from machine_common_sense.mcs_step_output import MCS_Lazy_Value, MCS_Step_Output
 from .mock_mcs_controller_ai2thor import Mock_MCS_Controller_AI2THOR
 
 class Test_MCS_Controller_AI2THOR(unittest.TestCase):
@@ -318,6 +318,39 @@ class Test_MCS_Controller_AI2THOR(unittest.TestCase):
         self.assertEqual(numpy.array(depth_mask_list[1]), depth_mask_data_2)
         self.assertEqual(numpy.array(object_mask_list[1]), object_mask_data_2)
 
+    def test_save_images_with_resize(self):
+        self.controller.on_init(resize=(2, 1))
+
+        image_data = numpy.array([[[0, 0, 0], [100, 100, 100], [10, 20, 30], [30, 40, 50]]] * 2, dtype=numpy.uint8)
+        depth_mask_data = numpy.array([[0, 100, 200, 250]] * 2, dtype=numpy.uint8)
+        object_mask_data = numpy.array([[[1, 2, 3], [1, 2, 3], [4, 5, 6], [4, 5, 6]]] * 2, dtype=numpy.uint8)
+
+        mock_scene_event_data = {
+            "events": [self.create_mock_scene_event({
+                "depth_frame": depth_mask_data,
+                "frame": image_data,
+                "instance_segmentation_frame": object_mask_data
+            })]
+        }
+
+        image_list, depth_mask_list, object_mask_list = self.controller.save_images(self.create_mock_scene_event(
+            mock_scene_event_data))
+
+        self.assertEqual(image_list[0].size, (2, 1))
+        self.assertEqual(depth_mask_list[0].size, (2, 1))
+        self.assertEqual(object_mask_list[0].size, (2, 1))
+
+        self.assertEqual(numpy.array(image_list[0]).tolist(), [[[50, 50, 50], [20, 30, 40]]])
+        self.assertEqual(numpy.array(depth_mask_list[0]).tolist(), [[50, 225]])
+        self.assertEqual(numpy.array(object_mask_list[0]).tolist(), [[[1, 2, 3], [4, 5, 6]]])
+
+    def test_retrieve_camera_aspect_ratio(self):
+        self.assertEqual(self.controller.retrieve_camera_aspect_ratio(), (600, 400))
+        self.controller.on_init(screen_width=150, screen_height=100)
+        self.assertEqual(self.controller.retrieve_camera_aspect_ratio(), (150, 100))
+        self.controller.on_init(screen_width=600, screen_height=400, resize=(84, 84))
+        self.assertEqual(self.controller.retrieve_camera_aspect_ratio(), (84, 84))
+
     def test_validate_and_convert_params(self):
         # TODO MCS-15
         pass
@@ -416,7 +449,14 @@ class Test_MCS_Controller_AI2THOR(unittest.TestCase):
             }
         }
 
-        actual = self.controller.wrap_output(self.create_mock_scene_event(mock_scene_event_data))
+        scene_event = self.create_mock_scene_event(mock_scene_event_data)
+        actual = self.controller.wrap_output(scene_event)
+
+        # The lazy values must not keep the event, which holds the raw frames.
+        lazy_value_list = [value for value in vars(actual).values() if isinstance(value, MCS_Lazy_Value)]
+        self.assertEqual(len(lazy_value_list), 4)
+        for lazy_value in lazy_value_list:
+            self.assertFalse(any(cell.cell_contents is scene_event for cell in lazy_value.function.__closure__))
 
         self.assertEqual(actual.action_list, self.controller.ACTION_LIST)
         self.assertEqual(actual.camera_aspect_ratio, (600, 400))
@@ -0,0 +1,143 @@
+import numpy
+from PIL import Image
+import socket
+import threading
+import unittest
+
+from machine_common_sense.mcs_controller import MCS_Controller
+from machine_common_sense.mcs_controller_client import MCS_Controller_Client
+from machine_common_sense.mcs_controller_server import MCS_Controller_Server, OUTPUT, STEP, decode_step_output, \
+        encode_step_output, parse_address, receive_frame, send_frame
+from machine_common_sense.mcs_goal import MCS_Goal
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_object_delta import MCS_Object_Delta
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+
+
+class Mock_Served_Controller(MCS_Controller):
+
+    def __init__(self):
+        super().__init__()
+        self.history_list = []
+
+    def create_step_output(self, step_number):
+        return MCS_Step_Output(
+            depth_mask_list=[Image.fromarray(numpy.full((4, 6), step_number, dtype=numpy.uint8))],
+            goal=MCS_Goal(last_step=2),
+            image_list=[Image.fromarray(numpy.full((4, 6, 3), step_number, dtype=numpy.uint8))] * 2,
+            object_list=[MCS_Object(uuid='testId', position={'x': 1, 'y': 2, 'z': 3})],
+            step_number=step_number
+        )
+
+    def end_scene(self, classification, confidence):
+        self.history_list.append(('end_scene', classification, confidence))
+
+    def start_scene(self, config_data):
+        self.history_list.append(('start_scene', config_data['name']))
+        return self.create_step_output(0)
+
+    def step(self, action, **kwargs):
+        self.history_list.append(('step', action, kwargs))
+        if action == 'Fail':
+            raise ValueError('Failed')
+        if action == 'Skip':
+            return None
+        return self.create_step_output(1)
+
+
+class Test_MCS_Controller_Server(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = Mock_Served_Controller()
+        self.server = MCS_Controller_Server(self.controller, ('127.0.0.1', 0))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.close()
+        self.thread.join(timeout=10)
+
+    def test_encode_and_decode_step_output(self):
+        step_output = self.controller.create_step_output(5)
+        actual = decode_step_output(encode_step_output(step_output))
+        self.assertEqual(actual.step_number, 5)
+        self.assertEqual(actual.goal.last_step, 2)
+        self.assertEqual(actual.object_list[0].uuid, 'testId')
+        self.assertEqual(len(actual.image_list), 2)
+        self.assertEqual(len(actual.depth_mask_list), 1)
+        self.assertEqual(len(actual.object_mask_list), 0)
+        self.assertEqual(actual.depth_mask_list[0].mode, 'L')
+        numpy.testing.assert_array_equal(numpy.array(actual.image_list[1]), numpy.array(step_output.image_list[1]))
+
+        # The original step output must not be modified.
+        self.assertEqual(len(step_output.image_list), 2)
+
+    def test_encode_and_decode_step_output_with_deltas(self):
+        previous_output = self.controller.create_step_output(1)
+        step_output = self.controller.create_step_output(2)
+        step_output.object_list = [MCS_Object(uuid='testId', position={'x': 1, 'y': 2, 'z': 4}), \
+                MCS_Object(uuid='testId2')]
+        step_output.object_delta = MCS_Object_Delta.create(previous_output.object_list, step_output.object_list)
+        step_output.structural_object_delta = MCS_Object_Delta()
+
+        payload = encode_step_output(step_output)
+        # The new object is only sent once, in the delta, and not in the full object list.
+        self.assertEqual(payload.count(b'testId2'), 1)
+        actual = decode_step_output(payload, previous_output)
+        self.assertEqual([instance.uuid for instance in actual.object_list], ['testId', 'testId2'])
+        self.assertEqual(actual.object_list[0].position, {'x': 1, 'y': 2, 'z': 4})
+        self.assertEqual(actual.structural_object_list, [])
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('localhost:1234'), (socket.AF_INET, ('localhost', 1234)))
+        self.assertEqual(parse_address(':1234'), (socket.AF_INET, ('127.0.0.1', 1234)))
+        self.assertEqual(parse_address(('localhost', 1234)), (socket.AF_INET, ('localhost', 1234)))
+        self.assertEqual(parse_address('/tmp/mcs.sock'), (socket.AF_UNIX, '/tmp/mcs.sock'))
+
+    def test_client(self):
+        client = MCS_Controller_Client(self.server.retrieve_address(), timeout=10)
+
+        output = client.start_scene({'name': 'test_scene'})
+        self.assertEqual(output.step_number, 0)
+        self.assertEqual(output.object_list[0].position, {'x': 1, 'y': 2, 'z': 3})
+
+        output = client.step('MoveAhead', amount=0.5)
+        self.assertEqual(output.step_number, 1)
+        numpy.testing.assert_array_equal(numpy.array(output.image_list[0]), numpy.full((4, 6, 3), 1))
+
+        self.assertIsNone(client.step('Skip'))
+
+        with self.assertRaises(RuntimeError):
+            client.step('Fail')
+
+        client.end_scene('plausible', 0.75)
+        client.close()
+
+        self.assertEqual(self.controller.history_list, [
+            ('start_scene', 'test_scene'),
+            ('step', 'MoveAhead', {'amount': 0.5}),
+            ('step', 'Skip', {}),
+            ('step', 'Fail', {}),
+            ('end_scene', 'plausible', 0.75)
+        ])
+
+    def test_server_outlives_client(self):
+        client_1 = MCS_Controller_Client(self.server.retrieve_address(), timeout=10)
+        client_1.start_scene({'name': 'scene_1'})
+        client_1.close()
+
+        client_2 = MCS_Controller_Client(self.server.retrieve_address(), timeout=10)
+        client_2.start_scene({'name': 'scene_2'})
+        client_2.shutdown_server()
+
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(self.controller.history_list, [('start_scene', 'scene_1'), ('start_scene', 'scene_2')])
+
+    def test_raw_frames(self):
+        with socket.create_connection(self.server.retrieve_address(), timeout=10) as client_socket:
+            send_frame(client_socket, STEP, b'{"action": "Pass", "kwargs": {}}')
+            message_type, payload = receive_frame(client_socket)
+        self.assertEqual(message_type, OUTPUT)
+        self.assertEqual(decode_step_output(payload).step_number, 1)
+
@@ -0,0 +1,115 @@
+import json
+import numpy
+import os
+from PIL import Image
+import tempfile
+import unittest
+
+from machine_common_sense.mcs_episode_recorder import MCS_Episode_Reader, MCS_Episode_Recorder
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+
+
+def create_step_output(value, image_count=2):
+    return MCS_Step_Output(
+        depth_mask_list=[Image.fromarray(numpy.full((4, 6), value + index, dtype=numpy.uint8)) for index in \
+                range(image_count)],
+        image_list=[Image.fromarray(numpy.full((4, 6, 3), value + index, dtype=numpy.uint8)) for index in \
+                range(image_count)],
+        object_list=[MCS_Object(uuid='testId', position={'x': value, 'y': 0, 'z': 0})],
+        object_mask_list=[Image.fromarray(numpy.full((4, 6, 3), value + index, dtype=numpy.uint8)) for index in \
+                range(image_count)],
+        reward=(1 if value >= 30 else 0),
+        return_status='SUCCESSFUL',
+        step_number=(value // 10)
+    )
+
+
+class Test_MCS_Episode_Recorder(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.directory = self.temporary_directory.name
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def record_episodes(self, **kwargs):
+        with MCS_Episode_Recorder(self.directory, chunk_size=3, **kwargs) as recorder:
+            recorder.start_episode('scene_1', create_step_output(0, image_count=1))
+            recorder.record('MoveAhead', create_step_output(10), amount=0.5)
+            recorder.record('Pass', create_step_output(20))
+            recorder.start_episode('scene_2', create_step_output(100, image_count=1))
+            recorder.record('PickupObject', create_step_output(130), objectId='testId')
+
+    def test_record(self):
+        self.record_episodes()
+        with open(os.path.join(self.directory, 'index.json')) as index_file:
+            index = json.load(index_file)
+        self.assertEqual([episode['name'] for episode in index['episodes']], ['scene_1', 'scene_2'])
+        self.assertEqual([episode['frame_count'] for episode in index['episodes']], [5, 3])
+        self.assertEqual([episode['step_count'] for episode in index['episodes']], [3, 2])
+
+        with open(os.path.join(self.directory, index['episodes'][0]['directory'], 'episode.json')) as episode_file:
+            episode = json.load(episode_file)
+        self.assertEqual([chunk['frame_count'] for chunk in episode['chunks']], [3, 2])
+        self.assertEqual(episode['steps'][1]['action'], 'MoveAhead')
+        self.assertEqual(episode['steps'][1]['params'], {'amount': 0.5})
+        self.assertEqual(episode['steps'][1]['objects'][0]['position'], {'x': 10, 'y': 0, 'z': 0})
+
+    def test_read(self):
+        self.record_episodes()
+        reader = MCS_Episode_Reader(self.directory)
+        self.assertEqual(len(reader), 8)
+        batch = reader.read_batch([7, 0, 3])
+        self.assertEqual(batch['image'].shape, (3, 4, 6, 3))
+        self.assertEqual(batch['depth_mask'].shape, (3, 4, 6))
+        self.assertEqual(batch['image'][:, 0, 0, 0].tolist(), [131, 0, 20])
+        self.assertEqual(batch['object_mask'][:, 0, 0, 0].tolist(), [131, 0, 20])
+        self.assertEqual(batch['reward'].tolist(), [1, 0, 0])
+        self.assertEqual(batch['episode_index'].tolist(), [1, 0, 0])
+        self.assertEqual(batch['step_index'].tolist(), [1, 0, 2])
+        self.assertEqual(batch['action'], ['PickupObject', None, 'Pass'])
+        self.assertEqual(reader.retrieve_episode(1)['name'], 'scene_2')
+
+    def test_read_compressed(self):
+        self.record_episodes(compress=True, process_count=2)
+        reader = MCS_Episode_Reader(self.directory)
+        self.assertEqual(len(reader), 8)
+        self.assertEqual(reader.read_batch([7, 0, 3])['image'][:, 0, 0, 0].tolist(), [131, 0, 20])
+
+    def test_read_with_small_cache(self):
+        self.record_episodes()
+        reader = MCS_Episode_Reader(self.directory, cache_chunk_count=1)
+        for _ in range(2):
+            self.assertEqual(reader.read_batch([7, 0, 3, 6])['image'][:, 0, 0, 0].tolist(), [131, 0, 20, 130])
+        self.assertEqual(len(reader._MCS_Episode_Reader__array_cache), 1)
+        self.assertEqual(sorted(value for batch in reader.iterate_batches(3, seed=1) for value in \
+                batch['image'][:, 0, 0, 0].tolist()), [0, 10, 11, 20, 21, 100, 130, 131])
+
+    def test_last_frame_only(self):
+        self.record_episodes(last_frame_only=True)
+        reader = MCS_Episode_Reader(self.directory)
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(reader.read_batch(range(5))['image'][:, 0, 0, 0].tolist(), [0, 11, 21, 100, 131])
+
+    def test_iterate_batches(self):
+        self.record_episodes()
+        reader = MCS_Episode_Reader(self.directory)
+        batch_list = list(reader.iterate_batches(3, seed=1))
+        self.assertEqual([len(batch['reward']) for batch in batch_list], [3, 3, 2])
+        values = sorted(value for batch in batch_list for value in batch['image'][:, 0, 0, 0].tolist())
+        self.assertEqual(values, [0, 10, 11, 20, 21, 100, 130, 131])
+
+    def test_append_to_existing_dataset(self):
+        self.record_episodes()
+        with MCS_Episode_Recorder(self.directory) as recorder:
+            recorder.start_episode('scene_3', create_step_output(200, image_count=1))
+        reader = MCS_Episode_Reader(self.directory)
+        self.assertEqual([episode['name'] for episode in reader.episode_list], ['scene_1', 'scene_2', 'scene_3'])
+        self.assertEqual(reader.read_batch([8])['image'][0, 0, 0, 0], 200)
+
+    def test_record_before_start_episode(self):
+        with MCS_Episode_Recorder(self.directory) as recorder:
+            with self.assertRaises(RuntimeError):
+                recorder.record('Pass', create_step_output(0))
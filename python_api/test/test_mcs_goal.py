@@ -1,6 +1,14 @@
+import base64
+import io
+import json
+import numpy
+import os
+from PIL import Image
+import tempfile
 import unittest
 import textwrap
 
+from machine_common_sense.mcs import MCS
 from machine_common_sense.mcs_goal import MCS_Goal
 
 
@@ -51,4 +59,56 @@ class Test_Default_MCS_Goal(unittest.TestCase):
         self.assertIsInstance(self.goal.metadata, dict)
 
     def test_str(self):
-        self.assertEqual(str(self.goal), textwrap.dedent(self.str_output))
\ No newline at end of file
+        self.assertEqual(str(self.goal), textwrap.dedent(self.str_output))
+
+
+class Test_MCS_Goal_Target_Image(unittest.TestCase):
+
+    pixels = [[[255, 0, 0], [0, 255, 0]], [[0, 0, 255], [10, 20, 30]]]
+
+    def create_png_bytes(self):
+        output = io.BytesIO()
+        Image.fromarray(numpy.array(self.pixels, dtype=numpy.uint8)).save(output, format='PNG')
+        return output.getvalue()
+
+    def assert_target_image(self, image):
+        goal = MCS_Goal(metadata={'target': {'id': 'testId', 'image': image}})
+        actual = goal.retrieve_target_image()
+        self.assertIsInstance(actual, numpy.ndarray)
+        self.assertEqual(actual.dtype, numpy.uint8)
+        numpy.testing.assert_array_equal(actual, numpy.array(self.pixels))
+        # The decoded image is memoized.
+        self.assertIs(goal.retrieve_target_image(), actual)
+
+    def test_retrieve_target_image_from_list(self):
+        self.assert_target_image(self.pixels)
+
+    def test_retrieve_target_image_from_json_string(self):
+        self.assert_target_image(json.dumps(self.pixels))
+
+    def test_retrieve_target_image_from_data_uri(self):
+        self.assert_target_image('data:image/png;base64,' + base64.b64encode(self.create_png_bytes()).decode('ascii'))
+
+    def test_retrieve_target_image_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'target.png'), 'wb') as image_file:
+                image_file.write(self.create_png_bytes())
+            self.assert_target_image(os.path.join(directory, 'target.png'))
+
+    def test_retrieve_target_image_without_image(self):
+        self.assertIsNone(MCS_Goal().retrieve_target_image())
+        self.assertIsNone(MCS_Goal(metadata={'target_1': {'id': 'testId'}}).retrieve_target_image('target_1'))
+
+    def test_load_config_json_file_with_relative_image_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'target.png'), 'wb') as image_file:
+                image_file.write(self.create_png_bytes())
+            with open(os.path.join(directory, 'scene.json'), 'w') as scene_file:
+                json.dump({'goal': {'metadata': {'target': {'id': 'testId', 'image': 'target.png'}}}}, scene_file)
+
+            config_data, status = MCS.load_config_json_file(os.path.join(directory, 'scene.json'))
+            self.assertIsNone(status)
+            image = config_data['goal']['metadata']['target']['image']
+            self.assertEqual(image, os.path.join(directory, 'target.png'))
+            numpy.testing.assert_array_equal(MCS_Goal(metadata=config_data['goal']['metadata']) \
+                    .retrieve_target_image(), numpy.array(self.pixels))
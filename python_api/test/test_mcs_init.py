@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import machine_common_sense
+
+HEAVY_MODULE_LIST = ['ai2thor', 'numpy', 'shapely', 'PIL']
+
+class Test_MCS_Init(unittest.TestCase):
+
+    def imported_heavy_modules(self, code):
+        # Run in a new interpreter since this one has already imported everything, from the directory with the
+        # package so it imports no matter where the tests are run from.
+        output = subprocess.check_output([sys.executable, '-c', code + '\nimport sys\nprint(",".join(sorted(' + \
+                'name for name in ' + repr(HEAVY_MODULE_LIST) + ' if name in sys.modules)))'],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return [name for name in output.decode().strip().split(',') if name]
+
+    def test_import_package(self):
+        self.assertEqual(self.imported_heavy_modules('import machine_common_sense'), [])
+
+    def test_import_data_classes(self):
+        self.assertEqual(self.imported_heavy_modules('from machine_common_sense import MCS, MCS_Goal, ' + \
+                'MCS_Object, MCS_Reward, MCS_Step_Output, MAX_MOVE_DISTANCE'), [])
+
+    def test_import_lazy_attribute(self):
+        self.assertIn('ai2thor', self.imported_heavy_modules('from machine_common_sense import MCS_Controller_AI2THOR'))
+
+    def test_all(self):
+        for name in machine_common_sense.__all__:
+            self.assertIsNotNone(getattr(machine_common_sense, name))
+        self.assertIn('MCS_Controller_AI2THOR', dir(machine_common_sense))
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            machine_common_sense.MCS_Missing
+
+    def test_constants(self):
+        from machine_common_sense.mcs_controller_ai2thor import MAX_MOVE_DISTANCE, MAX_REACH_DISTANCE, \
+                MCS_Controller_AI2THOR
+        self.assertEqual(MAX_MOVE_DISTANCE, machine_common_sense.MAX_MOVE_DISTANCE)
+        self.assertEqual(MAX_REACH_DISTANCE, machine_common_sense.MAX_REACH_DISTANCE)
+        self.assertEqual(MCS_Controller_AI2THOR.DEFAULT_QUALITY, machine_common_sense.DEFAULT_QUALITY)
+
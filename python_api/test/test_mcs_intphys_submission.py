@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+
+from machine_common_sense.mcs_controller import MCS_Controller
+from machine_common_sense.mcs_goal import MCS_Goal
+from machine_common_sense.mcs_intphys_submission import MCS_IntPhys_Agent, MCS_Submission_Writer, parse_scene_key
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+from machine_common_sense import run_mcs_intphys_submission
+
+DESCRIPTION = {
+    'Performer': 'test_performer',
+    'Submission': 'test_submission',
+    'Description': 'test'
+}
+
+
+class Mock_IntPhys_Controller(MCS_Controller):
+
+    def __init__(self):
+        super().__init__()
+        self.__last_step = None
+        self.__step_number = 0
+
+    def create_step_output(self):
+        return MCS_Step_Output(action_list=['Pass'], goal=MCS_Goal(last_step=self.__last_step),
+                step_number=self.__step_number)
+
+    def end_scene(self, classification, confidence):
+        pass
+
+    def start_scene(self, config_data):
+        if config_data['name'] == 'O1-0001-4':
+            raise ValueError('Failed')
+        self.__last_step = config_data['goal']['last_step']
+        self.__step_number = 0
+        return self.create_step_output()
+
+    def step(self, action, **kwargs):
+        self.__step_number += 1
+        return self.create_step_output()
+
+
+class Mock_IntPhys_Agent(MCS_IntPhys_Agent):
+
+    def step(self, step_output):
+        return 1.0 / step_output.step_number
+
+    def end_scene(self, voe_list):
+        return voe_list[-1], (len(voe_list), 10, 20)
+
+
+class Test_MCS_IntPhys_Submission(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, 'submission.zip')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_zip(self):
+        with zipfile.ZipFile(self.zip_file_path) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            return {name: zip_file.read(name).decode() for name in zip_file.namelist()}
+
+    def write_scenes(self, last_step=3):
+        scene_directory = os.path.join(self.directory.name, 'scenes')
+        os.makedirs(scene_directory)
+        for test in [1, 2]:
+            for scene in [1, 2, 3, 4]:
+                with open(os.path.join(scene_directory, 'O1-' + str(test).zfill(4) + '-' + str(scene) + '.json'),
+                        'w') as scene_file:
+                    json.dump({'goal': {'last_step': last_step}}, scene_file)
+        return scene_directory
+
+    def test_parse_scene_key(self):
+        self.assertEqual(parse_scene_key('scenes/O1-0005-4.json'), 'O1/0005/4')
+        self.assertEqual(parse_scene_key('O3_1076_2.json'), 'O3/1076/2')
+        self.assertEqual(parse_scene_key('eval/O2-12-1.json'), 'O2/0012/1')
+        self.assertIsNone(parse_scene_key('scene_1.json'))
+        self.assertIsNone(parse_scene_key('O1-0005-5.json'))
+
+    def test_agent(self):
+        agent = MCS_IntPhys_Agent()
+        self.assertEqual(agent.step(MCS_Step_Output()), 1.0)
+        self.assertEqual(agent.end_scene([1.0, 0.25, 0.5]), (0.25, None))
+        self.assertEqual(agent.end_scene([]), (1.0, None))
+
+    def test_writer(self):
+        with MCS_Submission_Writer(self.zip_file_path, DESCRIPTION) as writer:
+            self.assertTrue(writer.write_scene('O1/0002/1', 0.25, [1, 0.5, 0.25], (3, 45, 67)))
+            self.assertTrue(writer.write_scene('O1/0001/2', 1, [1, 1, 1]))
+            self.assertFalse(writer.write_scene('O1/0001/2', 0, [0, 0, 0]))
+            self.assertEqual(len(writer), 2)
+            self.assertIn('O1/0001/2', writer)
+
+        actual = self.read_zip()
+        self.assertEqual(sorted(actual.keys()), ['answer.txt', 'description.json', 'location.txt',
+                'voe_O1_0001_2.txt', 'voe_O1_0002_1.txt'])
+        self.assertEqual(actual['answer.txt'], 'O1/0001/2 1.000000\nO1/0002/1 0.250000\n')
+        self.assertEqual(actual['location.txt'], 'O1/0001/2 -1 -1 -1\nO1/0002/1 3 45 67\n')
+        self.assertEqual(actual['voe_O1_0002_1.txt'], '1 1.0000\n2 0.5000\n3 0.2500\n')
+        self.assertEqual(json.loads(actual['description.json']), DESCRIPTION)
+
+    def test_writer_invalid(self):
+        with self.assertRaises(ValueError):
+            MCS_Submission_Writer(self.zip_file_path, {'Performer': 'test_performer'})
+        with MCS_Submission_Writer(self.zip_file_path, DESCRIPTION) as writer:
+            with self.assertRaises(ValueError):
+                writer.write_scene('O1-0001-1', 1, [1])
+
+    def test_run_intphys_scene(self):
+        scene_directory = self.write_scenes()
+        actual = run_mcs_intphys_submission.run_intphys_scene(Mock_IntPhys_Controller(), {
+            'scene': os.path.join(scene_directory, 'O1-0002-3.json')
+        }, Mock_IntPhys_Agent)
+        self.assertEqual(actual['key'], 'O1/0002/3')
+        self.assertEqual(actual['voe_list'], [1.0, 0.5, 1.0 / 3])
+        self.assertEqual(actual['plausibility'], 1.0 / 3)
+        self.assertEqual(actual['location'], [3, 10, 20])
+
+    def test_run_intphys_scene_with_key(self):
+        scene_directory = self.write_scenes()
+        actual = run_mcs_intphys_submission.run_intphys_scene(Mock_IntPhys_Controller(), {
+            'scene': os.path.join(scene_directory, 'O1-0002-3.json'),
+            'key': 'O2/0100/1'
+        }, max_step_count=2)
+        self.assertEqual(actual['key'], 'O2/0100/1')
+        self.assertEqual(actual['voe_list'], [1.0, 1.0])
+        self.assertIsNone(actual['location'])
+
+    def run_submission(self, task_list, process_count=0):
+        return run_mcs_intphys_submission.run_submission(task_list, self.zip_file_path,
+                os.path.join(self.directory.name, 'results.jsonl'), DESCRIPTION, Mock_IntPhys_Controller,
+                Mock_IntPhys_Agent, process_count)
+
+    def test_run_submission(self):
+        task_list = run_mcs_intphys_submission.find_task_list(self.write_scenes())
+        actual = self.run_submission(task_list, process_count=2)
+        self.assertEqual(len(actual), 8)
+        self.assertEqual(len([result for result in actual if result['status'] == 'error']), 1)
+
+        zip_dict = self.read_zip()
+        self.assertEqual(len([name for name in zip_dict if name.startswith('voe_')]), 7)
+        self.assertNotIn('voe_O1_0001_4.txt', zip_dict)
+        self.assertEqual(zip_dict['answer.txt'].splitlines()[0], 'O1/0001/1 0.333333')
+        self.assertEqual(zip_dict['location.txt'].splitlines()[0], 'O1/0001/1 3 10 20')
+        self.assertEqual(len(zip_dict['answer.txt'].splitlines()), 7)
+
+    def test_run_submission_resumes(self):
+        task_list = run_mcs_intphys_submission.find_task_list(self.write_scenes())
+        self.run_submission(task_list[:3])
+        self.assertEqual(len(self.read_zip()['answer.txt'].splitlines()), 3)
+
+        actual = self.run_submission(task_list)
+        self.assertEqual([result['scene'] for result in actual], [task['scene'] for task in task_list[3:]])
+        zip_dict = self.read_zip()
+        self.assertEqual(len(zip_dict['answer.txt'].splitlines()), 7)
+        self.assertEqual(len([name for name in zip_dict if name.startswith('voe_')]), 7)
+
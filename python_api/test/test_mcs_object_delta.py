@@ -0,0 +1,60 @@
+import unittest
+import textwrap
+
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_object_delta import MCS_Object_Delta
+
+
+class Test_MCS_Object_Delta(unittest.TestCase):
+
+    str_output = '''    {
+        "added": [],
+        "changed": {},
+        "removed": []
+    }'''
+
+    def create_object_list(self):
+        return [
+            MCS_Object(uuid='a', held=False, position={'x': 1, 'y': 0, 'z': 1}),
+            MCS_Object(uuid='b', held=False, position={'x': 2, 'y': 0, 'z': 2}),
+            MCS_Object(uuid='c', held=False, position={'x': 3, 'y': 0, 'z': 3})
+        ]
+
+    def test_default(self):
+        delta = MCS_Object_Delta()
+        self.assertTrue(delta.is_empty())
+        self.assertEqual(str(delta), textwrap.dedent(self.str_output))
+
+    def test_create_without_changes(self):
+        delta = MCS_Object_Delta.create(self.create_object_list(), self.create_object_list())
+        self.assertTrue(delta.is_empty())
+
+    def test_create(self):
+        previous_object_list = self.create_object_list()
+        object_list = self.create_object_list()[1:] + [MCS_Object(uuid='d')]
+        object_list[0].held = True
+        object_list[0].position = {'x': 2, 'y': 1, 'z': 2}
+
+        delta = MCS_Object_Delta.create(previous_object_list, object_list)
+        self.assertEqual([instance.uuid for instance in delta.added], ['d'])
+        self.assertEqual(delta.changed, {'b': {'held': True, 'position': {'x': 2, 'y': 1, 'z': 2}}})
+        self.assertEqual(delta.removed, ['a'])
+
+    def test_create_from_empty_list(self):
+        delta = MCS_Object_Delta.create([], self.create_object_list())
+        self.assertEqual([instance.uuid for instance in delta.added], ['a', 'b', 'c'])
+        self.assertEqual(delta.changed, {})
+        self.assertEqual(delta.removed, [])
+
+    def test_apply(self):
+        previous_object_list = self.create_object_list()
+        object_list = [MCS_Object(uuid='0')] + self.create_object_list()[:2]
+        object_list[2].rotation = 90
+
+        actual = MCS_Object_Delta.create(previous_object_list, object_list).apply(previous_object_list)
+        self.assertEqual([instance.uuid for instance in actual], ['0', 'a', 'b'])
+        self.assertEqual([str(instance) for instance in actual], [str(instance) for instance in object_list])
+
+        # The previous objects must not be modified.
+        self.assertEqual(previous_object_list[1].rotation, 0.0)
+        self.assertEqual(len(previous_object_list), 3)
@@ -2,6 +2,7 @@ import unittest
 import math
 import time
 import random
+from unittest import mock
 
 from typing import Tuple
 from shapely import geometry
@@ -290,4 +291,87 @@ class Test_MCS_Reward(unittest.TestCase):
         agent = {'position': {'x':-0.9, 'y': 0.5, 'z':0.0}}
         reward = MCS_Reward._calc_transferral_reward(goal, obj_list, agent)
         self.assertEqual(reward, 0)
-        self.assertIsInstance(reward, int)
\ No newline at end of file
+        self.assertIsInstance(reward, int)
+
+    def create_box_object(self, object_id, x, z, width, depth, angle, y=0.0):
+        cos = math.cos(math.radians(angle))
+        sin = math.sin(math.radians(angle))
+        corners = []
+        for height in (y, y + 1.0):
+            for dx, dz in ((-width, -depth), (width, -depth), (width, depth), (-width, depth)):
+                corners.append({'x': x + (dx * cos - dz * sin) / 2.0, 'y': height,
+                                'z': z + (dx * sin + dz * cos) / 2.0})
+        return {'objectId': object_id, 'objectBounds': {'objectBoundsCorners': corners},
+                'position': {'x': x, 'y': y, 'z': z}}
+
+    def test_calculate_relationships_matches_shapely(self):
+        random.seed(1)
+        obj_list = [self.create_box_object(str(i), random.uniform(-3, 3), random.uniform(-3, 3),
+                                           random.uniform(0.1, 1.5), random.uniform(0.1, 1.5),
+                                           random.uniform(0, 360), random.uniform(0, 1))
+                    for i in range(40)]
+        # Add boxes that exactly touch an edge or a corner.
+        obj_list.append(self.create_box_object('touch_1', 10, 10, 1, 1, 0))
+        obj_list.append(self.create_box_object('touch_2', 11, 10, 1, 1, 0))
+        obj_list.append(self.create_box_object('touch_3', 12, 11, 1, 1, 0))
+
+        relationships = MCS_Reward.calculate_relationships(obj_list)
+        polygons = [MCS_Reward._convert_object_to_planar_polygon(o) for o in obj_list]
+        for i, polygon_1 in enumerate(polygons):
+            for j, polygon_2 in enumerate(polygons):
+                self.assertEqual(relationships.overlaps[i, j], polygon_1.intersects(polygon_2), (i, j))
+                self.assertAlmostEqual(relationships.distances[i, j], polygon_1.distance(polygon_2), places=9)
+
+        self.assertTrue(relationships.overlaps[relationships.retrieve_index('touch_1'),
+                                               relationships.retrieve_index('touch_2')])
+        self.assertTrue(relationships.overlaps[relationships.retrieve_index('touch_2'),
+                                               relationships.retrieve_index('touch_3')])
+
+    def test_calculate_relationships_in_chunks(self):
+        random.seed(2)
+        obj_list = [self.create_box_object(str(i), random.uniform(-3, 3), random.uniform(-3, 3),
+                                           random.uniform(0.1, 1.5), random.uniform(0.1, 1.5),
+                                           random.uniform(0, 360)) for i in range(20)]
+        expected = MCS_Reward.calculate_relationships(obj_list)
+        # Compare fewer pairs at once than there are pairs, so the last chunk is partial.
+        with mock.patch('machine_common_sense.mcs_relationships._PAIR_CHUNK_SIZE', 7):
+            relationships = MCS_Reward.calculate_relationships(obj_list)
+        self.assertTrue((relationships.overlaps == expected.overlaps).all())
+        self.assertTrue((relationships.distances == expected.distances).all())
+        self.assertTrue(relationships.overlaps.any() and not relationships.overlaps.all())
+
+    def test_calculate_relationships_matches_transferral_reward(self):
+        obj_list = [self.create_box_object('0', 0, 0, 1, 1, 0, y=0),
+                    self.create_box_object('1', 0.2, 0.2, 0.5, 0.5, 30, y=1),
+                    self.create_box_object('2', 1.8, 0, 1, 1, 0, y=0),
+                    self.create_box_object('3', 5, 5, 1, 1, 0, y=0)]
+        relationships = MCS_Reward.calculate_relationships(obj_list)
+        for action_id, action, goal_id in [('1', 'on top of', '0'), ('0', 'on top of', '1'),
+                                           ('2', 'next to', '0'), ('3', 'next to', '0'),
+                                           ('0', 'next to', '0')]:
+            goal = MCS_Goal()
+            goal.metadata['target_1'] = {'id': action_id}
+            goal.metadata['target_2'] = {'id': goal_id}
+            goal.metadata['relationship'] = ['target_1', action, 'target_2']
+            matrix = relationships.on_top_of if action == 'on top of' else relationships.next_to
+            expected = MCS_Reward._calc_transferral_reward(goal, obj_list, {})
+            if action_id == goal_id:
+                # An object is never next to itself.
+                expected = 0
+            self.assertEqual(int(matrix[relationships.retrieve_index(action_id),
+                                        relationships.retrieve_index(goal_id)]), expected)
+
+        self.assertAlmostEqual(relationships.retrieve_distance('2', '0'), 0.8)
+        self.assertEqual(relationships.retrieve_distances_to('3').shape, (4,))
+        self.assertTrue(relationships.above[1, 0])
+        self.assertFalse(relationships.above[0, 1])
+
+    def test_calculate_relationships_without_bounds(self):
+        obj_list = [{'objectId': '0', 'position': {'x': 0, 'y': 0, 'z': 0}},
+                    {'objectId': '1', 'position': {'x': 3, 'y': 0, 'z': 4}},
+                    self.create_box_object('2', 0, 0, 1, 1, 0)]
+        relationships = MCS_Reward.calculate_relationships(obj_list)
+        self.assertAlmostEqual(relationships.retrieve_distance('0', '1'), 5)
+        self.assertFalse(relationships.overlaps[0, 1])
+        self.assertTrue(relationships.overlaps[0, 2])
+        self.assertEqual(MCS_Reward.calculate_relationships([]).distances.shape, (0, 0))
@@ -0,0 +1,118 @@
+import multiprocessing
+import numpy
+from PIL import Image
+import unittest
+
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_shared_memory import MCS_Shared_Frame, MCS_Shared_Memory_Consumer, \
+        MCS_Shared_Memory_Publisher
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+
+
+def consume_in_child_process(queue, shared_output):
+    consumer = MCS_Shared_Memory_Consumer()
+    step_output = consumer.retrieve_step_output(shared_output, as_images=True)
+    queue.put((
+        [numpy.array(image).tolist() for image in step_output.image_list],
+        [image.mode for image in step_output.depth_mask_list],
+        step_output.object_list[0].uuid
+    ))
+    consumer.close()
+
+
+class Test_MCS_Shared_Memory(unittest.TestCase):
+
+    def setUp(self):
+        self.publisher = MCS_Shared_Memory_Publisher(slot_count=2)
+        self.consumer = MCS_Shared_Memory_Consumer()
+
+    def tearDown(self):
+        self.consumer.close()
+        self.publisher.close()
+
+    def create_step_output(self, value):
+        return MCS_Step_Output(
+            depth_mask_list=[Image.fromarray(numpy.full((2, 3), value, dtype=numpy.uint8))],
+            image_list=[Image.fromarray(numpy.full((2, 3, 3), value, dtype=numpy.uint8)), \
+                    Image.fromarray(numpy.full((2, 3, 3), value + 1, dtype=numpy.uint8))],
+            object_list=[MCS_Object(uuid='testId')],
+            object_mask_list=[Image.fromarray(numpy.full((2, 3, 3), value + 2, dtype=numpy.uint8))],
+            step_number=value
+        )
+
+    def test_publish(self):
+        step_output = self.create_step_output(10)
+        shared_output = self.publisher.publish(step_output)
+
+        self.assertEqual(len(shared_output.image_list), 2)
+        self.assertEqual(len(shared_output.depth_mask_list), 1)
+        self.assertEqual(len(shared_output.object_mask_list), 1)
+        self.assertIsInstance(shared_output.image_list[0], MCS_Shared_Frame)
+        self.assertEqual(shared_output.image_list[0].shape, (2, 3, 3))
+        self.assertEqual(shared_output.image_list[0].mode, 'RGB')
+        self.assertEqual(shared_output.depth_mask_list[0].shape, (2, 3))
+        self.assertEqual(shared_output.depth_mask_list[0].mode, 'L')
+        self.assertEqual(shared_output.object_list, step_output.object_list)
+        self.assertEqual(shared_output.step_number, 10)
+
+        # The original step output must not be modified.
+        self.assertIsInstance(step_output.image_list[0], Image.Image)
+
+    def test_retrieve_frame(self):
+        shared_output = self.publisher.publish(self.create_step_output(10))
+        pixels = self.consumer.retrieve_frame(shared_output.image_list[1])
+        numpy.testing.assert_array_equal(pixels, numpy.full((2, 3, 3), 11, dtype=numpy.uint8))
+        self.assertFalse(pixels.flags.writeable)
+        del pixels
+
+    def test_retrieve_step_output(self):
+        shared_output = self.publisher.publish(self.create_step_output(10))
+        step_output = self.consumer.retrieve_step_output(shared_output, as_images=True)
+        self.assertIsInstance(step_output.object_mask_list[0], Image.Image)
+        numpy.testing.assert_array_equal(numpy.array(step_output.object_mask_list[0]), \
+                numpy.full((2, 3, 3), 12, dtype=numpy.uint8))
+
+    def test_slots_are_reused(self):
+        shared_output_1 = self.publisher.publish(self.create_step_output(10))
+        shared_output_2 = self.publisher.publish(self.create_step_output(20))
+        shared_output_3 = self.publisher.publish(self.create_step_output(30))
+        self.assertNotEqual(shared_output_1.image_list[0].name, shared_output_2.image_list[0].name)
+        self.assertEqual(shared_output_1.image_list[0].name, shared_output_3.image_list[0].name)
+        step_output = self.consumer.retrieve_step_output(shared_output_2, as_images=True)
+        self.assertEqual(numpy.array(step_output.image_list[0])[0][0][0], 20)
+
+    def test_consumer_closes_replaced_blocks(self):
+        publisher = MCS_Shared_Memory_Publisher(slot_count=1)
+        try:
+            small_output = publisher.publish(MCS_Step_Output(image_list=[Image.new('RGB', (3, 2))]))
+            small_pixels = self.consumer.retrieve_frame(small_output.image_list[0])
+            large_output = publisher.publish(MCS_Step_Output(image_list=[Image.new('RGB', (30, 20))]))
+            self.assertEqual(small_output.image_list[0].slot, large_output.image_list[0].slot)
+            self.assertNotEqual(small_output.image_list[0].name, large_output.image_list[0].name)
+            # The old block is still used by small_pixels, so it is closed on a later retrieve.
+            self.consumer.retrieve_frame(large_output.image_list[0])
+            block_dict = self.consumer._MCS_Shared_Memory_Consumer__block_dict
+            self.assertEqual(list(block_dict.keys()), [large_output.image_list[0].name])
+            self.assertEqual(len(self.consumer._MCS_Shared_Memory_Consumer__stale_block_list), 1)
+            del small_pixels
+            larger_output = publisher.publish(MCS_Step_Output(image_list=[Image.new('RGB', (60, 40))]))
+            self.consumer.retrieve_frame(larger_output.image_list[0])
+            self.assertEqual(list(block_dict.keys()), [larger_output.image_list[0].name])
+            self.assertEqual(self.consumer._MCS_Shared_Memory_Consumer__stale_block_list, [])
+        finally:
+            self.consumer.close()
+            publisher.close()
+
+    def test_publish_to_other_process(self):
+        shared_output = self.publisher.publish(self.create_step_output(10))
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=consume_in_child_process, args=(queue, shared_output))
+        process.start()
+        image_list, depth_mode_list, uuid = queue.get(timeout=30)
+        process.join()
+        self.assertEqual(image_list[0], numpy.full((2, 3, 3), 10).tolist())
+        self.assertEqual(image_list[1], numpy.full((2, 3, 3), 11).tolist())
+        self.assertEqual(depth_mode_list, ['L'])
+        self.assertEqual(uuid, 'testId')
+
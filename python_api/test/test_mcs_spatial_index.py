@@ -0,0 +1,84 @@
+import numpy
+import unittest
+
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_spatial_index import MCS_Spatial_Index
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+
+
+class Test_MCS_Spatial_Index(unittest.TestCase):
+
+    def create_object_list(self, count=200, seed=0):
+        random = numpy.random.RandomState(seed)
+        return [MCS_Object(uuid=str(index), position={'x': x, 'y': y, 'z': z}) for index, (x, y, z) in \
+                enumerate(random.uniform([-10, 0, -10], [10, 2, 10], size=(count, 3)).tolist())]
+
+    def distance(self, instance, position):
+        return numpy.linalg.norm([instance.position[axis] - position[axis] for axis in ('x', 'y', 'z')])
+
+    def test_empty(self):
+        index = MCS_Spatial_Index([])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.nearest({'x': 0, 'y': 0, 'z': 0}), [])
+        self.assertEqual(index.within({'x': 0, 'y': 0, 'z': 0}, 1), [])
+        self.assertEqual(index.in_frustum({'x': 0, 'y': 0, 'z': 0}, 0, 0, 90), [])
+
+    def test_ignores_objects_without_position(self):
+        index = MCS_Spatial_Index([MCS_Object(uuid='a'), MCS_Object(uuid='b', position={'x': 1, 'y': 0, 'z': 1})])
+        self.assertEqual([instance.uuid for instance in index.nearest({'x': 0, 'y': 0, 'z': 0}, 2)], ['b'])
+
+    def test_nearest_matches_brute_force(self):
+        object_list = self.create_object_list()
+        index = MCS_Spatial_Index(object_list, cell_size=0.75)
+        for position in [{'x': 0, 'y': 1, 'z': 0}, {'x': 9.5, 'y': 0, 'z': -9.5}, {'x': 40, 'y': 0, 'z': 40}]:
+            expected = sorted(object_list, key=lambda instance: self.distance(instance, position))[:5]
+            self.assertEqual([instance.uuid for instance in index.nearest(position, 5)],
+                    [instance.uuid for instance in expected])
+
+    def test_within_matches_brute_force(self):
+        object_list = self.create_object_list()
+        index = MCS_Spatial_Index(object_list)
+        position = {'x': 1, 'y': 0.5, 'z': -2}
+        expected = sorted([instance for instance in object_list if self.distance(instance, position) <= 3], \
+                key=lambda instance: self.distance(instance, position))
+        self.assertEqual([instance.uuid for instance in index.within(position, 3)],
+                [instance.uuid for instance in expected])
+        self.assertEqual(len(index.within(position, 100)), len(object_list))
+
+    def test_in_frustum(self):
+        object_list = [
+            MCS_Object(uuid='ahead', position={'x': 0, 'y': 0, 'z': 2}),
+            MCS_Object(uuid='behind', position={'x': 0, 'y': 0, 'z': -2}),
+            MCS_Object(uuid='right', position={'x': 2, 'y': 0, 'z': 0.1}),
+            MCS_Object(uuid='far', position={'x': 0, 'y': 0, 'z': 20}),
+            MCS_Object(uuid='below', position={'x': 0, 'y': -2, 'z': 0.5})
+        ]
+        index = MCS_Spatial_Index(object_list)
+        origin = {'x': 0, 'y': 0, 'z': 0}
+        self.assertEqual([instance.uuid for instance in index.in_frustum(origin, 0, 0, 90, max_distance=10)], \
+                ['ahead'])
+        self.assertEqual([instance.uuid for instance in index.in_frustum(origin, 0, 0, 90)], ['ahead', 'far'])
+        self.assertEqual([instance.uuid for instance in index.in_frustum(origin, 90, 0, 90, max_distance=10)], \
+                ['right'])
+        self.assertEqual([instance.uuid for instance in index.in_frustum(origin, 180, 0, 90, max_distance=10)], \
+                ['behind'])
+        self.assertEqual([instance.uuid for instance in index.in_frustum(origin, 0, 80, 40, max_distance=10)], \
+                ['below'])
+
+    def test_step_output_queries(self):
+        object_list = self.create_object_list(count=50)
+        step_output = MCS_Step_Output(object_list=object_list, position={'x': 0, 'y': 0, 'z': 0}, rotation=0,
+                camera_aspect_ratio=(600, 400), camera_clipping_planes=(0.01, 15), camera_field_of_view=42.5,
+                camera_height=0.5)
+        nearest = step_output.nearest(3)
+        self.assertEqual(len(nearest), 3)
+        self.assertIs(step_output.retrieve_spatial_index(), step_output.retrieve_spatial_index())
+        self.assertEqual(step_output.within(radius=100), sorted(object_list, key=lambda instance: \
+                self.distance(instance, {'x': 0, 'y': 0, 'z': 0})))
+        self.assertTrue(all(self.distance(instance, {'x': 0, 'y': 0, 'z': 0}) <= 1 for instance in \
+                step_output.within()))
+        self.assertTrue(all(instance.position['z'] > 0 for instance in step_output.in_frustum()))
+
+        # The index is rebuilt if the object list is replaced.
+        step_output.object_list = object_list[:1]
+        self.assertEqual(step_output.nearest(3), object_list[:1])
@@ -1,7 +1,8 @@
+import pickle
 import unittest
 import textwrap
 
-from machine_common_sense.mcs_step_output import MCS_Step_Output
+from machine_common_sense.mcs_step_output import MCS_Lazy_Value, MCS_Step_Output
 from machine_common_sense.mcs_goal import MCS_Goal
 from machine_common_sense.mcs_pose import MCS_Pose
 from machine_common_sense.mcs_return_status import MCS_Return_Status
@@ -27,6 +28,7 @@ class Test_Default_MCS_Step_Output(unittest.TestCase):
         },
         "head_tilt": 0.0,
         "image_list": [],
+        "object_delta": None,
         "object_list": [],
         "object_mask_list": [],
         "pose": MCS_Pose.UNDEFINED,
@@ -35,6 +37,7 @@ class Test_Default_MCS_Step_Output(unittest.TestCase):
         "reward": 0,
         "rotation": 0.0,
         "step_number": 0,
+        "structural_object_delta": None,
         "structural_object_list": []
     }'''
 
@@ -78,6 +81,9 @@ class Test_Default_MCS_Step_Output(unittest.TestCase):
         self.assertFalse(self.mcs_step_output.image_list)
         self.assertIsInstance(self.mcs_step_output.image_list, list)
 
+    def test_object_delta(self):
+        self.assertIsNone(self.mcs_step_output.object_delta)
+
     def test_object_list(self):
         self.assertFalse(self.mcs_step_output.object_list)
         self.assertIsInstance(self.mcs_step_output.object_list, list)
@@ -109,9 +115,51 @@ class Test_Default_MCS_Step_Output(unittest.TestCase):
         self.assertEqual(self.mcs_step_output.step_number, 0)
         self.assertIsInstance(self.mcs_step_output.step_number, int)
 
+    def test_structural_object_delta(self):
+        self.assertIsNone(self.mcs_step_output.structural_object_delta)
+
     def test_structural_object_list(self):
         self.assertFalse(self.mcs_step_output.structural_object_list)
         self.assertIsInstance(self.mcs_step_output.structural_object_list, list)
 
     def test_str(self):
         self.assertEqual(str(self.mcs_step_output), textwrap.dedent(self.str_output))
+
+
+class Test_Lazy_MCS_Step_Output(unittest.TestCase):
+
+    def setUp(self):
+        self.call_list = []
+
+    def create_lazy_value(self, name, value):
+        def compute():
+            self.call_list.append(name)
+            return value
+        return MCS_Lazy_Value(compute)
+
+    def test_lazy_value_is_computed_once_on_access(self):
+        step_output = MCS_Step_Output(reward=self.create_lazy_value('reward', 1), step_number=2)
+        self.assertEqual(self.call_list, [])
+        self.assertEqual(step_output.step_number, 2)
+        self.assertEqual(self.call_list, [])
+        self.assertEqual(step_output.reward, 1)
+        self.assertEqual(step_output.reward, 1)
+        self.assertEqual(self.call_list, ['reward'])
+
+    def test_lazy_value_is_replaced_on_set(self):
+        step_output = MCS_Step_Output(reward=self.create_lazy_value('reward', 1))
+        step_output.reward = 2
+        self.assertEqual(step_output.reward, 2)
+        self.assertEqual(self.call_list, [])
+
+    def test_str_with_lazy_values(self):
+        step_output = MCS_Step_Output(object_list=self.create_lazy_value('object_list', []), \
+                pose=self.create_lazy_value('pose', MCS_Pose.UNDEFINED))
+        self.assertEqual(str(step_output), textwrap.dedent(Test_Default_MCS_Step_Output.str_output))
+        self.assertEqual(sorted(self.call_list), ['object_list', 'pose'])
+
+    def test_pickle_with_lazy_values(self):
+        step_output = MCS_Step_Output(reward=self.create_lazy_value('reward', 1))
+        actual = pickle.loads(pickle.dumps(step_output))
+        self.assertEqual(actual.reward, 1)
+        self.assertEqual(self.call_list, ['reward'])
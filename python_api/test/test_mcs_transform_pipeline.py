@@ -0,0 +1,71 @@
+import pickle
+import threading
+import unittest
+
+from machine_common_sense.mcs_step_output import MCS_Step_Output, MCS_Transform_Error
+from machine_common_sense.mcs_transform_pipeline import MCS_Transform_Pipeline
+
+
+class Test_MCS_Transform_Pipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = MCS_Transform_Pipeline(worker_count=2)
+
+    def tearDown(self):
+        self.pipeline.close()
+
+    def test_submit(self):
+        self.pipeline.register_transform('double', lambda step_output: step_output.step_number * 2)
+        self.pipeline.register_transform('thread', lambda step_output: threading.current_thread().name)
+        step_output = self.pipeline.submit(MCS_Step_Output(step_number=5))
+        self.assertEqual(step_output.retrieve_transform_result('double', timeout=10), 10)
+        self.assertTrue(step_output.retrieve_transform_result('thread', timeout=10).startswith('MCS_Transform'))
+
+    def test_submit_without_transforms(self):
+        self.assertFalse(self.pipeline.has_transforms())
+        step_output = self.pipeline.submit(MCS_Step_Output(step_number=5))
+        with self.assertRaises(KeyError):
+            step_output.retrieve_transform_result('double')
+
+    def test_submit_overlaps_caller(self):
+        # The transform must run while the caller continues (as if it were simulating the next step).
+        event = threading.Event()
+        self.pipeline.register_transform('wait', lambda step_output: event.wait(10))
+        step_output = self.pipeline.submit(MCS_Step_Output())
+        event.set()
+        self.assertTrue(step_output.retrieve_transform_result('wait', timeout=10))
+
+    def test_transform_error(self):
+        def fail(step_output):
+            raise ValueError('Failed')
+        self.pipeline.register_transform('fail', fail)
+        step_output = self.pipeline.submit(MCS_Step_Output())
+        with self.assertRaises(ValueError):
+            step_output.retrieve_transform_result('fail', timeout=10)
+
+    def test_pickle_with_transform_error(self):
+        def fail(step_output):
+            raise ValueError('Failed')
+        self.pipeline.register_transform('fail', fail)
+        self.pipeline.register_transform('double', lambda step_output: step_output.step_number * 2)
+        step_output = pickle.loads(pickle.dumps(self.pipeline.submit(MCS_Step_Output(step_number=5))))
+        self.assertEqual(step_output.retrieve_transform_result('double'), 10)
+        with self.assertRaisesRegex(MCS_Transform_Error, 'Failed'):
+            step_output.retrieve_transform_result('fail')
+
+    def test_close_and_submit_again(self):
+        self.pipeline.register_transform('double', lambda step_output: step_output.step_number * 2)
+        self.pipeline.close()
+        step_output = self.pipeline.submit(MCS_Step_Output(step_number=5))
+        self.assertEqual(step_output.retrieve_transform_result('double', timeout=10), 10)
+
+    def test_unregister_transform(self):
+        self.pipeline.register_transform('double', lambda step_output: step_output.step_number * 2)
+        self.pipeline.unregister_transform('double')
+        self.assertFalse(self.pipeline.has_transforms())
+
+    def test_pickle_waits_for_results(self):
+        self.pipeline.register_transform('double', lambda step_output: step_output.step_number * 2)
+        step_output = pickle.loads(pickle.dumps(self.pipeline.submit(MCS_Step_Output(step_number=5))))
+        self.assertEqual(step_output.retrieve_transform_result('double'), 10)
+        self.assertEqual(step_output.step_number, 5)
@@ -0,0 +1,142 @@
+import numpy
+from PIL import Image
+import unittest
+
+from machine_common_sense.mcs_controller import MCS_Controller
+from machine_common_sense.mcs_goal import MCS_Goal
+from machine_common_sense.mcs_object import MCS_Object
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+from machine_common_sense.mcs_vector_controller import MCS_Vector_Controller
+
+
+class Mock_Vector_Controller(MCS_Controller):
+
+    def __init__(self):
+        super().__init__()
+        self.__last_step = None
+        self.__scene_name = None
+        self.__step_number = 0
+
+    def create_step_output(self):
+        value = self.__step_number + (100 if self.__scene_name == 'scene_2' else 0)
+        return MCS_Step_Output(
+            depth_mask_list=[Image.fromarray(numpy.full((4, 6), value, dtype=numpy.uint8))],
+            goal=MCS_Goal(last_step=self.__last_step),
+            image_list=[Image.fromarray(numpy.full((4, 6, 3), value, dtype=numpy.uint8))],
+            object_list=[MCS_Object(uuid=self.__scene_name)],
+            object_mask_list=[Image.fromarray(numpy.full((4, 6, 3), value, dtype=numpy.uint8))],
+            position={'x': value, 'y': 0, 'z': 0},
+            reward=(1 if self.__step_number == self.__last_step else 0),
+            rotation=90,
+            step_number=self.__step_number
+        )
+
+    def end_scene(self, classification, confidence):
+        pass
+
+    def start_scene(self, config_data):
+        if config_data['name'] == 'scene_fail':
+            raise ValueError('Failed')
+        self.__last_step = config_data['goal']['last_step'] if 'goal' in config_data else None
+        self.__scene_name = config_data['name']
+        self.__step_number = 0
+        return self.create_step_output()
+
+    def step(self, action, **kwargs):
+        self.__step_number += 1
+        return self.create_step_output()
+
+
+class Test_MCS_Vector_Controller(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = None
+
+    def tearDown(self):
+        if self.controller is not None:
+            self.controller.close()
+
+    def create_controller(self, scene_list, controller_count, **kwargs):
+        self.controller = MCS_Vector_Controller(scene_list, controller_count, controller_factory=Mock_Vector_Controller,
+                **kwargs)
+        return self.controller
+
+    def test_reset(self):
+        controller = self.create_controller([{'name': 'scene_1'}, {'name': 'scene_2'}], 2)
+        observations = controller.reset()
+        self.assertEqual(len(controller), 2)
+        self.assertEqual(observations['image'].shape, (2, 4, 6, 3))
+        self.assertEqual(observations['image'].dtype, numpy.uint8)
+        self.assertEqual(observations['depth_mask'].shape, (2, 4, 6))
+        self.assertEqual(observations['object_mask'].shape, (2, 4, 6, 3))
+        self.assertEqual(observations['position'].tolist(), [[0, 0, 0], [100, 0, 0]])
+        self.assertEqual(observations['rotation'].tolist(), [90, 90])
+        self.assertEqual([object_list[0].uuid for object_list in observations['object_list']], ['scene_1', 'scene_2'])
+
+    def test_step(self):
+        controller = self.create_controller([{'name': 'scene_1'}, {'name': 'scene_2'}], 2)
+        controller.reset()
+        observations, rewards, dones, info_list = controller.step(['MoveAhead', ('RotateLook', {'rotation': 10})])
+        self.assertEqual(observations['image'][:, 0, 0, 0].tolist(), [1, 101])
+        self.assertEqual(rewards.tolist(), [0, 0])
+        self.assertEqual(dones.tolist(), [False, False])
+        self.assertEqual([info['scene_name'] for info in info_list], ['scene_1', 'scene_2'])
+        self.assertEqual([info['step_number'] for info in info_list], [1, 1])
+
+    def test_step_with_wrong_action_count(self):
+        controller = self.create_controller([{'name': 'scene_1'}], 2)
+        controller.reset()
+        with self.assertRaises(ValueError):
+            controller.step(['MoveAhead'])
+
+    def test_auto_reset(self):
+        scene_list = [{'name': 'scene_1', 'goal': {'last_step': 1}}, {'name': 'scene_2', 'goal': {'last_step': 2}},
+                {'name': 'scene_3', 'goal': {'last_step': 2}}]
+        controller = self.create_controller(scene_list, 2)
+        controller.reset()
+
+        observations, rewards, dones, info_list = controller.step(['Pass', 'Pass'])
+        self.assertEqual(dones.tolist(), [True, False])
+        self.assertEqual(rewards.tolist(), [1, 0])
+        self.assertEqual(info_list[0]['scene_name'], 'scene_1')
+        self.assertEqual(info_list[0]['terminal_observation']['step_number'], 1)
+        self.assertNotIn('terminal_observation', info_list[1])
+        # The first controller has started the next scene.
+        self.assertEqual(observations['object_list'][0][0].uuid, 'scene_3')
+        self.assertEqual(observations['image'][:, 0, 0, 0].tolist(), [0, 101])
+
+        observations, rewards, dones, info_list = controller.step(['Pass', 'Pass'])
+        self.assertEqual(dones.tolist(), [False, True])
+        # The scene list repeats.
+        self.assertEqual(observations['object_list'][1][0].uuid, 'scene_1')
+
+    def test_max_step_count(self):
+        controller = self.create_controller([{'name': 'scene_1'}], 1, max_step_count=2)
+        controller.reset()
+        self.assertEqual(controller.step(['Pass'])[2].tolist(), [False])
+        self.assertEqual(controller.step(['Pass'])[2].tolist(), [True])
+
+    def test_max_step_count_does_not_end_scenes_with_last_step(self):
+        controller = self.create_controller([{'name': 'scene_1', 'goal': {'last_step': 3}}], 1, max_step_count=1)
+        controller.reset()
+        self.assertEqual([controller.step(['Pass'])[2].tolist() for _ in range(3)], [[False], [False], [True]])
+
+    def test_worker_error(self):
+        controller = self.create_controller([{'name': 'scene_fail'}], 1)
+        with self.assertRaises(RuntimeError):
+            controller.reset()
+
+    def test_worker_error_keeps_controllers_in_sync(self):
+        scene_list = [{'name': 'scene_fail'}, {'name': 'scene_1'}, {'name': 'scene_2'}, {'name': 'scene_3'}]
+        controller = self.create_controller(scene_list, 2)
+        with self.assertRaises(RuntimeError) as context:
+            controller.reset()
+        self.assertIn('process 0 failed', str(context.exception))
+        self.assertNotIn('process 1 failed', str(context.exception))
+        # The second controller's reply to the failed reset was read too, so the next reset gets its own replies.
+        observations = controller.reset()
+        self.assertEqual([object_list[0].uuid for object_list in observations['object_list']], ['scene_2', 'scene_3'])
+
+    def test_needs_controller_factory_or_unity_app(self):
+        with self.assertRaises(ValueError):
+            MCS_Vector_Controller([{'name': 'scene_1'}], 1)
@@ -0,0 +1,193 @@
+import json
+import os
+import tempfile
+import unittest
+
+from machine_common_sense.mcs_controller import MCS_Controller
+from machine_common_sense.mcs_goal import MCS_Goal
+from machine_common_sense.mcs_step_output import MCS_Step_Output
+from machine_common_sense import run_mcs_batch
+
+
+class Mock_Batch_Controller(MCS_Controller):
+
+    def __init__(self):
+        super().__init__()
+        self.action_list = []
+        self.__last_step = None
+        self.__step_number = 0
+
+    def create_step_output(self):
+        return MCS_Step_Output(goal=MCS_Goal(last_step=self.__last_step), reward=self.__step_number,
+                return_status='SUCCESSFUL', step_number=self.__step_number)
+
+    def end_scene(self, classification, confidence):
+        pass
+
+    def start_scene(self, config_data):
+        if config_data['name'] == 'scene_fail':
+            raise ValueError('Failed')
+        self.__last_step = config_data['goal']['last_step'] if 'goal' in config_data else None
+        self.__step_number = 0
+        return self.create_step_output()
+
+    def step(self, action, **kwargs):
+        self.action_list.append((action, kwargs))
+        self.__step_number += 1
+        return self.create_step_output()
+
+
+class Test_Run_MCS_Batch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scene_directory = os.path.join(self.directory.name, 'scenes')
+        os.makedirs(self.scene_directory)
+        self.results_file_path = os.path.join(self.directory.name, 'results.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_scene(self, name, config_data):
+        scene_file_path = os.path.join(self.scene_directory, name + '.json')
+        with open(scene_file_path, 'w') as scene_file:
+            json.dump(config_data, scene_file)
+        return scene_file_path
+
+    def write_scenes(self, count):
+        return [self.write_scene('scene_' + str(index), {'answer': {'actions': [
+            {'action': 'MoveAhead', 'params': {'amount': 0.5}}
+        ] * (index + 1)}}) for index in range(count)]
+
+    def test_find_task_list_from_directory(self):
+        scene_file_path_list = self.write_scenes(3)
+        with open(os.path.join(self.scene_directory, 'readme.txt'), 'w') as text_file:
+            text_file.write('not a scene')
+        actual = run_mcs_batch.find_task_list(self.scene_directory)
+        self.assertEqual(actual, [{'scene': scene_file_path} for scene_file_path in scene_file_path_list])
+
+    def test_find_task_list_from_manifest(self):
+        manifest_file_path = os.path.join(self.directory.name, 'manifest.txt')
+        with open(manifest_file_path, 'w') as manifest_file:
+            manifest_file.write('# The scenes\nscenes/scene_0.json\n\n{"scene": "scenes/scene_1.json", ' + \
+                    '"actions": "scene_1.txt"}\n{"scene": "scenes/scene_2.json", "actions": ["Pass"]}\n')
+        actual = run_mcs_batch.find_task_list(manifest_file_path)
+        self.assertEqual(actual, [
+            {'scene': os.path.join(self.directory.name, 'scenes/scene_0.json')},
+            {'scene': os.path.join(self.directory.name, 'scenes/scene_1.json'),
+                    'actions': os.path.join(self.directory.name, 'scene_1.txt')},
+            {'scene': os.path.join(self.directory.name, 'scenes/scene_2.json'), 'actions': ['Pass']}
+        ])
+
+    def test_load_action_list(self):
+        action_file_path = os.path.join(self.directory.name, 'actions.txt')
+        with open(action_file_path, 'w') as action_file:
+            action_file.write('# Go\nMoveAhead,amount=0.5\n\nPickupObject,objectId=ball_1\n')
+        self.assertEqual(run_mcs_batch.load_action_list(action_file_path), [
+            ('MoveAhead', {'amount': 0.5}),
+            ('PickupObject', {'objectId': 'ball_1'})
+        ])
+        self.assertEqual(run_mcs_batch.load_action_list(['Pass', ('RotateLook', {'rotation': 10}), {
+            'action': 'MoveBack'
+        }]), [('Pass', {}), ('RotateLook', {'rotation': 10}), ('MoveBack', {})])
+        with self.assertRaises(ValueError):
+            run_mcs_batch.load_action_list(['NotAnAction'])
+
+    def test_find_action_list(self):
+        action_directory = os.path.join(self.directory.name, 'actions')
+        os.makedirs(action_directory)
+        with open(os.path.join(action_directory, 'scene_1.json'), 'w') as action_file:
+            json.dump(['RotateLook,rotation=90'], action_file)
+        config_data = {'answer': {'actions': [{'action': 'Pass', 'params': {}}]}}
+
+        self.assertEqual(run_mcs_batch.find_action_list({'scene': 'scene_1.json', 'actions': ['MoveBack']},
+                config_data, action_directory), [('MoveBack', {})])
+        self.assertEqual(run_mcs_batch.find_action_list({'scene': 'scene_1.json'}, config_data, action_directory),
+                [('RotateLook', {'rotation': 90.0})])
+        self.assertEqual(run_mcs_batch.find_action_list({'scene': 'scene_2.json'}, config_data, action_directory),
+                [('Pass', {})])
+        self.assertIsNone(run_mcs_batch.find_action_list({'scene': 'scene_2.json'}, {}, action_directory))
+
+    def test_run_scene(self):
+        controller = Mock_Batch_Controller()
+        scene_file_path = self.write_scene('scene_a', {'goal': {'last_step': 2}})
+        actual = run_mcs_batch.run_scene(controller, {'scene': scene_file_path, 'actions': ['Pass'] * 5})
+        self.assertEqual(actual['status'], run_mcs_batch.OK)
+        self.assertEqual(actual['name'], 'scene_a')
+        self.assertEqual(actual['action_count'], 5)
+        self.assertEqual(actual['step_count'], 2)
+        self.assertEqual(actual['reward'], 2)
+        self.assertEqual(actual['return_status'], 'SUCCESSFUL')
+        self.assertEqual(controller.action_list, [('Pass', {}), ('Pass', {})])
+
+    def test_run_scene_with_max_step_count(self):
+        controller = Mock_Batch_Controller()
+        scene_file_path = self.write_scene('scene_a', {})
+        actual = run_mcs_batch.run_scene(controller, {'scene': scene_file_path, 'actions': ['Pass'] * 5},
+                max_step_count=3)
+        self.assertEqual(actual['step_count'], 3)
+
+    def test_run_batch(self):
+        scene_file_path_list = self.write_scenes(3)
+        scene_file_path_list.append(self.write_scene('scene_fail', {'answer': {'actions': ['Pass']}}))
+        task_list = run_mcs_batch.find_task_list(self.scene_directory)
+        actual = run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller, process_count=0)
+        self.assertEqual(len(actual), 4)
+        self.assertEqual([result['step_count'] for result in actual[:3]], [1, 2, 3])
+        self.assertEqual(actual[3]['status'], run_mcs_batch.ERROR)
+        self.assertEqual(actual[3]['error'], 'Failed')
+        self.assertEqual(run_mcs_batch.read_results(self.results_file_path), actual)
+
+    def test_run_batch_with_processes(self):
+        self.write_scenes(4)
+        task_list = run_mcs_batch.find_task_list(self.scene_directory)
+        actual = run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller, process_count=2)
+        self.assertEqual(sorted(result['scene'] for result in actual), [task['scene'] for task in task_list])
+        self.assertTrue(all(result['status'] == run_mcs_batch.OK for result in actual))
+        self.assertEqual(len(run_mcs_batch.read_results(self.results_file_path)), 4)
+
+    def test_run_batch_resumes(self):
+        self.write_scenes(3)
+        task_list = run_mcs_batch.find_task_list(self.scene_directory)
+        run_mcs_batch.run_batch(task_list[:1], self.results_file_path, Mock_Batch_Controller, process_count=0)
+        # Mimic a crash while writing a result.
+        with open(self.results_file_path, 'a') as results_file:
+            results_file.write('{"scene": "partial')
+
+        actual = run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller, process_count=0)
+        self.assertEqual([result['scene'] for result in actual], [task['scene'] for task in task_list[1:]])
+        self.assertEqual([result['scene'] for result in run_mcs_batch.read_results(self.results_file_path)],
+                [task['scene'] for task in task_list])
+
+        self.assertEqual(run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller,
+                process_count=0), [])
+
+    def test_run_batch_resumes_with_other_scene_path(self):
+        self.write_scenes(2)
+        working_directory = os.getcwd()
+        try:
+            os.chdir(self.directory.name)
+            task_list = run_mcs_batch.find_task_list('scenes')
+            run_mcs_batch.run_batch([{'scene': 'scenes/scene_0.json'}], self.results_file_path, Mock_Batch_Controller,
+                    process_count=0)
+            actual = run_mcs_batch.run_batch(run_mcs_batch.find_task_list('./scenes'), self.results_file_path,
+                    Mock_Batch_Controller, process_count=0)
+        finally:
+            os.chdir(working_directory)
+        self.assertEqual([result['scene'] for result in actual], [task['scene'] for task in task_list[1:]])
+        self.assertEqual(run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller,
+                process_count=0), [])
+
+    def test_run_batch_retry_errors(self):
+        scene_file_path = self.write_scene('scene_0', {})
+        task_list = [{'scene': scene_file_path}]
+        actual = run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller, process_count=0)
+        self.assertEqual(actual[0]['status'], run_mcs_batch.ERROR)
+        self.assertEqual(run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller,
+                process_count=0), [])
+
+        task_list[0]['actions'] = ['Pass']
+        actual = run_mcs_batch.run_batch(task_list, self.results_file_path, Mock_Batch_Controller, process_count=0,
+                retry_errors=True)
+        self.assertEqual(actual[0]['status'], run_mcs_batch.OK)
+
@@ -0,0 +1,54 @@
+import json
+import numpy
+import os
+import tempfile
+import unittest
+
+from machine_common_sense import run_mcs_benchmark
+
+class Test_Run_MCS_Benchmark(unittest.TestCase):
+
+    def test_create_event(self):
+        event = run_mcs_benchmark.create_event(object_count=4, structural_object_count=2, screen_width=6,
+                screen_height=4, frame_count=3)
+        self.assertEqual(len(event.metadata['objects']), 4)
+        self.assertEqual(len(event.metadata['structuralObjects']), 2)
+        self.assertEqual(len(event.events), 3)
+        self.assertEqual(event.events[0].frame.shape, (4, 6, 3))
+        # The MCS depth override returns the raw Unity buffer rather than AI2-THOR's float32 (H, W) depth.
+        self.assertEqual(event.events[0].depth_frame.shape, (4, 6, 3))
+        self.assertEqual(event.events[0].depth_frame.dtype, numpy.uint8)
+        self.assertEqual(len(event.events[0].object_id_to_color), 6)
+
+    def test_create_event_is_seeded(self):
+        event_1 = run_mcs_benchmark.create_event(object_count=3, screen_width=2, screen_height=2, seed=5)
+        event_2 = run_mcs_benchmark.create_event(object_count=3, screen_width=2, screen_height=2, seed=5)
+        self.assertEqual(event_1.metadata, event_2.metadata)
+        self.assertEqual(event_1.events[0].frame.tolist(), event_2.events[0].frame.tolist())
+
+    def test_load_event(self):
+        metadata = run_mcs_benchmark.create_event(object_count=2, structural_object_count=1).metadata
+        with tempfile.TemporaryDirectory() as directory:
+            event_file_path = os.path.join(directory, 'ai2thor_output_1.json')
+            with open(event_file_path, 'w') as event_file:
+                json.dump({'metadata': metadata}, event_file)
+            event = run_mcs_benchmark.load_event(event_file_path, screen_width=3, screen_height=2)
+        self.assertEqual(event.metadata, metadata)
+        self.assertEqual(event.events[0].frame.shape, (2, 3, 3))
+
+    def test_run_benchmarks(self):
+        event = run_mcs_benchmark.create_event(object_count=4, structural_object_count=2, screen_width=6,
+                screen_height=4)
+        result_dict = run_mcs_benchmark.run_benchmarks(event, iteration_count=2, repeat_count=1)
+        self.assertIn('wrap_output', result_dict)
+        self.assertIn('calculate_reward', result_dict)
+        self.assertIn('validate_and_convert_params', result_dict)
+        for result in result_dict.values():
+            self.assertGreater(result['calls_per_second'], 0)
+            self.assertGreaterEqual(result['peak_bytes'], 0)
+
+    def test_run_benchmarks_with_name_list(self):
+        event = run_mcs_benchmark.create_event(object_count=1, screen_width=2, screen_height=2)
+        result_dict = run_mcs_benchmark.run_benchmarks(event, ['calculate_reward'], iteration_count=1, repeat_count=1)
+        self.assertEqual(list(result_dict.keys()), ['calculate_reward'])
+
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#
+# Measure how fast scenes are generated at each of several scales (room size and numbers of objects and walls).
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+import geometry
+import goal
+import goals
+import optimal_path
+import scene_generator
+
+# The scales measured by default: the usual scene, and larger rooms with many more objects and walls.
+DEFAULT_SCALES = [
+    goal.SceneScale(),
+    goal.SceneScale(20, 50, 10),
+    goal.SceneScale(30, 100, 20),
+    goal.SceneScale(40, 200, 40)
+]
+
+
+def parse_scale(text: str) -> goal.SceneScale:
+    """Parse a scale like 20:50:10 (room size, object count, and wall count), where an empty count (like 20::10) is
+    the usual random number."""
+    parts = text.split(':')
+    try:
+        if len(parts) != 3:
+            raise ValueError(text)
+        room_size = float(parts[0]) if parts[0] != '' else geometry.DEFAULT_ROOM_SIZE
+        object_count = int(parts[1]) if parts[1] != '' else None
+        wall_count = int(parts[2]) if parts[2] != '' else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'scale must be like ROOM_SIZE:OBJECTS:WALLS: {text}')
+    if room_size < geometry.MIN_ROOM_SIZE:
+        raise argparse.ArgumentTypeError(f'room size must be at least {geometry.MIN_ROOM_SIZE}: {text}')
+    return goal.SceneScale(room_size, object_count, wall_count)
+
+
+def measure_scale(scene_scale: goal.SceneScale, goal_type: str, count: int, seed: int,
+                  find_path: bool = False) -> Dict[str, Any]:
+    """Generate count scenes (each from its own seed, like scene_generator) at the given scale and return their
+    throughput and mean numbers of objects and walls. A failed scene counts toward the time but not the means."""
+    goal.set_scene_scale(scene_scale)
+    object_counts = []
+    wall_counts = []
+    failures = 0
+    start = time.perf_counter()
+    try:
+        for index in range(1, count + 1):
+            random.seed(scene_generator.index_seed(seed, index))
+            try:
+                body = scene_generator.generate_scene(f'scene-{index}', goal_type, find_path)
+            except (RuntimeError, ZeroDivisionError, TypeError, goal.GoalException, ValueError) as e:
+                logging.info(f'failed to generate scene {index}: {e}')
+                failures += 1
+                continue
+            walls = [obj for obj in body['objects'] if obj['id'].startswith('wall_')]
+            wall_counts.append(len(walls))
+            object_counts.append(len(body['objects']) - len(walls))
+    finally:
+        goal.set_scene_scale(goal.SceneScale())
+    seconds = time.perf_counter() - start
+
+    return {
+        'scale': scene_scale._asdict(),
+        'scenes': count,
+        'failures': failures,
+        'seconds': seconds,
+        'scenes_per_second': (count / seconds) if seconds > 0 else float('inf'),
+        'mean_objects': (sum(object_counts) / len(object_counts)) if len(object_counts) > 0 else 0.0,
+        'mean_walls': (sum(wall_counts) / len(wall_counts)) if len(wall_counts) > 0 else 0.0
+    }
+
+
+def run_benchmarks(scales: List[goal.SceneScale], goal_type: str, count: int, seed: int,
+                   find_path: bool = False) -> List[Dict[str, Any]]:
+    return [measure_scale(scene_scale, goal_type, count, seed, find_path) for scene_scale in scales]
+
+
+def format_count(count: Any) -> str:
+    return 'random' if count is None else str(count)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure how many scenes per second are generated at each scale')
+    parser.add_argument('--scale', type=parse_scale, action='append', default=None, dest='scales',
+                        metavar='ROOM_SIZE:OBJECTS:WALLS',
+                        help='Measure this scale, like 20:50:10 (may be given more than once; leave a count empty, '
+                             'like 20::10, for the usual random number) [default is '
+                             f'{" ".join(f"{scale.room_size}:{format_count(scale.object_count)}:{format_count(scale.wall_count)}" for scale in DEFAULT_SCALES)}]')
+    parser.add_argument('--goal', default='interaction', choices=goals.get_goal_types(),
+                        help='The goal of each scene [default=%(default)s]')
+    parser.add_argument('-c', '--count', type=int, default=20,
+                        help='How many scenes to generate at each scale [default=%(default)s]')
+    parser.add_argument('--seed', type=int, default=0, help='Random number seed [default=%(default)s]')
+    parser.add_argument('--find_path', default=False, action='store_true',
+                        help='Whether to run the pathfinding for interaction goals')
+    parser.add_argument('--path-planner', default=optimal_path.DEFAULT_PATH_PLANNER,
+                        choices=optimal_path.PATH_PLANNERS.keys(),
+                        help='With --find_path, how to find the paths [default=%(default)s]')
+    parser.add_argument('--json', default=None, dest='json_file_path', help='Also save the results to this JSON file')
+    parser.add_argument('--loglevel', choices=scene_generator.LOG_LEVELS, default='ERROR',
+                        help='set logging level [default=%(default)s]')
+    args = parser.parse_args(argv[1:])
+    logging.getLogger().setLevel(args.loglevel)
+    optimal_path.set_path_planner(args.path_planner)
+
+    results = run_benchmarks(args.scales or DEFAULT_SCALES, args.goal, args.count, args.seed, args.find_path)
+
+    print(f'{"ROOM SIZE":>10}{"OBJECTS":>10}{"WALLS":>10}{"SCENES/SEC":>12}{"MEAN MS":>12}{"MEAN OBJECTS":>14}'
+          f'{"MEAN WALLS":>12}{"FAILURES":>10}')
+    for result in results:
+        scale = result['scale']
+        print(f'{scale["room_size"]:>10.2f}{format_count(scale["object_count"]):>10}'
+              f'{format_count(scale["wall_count"]):>10}{result["scenes_per_second"]:>12.1f}'
+              f'{(result["seconds"] * 1000 / result["scenes"]):>12.2f}{result["mean_objects"]:>14.1f}'
+              f'{result["mean_walls"]:>12.1f}{result["failures"]:>10}')
+
+    if args.json_file_path is not None:
+        with open(args.json_file_path, 'w') as json_file:
+            json.dump(results, json_file, indent=4)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
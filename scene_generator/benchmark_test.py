@@ -0,0 +1,28 @@
+import argparse
+
+import pytest
+
+import geometry
+import goal
+from benchmark import measure_scale, parse_scale
+
+
+def test_parse_scale():
+    assert parse_scale('20:50:10') == goal.SceneScale(20, 50, 10)
+    assert parse_scale(':100:') == goal.SceneScale(geometry.DEFAULT_ROOM_SIZE, 100, None)
+    for text in ['20:50', '20:x:10', '0.5:1:1']:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_scale(text)
+
+
+def test_measure_scale():
+    result = measure_scale(goal.SceneScale(15, 25, 4), 'Traversal', 2, 0)
+    assert result['scale'] == {'room_size': 15, 'object_count': 25, 'wall_count': 4}
+    assert result['scenes'] == 2
+    assert result['failures'] == 0
+    assert result['scenes_per_second'] > 0
+    assert result['mean_objects'] >= 20
+    assert result['mean_walls'] == 4
+    # The usual scale is restored.
+    assert goal.get_scene_scale() == goal.SceneScale()
+    assert geometry.get_room_size() == geometry.DEFAULT_ROOM_SIZE
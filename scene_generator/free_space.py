@@ -0,0 +1,210 @@
+"""
+Places objects by sampling directly from the free space of the room rather than by rejection sampling. For an object's
+footprint (its bounding rectangle) at one rotation, the free space is the region of positions where the footprint is
+inside the room and touches no other bounding rectangle: the room shrunk by the footprint, minus each other rectangle
+dilated by the footprint (their Minkowski sum), and limited by any distance constraints. A position sampled uniformly
+from it fits unless rounding it moved it onto an edge, so each object is placed (or found not to fit at any rotation)
+in a bounded number of steps. Needs shapely, like optimal_path.
+"""
+import logging
+import math
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy
+from shapely.geometry import Point, Polygon, box
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import unary_union
+from shapely.vectorized import contains
+
+import geometry
+from separating_axis_theorem import sat_entry
+
+# How many random positions to try before computing the free space.
+QUICK_TRIES = 4
+# How many positions to sample from the free space at each rotation, in case rounding a position moves it onto another
+# rectangle (or out of the room).
+MAX_SAMPLES = 10
+# How many random points in the bounds of a free space polygon to test at once, and how many times, to find one in it.
+SAMPLE_BATCH_SIZE = 64
+MAX_SAMPLE_BATCHES = 16
+# The number of segments in each quarter circle of a distance constraint.
+CIRCLE_RESOLUTION = 16
+
+
+class DistanceConstraint(NamedTuple):
+    """A constraint that the position of a placed object is at least min_distance, and at most max_distance (if any),
+    from the x and z of the given position: an annulus around it."""
+    position: Dict[str, float]
+    min_distance: float = 0.0
+    max_distance: Optional[float] = None
+
+    def is_met(self, x: float, z: float) -> bool:
+        distance = math.sqrt((x - self.position['x']) ** 2 + (z - self.position['z']) ** 2)
+        return self.min_distance <= distance and (self.max_distance is None or distance <= self.max_distance)
+
+    def get_region(self) -> Optional[BaseGeometry]:
+        """Return the annulus as a polygon that is just inside the true annulus, or None if it is not limited."""
+        center = Point(self.position['x'], self.position['z'])
+        region = None
+        if self.max_distance is not None:
+            # The vertices of a buffer are on its circle, so it is inside the circle.
+            region = center.buffer(self.max_distance, CIRCLE_RESOLUTION)
+        if self.min_distance > 0:
+            # Enlarge the inner circle so its edges (rather than its vertices) are on the true circle.
+            inner = center.buffer(self.min_distance / math.cos(math.pi / (4 * CIRCLE_RESOLUTION)), CIRCLE_RESOLUTION)
+            if region is None:
+                region = box(geometry.ROOM_DIMENSIONS[0][0], geometry.ROOM_DIMENSIONS[1][0],
+                             geometry.ROOM_DIMENSIONS[0][1], geometry.ROOM_DIMENSIONS[1][1])
+            region = region.difference(inner)
+        return region
+
+
+def get_footprint(obj_def: Dict[str, Any], rotation: float, x: float = 0.0, z: float = 0.0) -> List[Dict[str, float]]:
+    """Return the bounding rectangle of the object definition at the given position (by default, the origin) with the
+    given rotation."""
+    offset = obj_def.get('offset', {'x': 0.0, 'z': 0.0})
+    return geometry.calc_obj_coords(x, z, obj_def['dimensions']['x'] / 2.0, obj_def['dimensions']['z'] / 2.0,
+                                    offset['x'], offset['z'], rotation)
+
+
+def get_performer_rect(performer_position: Dict[str, float]) -> List[Dict[str, float]]:
+    x = performer_position['x']
+    z = performer_position['z']
+    half_width = geometry.PERFORMER_HALF_WIDTH
+    return [{'x': x - half_width, 'z': z - half_width}, {'x': x - half_width, 'z': z + half_width},
+            {'x': x + half_width, 'z': z + half_width}, {'x': x + half_width, 'z': z - half_width}]
+
+
+def create_location(obj_def: Dict[str, Any], rotation: float, x: float, z: float,
+                    rect: List[Dict[str, float]]) -> Dict[str, Any]:
+    """Return the location of the object definition at the given position and rotation, with its bounding rectangle,
+    like geometry.calc_obj_pos."""
+    return {
+        'rotation': {'x': 0, 'y': rotation, 'z': 0},
+        'position': {'x': x, 'y': obj_def['position_y'], 'z': z},
+        'bounding_box': rect
+    }
+
+
+def convex_hull(points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Return the convex hull of the points, counterclockwise (by Andrew's monotone chain)."""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def half_hull(sorted_points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        hull = []
+        for point in sorted_points:
+            while len(hull) >= 2 and (hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1]) - \
+                    (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0]) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull[:-1]
+
+    return half_hull(points) + half_hull(points[::-1])
+
+
+def dilate_rect(rect: List[Dict[str, float]], footprint: List[Dict[str, float]]) -> Polygon:
+    """Return the positions where the footprint would touch the convex rectangle: their Minkowski difference."""
+    return Polygon(convex_hull([(point['x'] - footprint_point['x'], point['z'] - footprint_point['z']) for point in
+                                rect for footprint_point in footprint]))
+
+
+def calc_free_space(footprint: List[Dict[str, float]], other_rects: Sequence[List[Dict[str, float]]],
+                    constraints: Sequence[DistanceConstraint] = ()) -> BaseGeometry:
+    """Return the region of positions where the footprint (at the origin) is inside the room, does not touch any of the
+    other rectangles, and meets the constraints. Positions are limited to the range of geometry.random_position."""
+    min_x = min(point['x'] for point in footprint)
+    max_x = max(point['x'] for point in footprint)
+    min_z = min(point['z'] for point in footprint)
+    max_z = max(point['z'] for point in footprint)
+    bounds = (max(geometry.ROOM_DIMENSIONS[0][0] - min_x, geometry.MIN_PERFORMER_POSITION),
+              max(geometry.ROOM_DIMENSIONS[1][0] - min_z, geometry.MIN_PERFORMER_POSITION),
+              min(geometry.ROOM_DIMENSIONS[0][1] - max_x, geometry.MAX_PERFORMER_POSITION),
+              min(geometry.ROOM_DIMENSIONS[1][1] - max_z, geometry.MAX_PERFORMER_POSITION))
+    if bounds[0] >= bounds[2] or bounds[1] >= bounds[3]:
+        # The footprint is too big for the room.
+        return Polygon()
+    region = box(*bounds)
+    for constraint in constraints:
+        constraint_region = constraint.get_region()
+        if constraint_region is not None:
+            region = region.intersection(constraint_region)
+    if len(other_rects) > 0:
+        region = region.difference(unary_union([dilate_rect(rect, footprint) for rect in other_rects]))
+    return region
+
+
+class FreeSpaceSampler:
+    """Samples points uniformly from a region: chooses one of its polygons by area, and then random points in the bounds
+    of that polygon, a batch at a time, until one is inside it."""
+
+    def __init__(self, region: BaseGeometry):
+        self._polygons = [polygon for polygon in getattr(region, 'geoms', [region]) if
+                          polygon.geom_type == 'Polygon' and polygon.area > 0]
+        self._areas = [polygon.area for polygon in self._polygons]
+
+    def is_empty(self) -> bool:
+        return len(self._polygons) == 0
+
+    def sample(self) -> Optional[Tuple[float, float]]:
+        """Return a random (x, z) point in the region, or None if it is empty (or too thin to hit)."""
+        if self.is_empty():
+            return None
+        polygon = random.choices(self._polygons, self._areas)[0]
+        min_x, min_z, max_x, max_z = polygon.bounds
+        for _ in range(MAX_SAMPLE_BATCHES):
+            x_array = numpy.array([random.uniform(min_x, max_x) for _ in range(SAMPLE_BATCH_SIZE)])
+            z_array = numpy.array([random.uniform(min_z, max_z) for _ in range(SAMPLE_BATCH_SIZE)])
+            inside = numpy.flatnonzero(contains(polygon, x_array, z_array))
+            if len(inside) > 0:
+                return x_array[inside[0]], z_array[inside[0]]
+        return None
+
+
+def place_object(performer_position: Dict[str, float], other_rects: List[List[Dict[str, float]]],
+                 obj_def: Dict[str, Any], constraints: Sequence[DistanceConstraint] = (),
+                 rotations: Sequence[float] = geometry.VALID_ROTATIONS) -> Optional[Dict[str, Any]]:
+    """Like geometry.calc_obj_pos, but return None as soon as the object cannot fit at any of the rotations, rather than
+    after MAX_TRIES random positions. First try a few random positions (since most objects fit at once, and these are
+    cheaper to test than the free space is to compute), and then sample positions from the free space of the object at
+    each rotation (in random order) until one fits. The object never touches the performer and meets all the
+    constraints."""
+    performer_rect = get_performer_rect(performer_position)
+    rect_index = geometry.get_rect_index(other_rects)
+
+    def try_position(rotation: float, new_x: float, new_z: float) -> Optional[Dict[str, Any]]:
+        rect = get_footprint(obj_def, rotation, new_x, new_z)
+        if geometry.rect_within_room(rect) and all(constraint.is_met(new_x, new_z) for constraint in constraints) and \
+                not sat_entry(rect, performer_rect) and not rect_index.collides(rect):
+            other_rects.append(rect)
+            return create_location(obj_def, rotation, new_x, new_z, rect)
+        return None
+
+    for _ in range(QUICK_TRIES):
+        location = try_position(random.choice(rotations), geometry.random_position(), geometry.random_position())
+        if location is not None:
+            return location
+
+    tried_footprints = set()
+    for rotation in random.sample(list(rotations), len(rotations)):
+        footprint = get_footprint(obj_def, rotation)
+        # Skip a rotation with the same footprint as one that did not fit, like 180 degrees from it.
+        footprint_key = tuple(sorted((round(point['x'], 6), round(point['z'], 6)) for point in footprint))
+        if footprint_key in tried_footprints:
+            continue
+        tried_footprints.add(footprint_key)
+        sampler = FreeSpaceSampler(calc_free_space(footprint, list(other_rects) + [performer_rect], constraints))
+        for _ in range(MAX_SAMPLES if not sampler.is_empty() else 0):
+            point = sampler.sample()
+            if point is None:
+                break
+            # Rounding may have moved the position just off the free space, so test it exactly.
+            location = try_position(rotation, round(point[0], geometry.POSITION_DIGITS),
+                                    round(point[1], geometry.POSITION_DIGITS))
+            if location is not None:
+                return location
+
+    logging.debug(f'could not place object: {obj_def}')
+    return None
@@ -0,0 +1,90 @@
+import random
+
+from shapely.geometry import Point, box
+
+import geometry
+from free_space import DistanceConstraint, FreeSpaceSampler, calc_free_space, convex_hull, dilate_rect, \
+    get_footprint, place_object
+from separating_axis_theorem import sat_entry
+
+OBJECT_DEF = {'dimensions': {'x': 1.0, 'y': 1.0, 'z': 0.5}, 'position_y': 0.5}
+
+
+def test_convex_hull():
+    assert convex_hull([(0, 0), (1, 1), (2, 0), (1, 0.5), (2, 2), (0, 2)]) == [(0, 0), (2, 0), (2, 2), (0, 2)]
+    assert convex_hull([(0, 0), (1, 1)]) == [(0, 0), (1, 1)]
+
+
+def test_dilate_rect():
+    random.seed(5)
+    rect = geometry.calc_obj_coords(1, 1, 0.5, 0.25, 0, 0, 45)
+    footprint = get_footprint(OBJECT_DEF, 90)
+    dilated = dilate_rect(rect, footprint)
+    for _ in range(200):
+        x = random.uniform(-1, 3)
+        z = random.uniform(-1, 3)
+        if dilated.exterior.distance(Point(x, z)) > 1e-6:
+            assert dilated.contains(Point(x, z)) == sat_entry(get_footprint(OBJECT_DEF, 90, x, z), rect)
+
+
+def test_calc_free_space():
+    region = calc_free_space(get_footprint(OBJECT_DEF, 0), [])
+    assert region.bounds == (geometry.ROOM_DIMENSIONS[0][0] + 0.5, geometry.ROOM_DIMENSIONS[1][0] + 0.25,
+                             geometry.ROOM_DIMENSIONS[0][1] - 0.5, geometry.ROOM_DIMENSIONS[1][1] - 0.25)
+    other_rect = geometry.calc_obj_coords(0, 0, 1, 1, 0, 0, 0)
+    region = calc_free_space(get_footprint(OBJECT_DEF, 0), [other_rect])
+    assert not region.contains(Point(0, 0))
+    assert not region.contains(Point(1.4, 0))
+    assert region.contains(Point(1.6, 0))
+
+    constraint = DistanceConstraint({'x': 0, 'z': 0}, 2, 3)
+    region = calc_free_space(get_footprint(OBJECT_DEF, 0), [], [constraint])
+    assert region.contains(Point(2.5, 0))
+    assert not region.contains(Point(1.9, 0))
+    assert not region.contains(Point(0, 3.1))
+    assert not calc_free_space(get_footprint({'dimensions': {'x': 10, 'z': 1}}, 0), []).area > 0
+
+
+def test_distance_constraint():
+    constraint = DistanceConstraint({'x': 1, 'y': 0, 'z': 1}, 2)
+    assert constraint.is_met(3, 1)
+    assert not constraint.is_met(2, 2)
+    assert constraint.get_region().contains(Point(-3, -3))
+    assert not constraint.get_region().contains(Point(2, 2))
+    assert DistanceConstraint({'x': 0, 'z': 0}).get_region() is None
+
+
+def test_free_space_sampler():
+    random.seed(6)
+    region = box(0, 0, 4, 4).difference(box(1, 1, 3, 3))
+    sampler = FreeSpaceSampler(region)
+    points = [sampler.sample() for _ in range(400)]
+    assert all(region.contains(Point(point)) for point in points)
+    # Uniform over the region: the left strip is a quarter of it.
+    assert 60 < len([point for point in points if point[0] < 1]) < 140
+    assert FreeSpaceSampler(box(0, 0, 0, 0)).sample() is None
+
+
+def test_place_object():
+    random.seed(7)
+    performer_position = {'x': 0, 'y': 0, 'z': 0}
+    rects = geometry.BoundingRects()
+    constraint = DistanceConstraint(performer_position, 2)
+    locations = [place_object(performer_position, rects, OBJECT_DEF, [constraint]) for _ in range(30)]
+    assert all(location is not None for location in locations)
+    assert rects == [location['bounding_box'] for location in locations]
+    for i, rect in enumerate(rects):
+        assert geometry.rect_within_room(rect)
+        assert not any(sat_entry(rect, other_rect) for other_rect in rects[:i])
+    for location in locations:
+        assert constraint.is_met(location['position']['x'], location['position']['z'])
+        assert location['position']['y'] == 0.5
+        assert location['rotation']['y'] in geometry.VALID_ROTATIONS
+
+
+def test_place_object_fails_fast():
+    performer_position = {'x': 0, 'y': 0, 'z': 0}
+    rects = [geometry.calc_obj_coords(0, 0, 5, 5, 0, 0, 0)]
+    assert place_object(performer_position, rects, OBJECT_DEF) is None
+    assert len(rects) == 1
+    assert place_object(performer_position, [], OBJECT_DEF, [DistanceConstraint(performer_position, 20)]) is None
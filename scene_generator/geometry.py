@@ -1,8 +1,11 @@
 import logging
 import math
 import random
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
 
+import numpy
+
+import vectorized_sat
 from separating_axis_theorem import sat_entry
 
 MAX_TRIES = 100
@@ -11,10 +14,19 @@ PERFORMER_HALF_WIDTH = PERFORMER_WIDTH / 2.0
 # the following mins and maxes are inclusive
 MIN_PERFORMER_POSITION = -4.8 + PERFORMER_HALF_WIDTH
 MAX_PERFORMER_POSITION = 4.8 - PERFORMER_HALF_WIDTH
+# How far inside the room's walls the performer's (and any random) position must be.
+ROOM_WALL_MARGIN = 0.15
 POSITION_DIGITS = 2
 VALID_ROTATIONS = (0, 45, 90, 135, 180, 225, 270, 315)
 
 ROOM_DIMENSIONS = ((-4.95, 4.95), (-4.95, 4.95))
+# The width (and depth) of the usual square room, and the smallest one set_room_size allows.
+DEFAULT_ROOM_SIZE = 9.9
+MIN_ROOM_SIZE = 1.0
+# The width of each cell of the RectIndex grid over the room.
+GRID_CELL_SIZE = 1.0
+# The fewest rectangles that RectIndex.collisions tests at once with vectorized_sat, which costs more for just a few.
+MIN_VECTORIZED_RECTS = 8
 
 MINIMUM_START_DIST_FROM_TARGET = 2
 MINIMUM_TARGET_SEPARATION = 2
@@ -39,6 +51,22 @@ ORIGIN_LOCATION = {
 }
 
 
+def set_room_size(room_size: float) -> None:
+    """Resize the square room (centered on the origin) for every scene generated later in this process: both
+    ROOM_DIMENSIONS and the range of random_position."""
+    global ROOM_DIMENSIONS, MIN_PERFORMER_POSITION, MAX_PERFORMER_POSITION
+    if room_size < MIN_ROOM_SIZE:
+        raise ValueError(f'room size too small: {room_size}')
+    half_size = room_size / 2.0
+    ROOM_DIMENSIONS = ((-half_size, half_size), (-half_size, half_size))
+    MIN_PERFORMER_POSITION = -(half_size - ROOM_WALL_MARGIN) + PERFORMER_HALF_WIDTH
+    MAX_PERFORMER_POSITION = (half_size - ROOM_WALL_MARGIN) - PERFORMER_HALF_WIDTH
+
+
+def get_room_size() -> float:
+    return ROOM_DIMENSIONS[0][1] - ROOM_DIMENSIONS[0][0]
+
+
 def random_position() -> float:
     return round(random.uniform(MIN_PERFORMER_POSITION, MAX_PERFORMER_POSITION), POSITION_DIGITS)
 
@@ -100,6 +128,130 @@ def rect_within_room(rect: List[Dict[str, float]]) -> bool:
     return all(point_within_room(point) for point in rect)
 
 
+def rect_bounds(rect: List[Dict[str, float]]) -> Tuple[float, float, float, float]:
+    """Return the axis-aligned bounds (min x, min z, max x, max z) of the passed rectangle."""
+    x_list = [point['x'] for point in rect]
+    z_list = [point['z'] for point in rect]
+    return min(x_list), min(z_list), max(x_list), max(z_list)
+
+
+class RectIndex:
+    """A broad-phase index of bounding rectangles for collision tests: a uniform grid over the room that holds each
+    rectangle in every cell its axis-aligned bounds overlap, so a new rectangle only runs the exact separating axis test
+    against the rectangles near it rather than against every one. Rectangles outside the room are held in the cells on
+    its edges."""
+
+    def __init__(self, rects: Iterable[List[Dict[str, float]]] = (), cell_size: float = GRID_CELL_SIZE):
+        self._cell_size = cell_size
+        self._column_count = math.ceil((ROOM_DIMENSIONS[0][1] - ROOM_DIMENSIONS[0][0]) / cell_size)
+        self._row_count = math.ceil((ROOM_DIMENSIONS[1][1] - ROOM_DIMENSIONS[1][0]) / cell_size)
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self.rects: List[List[Dict[str, float]]] = []
+        self._bounds: List[Tuple[float, float, float, float]] = []
+        # The vertices of each rectangle for vectorized_sat, with room for more rectangles after them.
+        self._vertex_array = numpy.zeros((16, 4, 2))
+        for rect in rects:
+            self.add(rect)
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def _cell_range(self, bounds: Tuple[float, float, float, float]) -> Tuple[range, range]:
+        def cell(value: float, minimum: float, count: int) -> int:
+            return min(max(math.floor((value - minimum) / self._cell_size), 0), count - 1)
+        return (range(cell(bounds[0], ROOM_DIMENSIONS[0][0], self._column_count),
+                      cell(bounds[2], ROOM_DIMENSIONS[0][0], self._column_count) + 1),
+                range(cell(bounds[1], ROOM_DIMENSIONS[1][0], self._row_count),
+                      cell(bounds[3], ROOM_DIMENSIONS[1][0], self._row_count) + 1))
+
+    def add(self, rect: List[Dict[str, float]]) -> None:
+        bounds = rect_bounds(rect)
+        rect_id = len(self.rects)
+        self.rects.append(rect)
+        self._bounds.append(bounds)
+        if rect_id == len(self._vertex_array):
+            self._vertex_array = numpy.concatenate([self._vertex_array, numpy.zeros(self._vertex_array.shape)])
+        self._vertex_array[rect_id] = vectorized_sat.rects_to_array([rect])[0]
+        columns, rows = self._cell_range(bounds)
+        for column in columns:
+            for row in rows:
+                self._cells.setdefault((column, row), []).append(rect_id)
+
+    def nearby(self, rect: List[Dict[str, float]]) -> List[List[Dict[str, float]]]:
+        """Return the rectangles whose axis-aligned bounds overlap (or touch) those of the passed rectangle, in the
+        order they were added. Any rectangle that collides with the passed rectangle is one of them."""
+        bounds = rect_bounds(rect)
+        columns, rows = self._cell_range(bounds)
+        rect_ids = set()
+        for column in columns:
+            for row in rows:
+                rect_ids.update(self._cells.get((column, row), ()))
+        return [self.rects[rect_id] for rect_id in sorted(rect_ids) if
+                self._bounds[rect_id][0] <= bounds[2] and bounds[0] <= self._bounds[rect_id][2] and
+                self._bounds[rect_id][1] <= bounds[3] and bounds[1] <= self._bounds[rect_id][3]]
+
+    def collides(self, rect: List[Dict[str, float]]) -> bool:
+        """Return True iff the passed rectangle collides with any rectangle in the index."""
+        return any(sat_entry(rect, other_rect) for other_rect in self.nearby(rect))
+
+    def collisions(self, rects: List[List[Dict[str, float]]],
+                   extra_rects: List[List[Dict[str, float]]] = ()) -> List[bool]:
+        """Return whether each of the passed rectangles collides with any rectangle in the index or in extra_rects. A
+        few rectangles are each tested against the nearby rectangles in the grid, and more are tested against every
+        rectangle at once with vectorized_sat, with the same results."""
+        if len(rects) < MIN_VECTORIZED_RECTS:
+            return [self.collides(rect) or any(sat_entry(rect, other_rect) for other_rect in extra_rects)
+                    for rect in rects]
+        candidates = vectorized_sat.rects_to_array(rects)
+        collisions = vectorized_sat.sat_many_to_many(candidates, self._vertex_array[:len(self.rects)]).any(axis=1)
+        if len(extra_rects) > 0:
+            collisions |= vectorized_sat.sat_many_to_many(candidates,
+                                                          vectorized_sat.rects_to_array(extra_rects)).any(axis=1)
+        return collisions.tolist()
+
+
+class BoundingRects(list):
+    """A list of the bounding rectangles in a scene that keeps a RectIndex of them. Rectangles appended to the list are
+    added to the index on the next call to get_index (the index is rebuilt if the list changed in any other way), so
+    the list can be used anywhere a plain list of rectangles is."""
+
+    def __init__(self, rects: Iterable[List[Dict[str, float]]] = ()):
+        super(BoundingRects, self).__init__(rects)
+        self._index = RectIndex()
+
+    def copy(self) -> 'BoundingRects':
+        return BoundingRects(self)
+
+    def get_index(self) -> RectIndex:
+        indexed_count = len(self._index)
+        if indexed_count > len(self) or (indexed_count > 0 and self._index.rects[-1] is not self[indexed_count - 1]):
+            self._index = RectIndex()
+            indexed_count = 0
+        for rect in self[indexed_count:]:
+            self._index.add(rect)
+        return self._index
+
+
+def get_rect_index(rects: List[List[Dict[str, float]]]) -> RectIndex:
+    """Return the RectIndex of the passed BoundingRects, or a new one of any other list of rectangles."""
+    if isinstance(rects, BoundingRects):
+        return rects.get_index()
+    return RectIndex(rects)
+
+
+def candidate_batch_sizes(max_tries: int) -> Iterator[int]:
+    """Yield the number of random candidates to test at once in each try to place something, up to max_tries in all:
+    the first candidate alone (since it usually fits), and then twice as many each time, so a crowded room takes a few
+    vectorized collision tests rather than one test for each candidate."""
+    tries = 0
+    batch_size = 1
+    while tries < max_tries:
+        size = min(batch_size, max_tries - tries)
+        yield size
+        tries += size
+        batch_size *= 2
+
+
 def calc_obj_pos(performer_position: Dict[str, float],
                  other_rects: List[List[Dict[str, float]]],
                  obj_def: Dict[str, Any],
@@ -133,27 +285,31 @@ object in the frame, None otherwise."""
     ]
     logging.debug(f'performer_rect = {performer_rect}')
 
-    tries = 0
-    collision_rects = other_rects + [performer_rect]
-    while tries < MAX_TRIES:
-        rotation = rotation_func()
-        new_x = x_func()
-        new_z = z_func()
-
-        rect = calc_obj_coords(new_x, new_z, dx, dz, offset_x, offset_z, rotation)
-        if rect_within_room(rect) and \
-           (len(other_rects) == 0 or not any(sat_entry(rect, other_rect) for other_rect in collision_rects)):
-            break
-        tries += 1
-
-    if tries < MAX_TRIES:
-        new_object = {
-            'rotation': {'x': 0, 'y': rotation, 'z': 0},
-            'position':  {'x': new_x, 'y': obj_def['position_y'], 'z': new_z},
-            'bounding_box': rect
-            }
-        other_rects.append(rect)
-        return new_object
+    rect_index = get_rect_index(other_rects)
+    for batch_size in candidate_batch_sizes(MAX_TRIES):
+        candidates = []
+        for _ in range(batch_size):
+            rotation = rotation_func()
+            new_x = x_func()
+            new_z = z_func()
+            rect = calc_obj_coords(new_x, new_z, dx, dz, offset_x, offset_z, rotation)
+            if rect_within_room(rect):
+                candidates.append((rotation, new_x, new_z, rect))
+        if len(candidates) == 0:
+            continue
+        if len(other_rects) == 0:
+            collisions = [False] * len(candidates)
+        else:
+            collisions = rect_index.collisions([candidate[3] for candidate in candidates], [performer_rect])
+        for (rotation, new_x, new_z, rect), collides in zip(candidates, collisions):
+            if not collides:
+                new_object = {
+                    'rotation': {'x': 0, 'y': rotation, 'z': 0},
+                    'position':  {'x': new_x, 'y': obj_def['position_y'], 'z': new_z},
+                    'bounding_box': rect
+                    }
+                other_rects.append(rect)
+                return new_object
 
     logging.debug(f'could not place object: {obj_def}')
     return None
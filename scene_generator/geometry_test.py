@@ -318,3 +318,66 @@ def test__object_collision():
     assert not sat_entry(r1, r3)
 
 
+
+
+def test_rect_index_matches_every_rect():
+    random.seed(2)
+    rects = [calc_obj_coords(random.uniform(-6, 6), random.uniform(-6, 6), random.uniform(0.05, 1.5),
+                             random.uniform(0.05, 1.5), 0, 0, random.choice(VALID_ROTATIONS)) for _ in range(60)]
+    index = RectIndex(rects[:40])
+    for rect in rects[40:]:
+        colliding = [other for other in rects[:40] if sat_entry(rect, other)]
+        nearby = index.nearby(rect)
+        assert all(other in nearby for other in colliding)
+        assert index.collides(rect) == (len(colliding) > 0)
+
+
+def test_bounding_rects_keeps_index():
+    a = calc_obj_coords(0, 0, 0.5, 0.5, 0, 0, 0)
+    b = calc_obj_coords(3, 3, 0.5, 0.5, 0, 0, 0)
+    rects = BoundingRects([a])
+    assert rects.get_index().nearby(a) == [a]
+    rects.append(b)
+    assert rects.get_index().nearby(b) == [b]
+    assert len(rects.get_index()) == 2
+
+    rects_copy = rects.copy()
+    assert isinstance(rects_copy, BoundingRects)
+    rects_copy[1] = a
+    assert rects_copy.get_index().nearby(b) == []
+    assert rects.get_index().nearby(b) == [b]
+    assert get_rect_index([a, b]).nearby(b) == [b]
+
+
+def test_candidate_batch_sizes():
+    assert list(candidate_batch_sizes(100)) == [1, 2, 4, 8, 16, 32, 37]
+    assert list(candidate_batch_sizes(1)) == [1]
+
+
+def test_rect_index_collisions():
+    random.seed(3)
+    rects = [calc_obj_coords(random.uniform(-4, 4), random.uniform(-4, 4), random.uniform(0.05, 1),
+                             random.uniform(0.05, 1), 0, 0, random.choice(VALID_ROTATIONS)) for _ in range(80)]
+    index = RectIndex(rects[:50])
+    performer_rect = calc_obj_coords(0, 0, 0.05, 0.05, 0, 0, 0)
+    expected = [index.collides(rect) or sat_entry(rect, performer_rect) for rect in rects[50:]]
+    assert index.collisions(rects[50:], [performer_rect]) == expected
+    assert index.collisions(rects[50:53], [performer_rect]) == expected[:3]
+
+
+def test_set_room_size():
+    try:
+        set_room_size(20)
+        assert geometry.ROOM_DIMENSIONS == ((-10, 10), (-10, 10))
+        assert geometry.get_room_size() == 20
+        assert geometry.MIN_PERFORMER_POSITION == pytest.approx(-9.8)
+        assert geometry.MAX_PERFORMER_POSITION == pytest.approx(9.8)
+        assert point_within_room({'x': 9.9, 'y': 0, 'z': -9.9})
+        assert all(-9.8 <= random_position() <= 9.8 for _ in range(100))
+        with pytest.raises(ValueError):
+            set_room_size(0.5)
+    finally:
+        set_room_size(DEFAULT_ROOM_SIZE)
+    assert geometry.ROOM_DIMENSIONS == ((-4.95, 4.95), (-4.95, 4.95))
+    assert geometry.MIN_PERFORMER_POSITION == -4.8 + PERFORMER_HALF_WIDTH
+    assert geometry.MAX_PERFORMER_POSITION == 4.8 - PERFORMER_HALF_WIDTH
@@ -1,12 +1,12 @@
 import logging
-import uuid
 from abc import ABC, abstractmethod
 import random
-from typing import Dict, Any, Tuple, List, Optional
+from typing import Dict, Any, Tuple, List, NamedTuple, Optional
 
+import free_space
 import geometry
-import objects
-import separating_axis_theorem
+import grid_layout
+import object_catalog
 import util
 
 MAX_TRIES = 20
@@ -19,6 +19,30 @@ MAX_OBJECTS = 5
 MIN_RANDOM_INTERVAL = 0.05
 WALL_COUNTS = [0, 1, 2, 3]
 WALL_PROBS = [60, 20, 10, 10]
+# The fewest objects that add_objects spreads over the room with a grid_layout.JitteredGrid.
+MIN_GRID_LAYOUT_OBJECTS = 20
+
+
+class SceneScale(NamedTuple):
+    """The size of the scenes that goals generate: the width (and depth) of the square room, and how many objects
+    (including the goal's objects) and walls each scene has, or None for the usual random number."""
+    room_size: float = geometry.DEFAULT_ROOM_SIZE
+    object_count: Optional[int] = None
+    wall_count: Optional[int] = None
+
+
+_scene_scale = SceneScale()
+
+
+def set_scene_scale(scene_scale: SceneScale) -> None:
+    """Use the given scale for every scene generated later in this process."""
+    global _scene_scale
+    geometry.set_room_size(scene_scale.room_size)
+    _scene_scale = scene_scale
+
+
+def get_scene_scale() -> SceneScale:
+    return _scene_scale
 
 
 def generate_wall(wall_mat_choice: str, performer_position: Dict[str, float],
@@ -26,43 +50,52 @@ def generate_wall(wall_mat_choice: str, performer_position: Dict[str, float],
     # Wanted to reuse written functions, but this is a bit more of a special snowflake
     # Generates obstacle walls placed in the scene.
 
-    tries = 0
-    while tries < MAX_TRIES:
-        rotation = random.choice((0, 90, 180, 270))
-        new_x = geometry.random_position()
-        new_z = geometry.random_position()
-        new_x_size = round(random.uniform(MIN_WALL_WIDTH, MAX_WALL_WIDTH), geometry.POSITION_DIGITS)
-        rect = geometry.calc_obj_coords(new_x, new_z, new_x_size, WALL_DEPTH, 0, 0, rotation)
-        if not geometry.collision(rect, performer_position) and \
-                all(geometry.point_within_room(point) for point in rect) and \
-                (len(other_rects) == 0 or not any(
-                    separating_axis_theorem.sat_entry(rect, other_rect) for other_rect in other_rects)):
-            break
-        tries += 1
-
-    if tries < MAX_TRIES:
-        new_object = {
-            'id': 'wall_' + str(uuid.uuid4()),
-            'materials': [wall_mat_choice],
-            'type': 'cube',
-            'kinematic': 'true',
-            'structure': 'true',
-            'mass': 100
-        }
-        shows_object = {
-            'stepBegin': 0,
-            'scale': {'x': new_x_size, 'y': WALL_HEIGHT, 'z': WALL_DEPTH},
-            'rotation': {'x': 0, 'y': rotation, 'z': 0},
-            'position': {'x': new_x, 'y': WALL_Y_POS, 'z': new_z},
-            'bounding_box': rect
-        }
-        shows = [shows_object]
-        new_object['shows'] = shows
-
-        return new_object
+    rect_index = geometry.get_rect_index(other_rects)
+    for batch_size in geometry.candidate_batch_sizes(MAX_TRIES):
+        candidates = []
+        for _ in range(batch_size):
+            rotation = random.choice((0, 90, 180, 270))
+            new_x = geometry.random_position()
+            new_z = geometry.random_position()
+            new_x_size = round(random.uniform(MIN_WALL_WIDTH, MAX_WALL_WIDTH), geometry.POSITION_DIGITS)
+            rect = geometry.calc_obj_coords(new_x, new_z, new_x_size, WALL_DEPTH, 0, 0, rotation)
+            if not geometry.collision(rect, performer_position) and \
+                    all(geometry.point_within_room(point) for point in rect):
+                candidates.append((rotation, new_x, new_z, new_x_size, rect))
+        if len(candidates) == 0:
+            continue
+        if len(other_rects) == 0:
+            collisions = [False] * len(candidates)
+        else:
+            collisions = rect_index.collisions([candidate[4] for candidate in candidates])
+        for (rotation, new_x, new_z, new_x_size, rect), collides in zip(candidates, collisions):
+            if not collides:
+                return create_wall(wall_mat_choice, rotation, new_x, new_z, new_x_size, rect)
     return None
 
 
+def create_wall(wall_mat_choice: str, rotation: float, new_x: float, new_z: float, new_x_size: float,
+                rect: List[Dict[str, float]]) -> Dict[str, Any]:
+    new_object = {
+        'id': 'wall_' + util.random_uuid(),
+        'materials': [wall_mat_choice],
+        'type': 'cube',
+        'kinematic': 'true',
+        'structure': 'true',
+        'mass': 100
+    }
+    shows_object = {
+        'stepBegin': 0,
+        'scale': {'x': new_x_size, 'y': WALL_HEIGHT, 'z': WALL_DEPTH},
+        'rotation': {'x': 0, 'y': rotation, 'z': 0},
+        'position': {'x': new_x, 'y': WALL_Y_POS, 'z': new_z},
+        'bounding_box': rect
+    }
+    shows = [shows_object]
+    new_object['shows'] = shows
+    return new_object
+
+
 class Goal(ABC):
     """An abstract Goal. Subclasses must implement compute_objects and
     get_config. Users of a goal object should normally only need to call 
@@ -105,9 +138,11 @@ class Goal(ABC):
         return self._performer_start
 
     def choose_object_def(self) -> Dict[str, Any]:
-        """Pick one object definition (to be added to the scene) and return a copy of it."""
-        object_def_list = random.choices([objects.OBJECTS_PICKUPABLE, objects.OBJECTS_MOVEABLE,
-                                          objects.OBJECTS_IMMOBILE],
+        """Pick one object definition (to be added to the scene) and return one of its variants (which is shared, so do
+        not change it)."""
+        catalog = object_catalog.get_catalog()
+        object_def_list = random.choices([catalog.get_definitions('pickupable'), catalog.get_definitions('moveable'),
+                                          catalog.get_definitions('immobile')],
                                          [50, 25, 25])[0]
         return util.finalize_object_definition(random.choice(object_def_list))
 
@@ -120,12 +155,18 @@ class Goal(ABC):
 
     def add_objects(self, object_list: List[Dict[str, Any]], rectangles: List[List[Dict[str, float]]],
                     performer_position: Dict[str, float]) -> None:
-        """Add random objects to fill object_list to some random number of objects up to MAX_OBJECTS. If object_list
-        already has more than this randomly determined number, no new objects are added."""
-        object_count = random.randint(1, MAX_OBJECTS)
+        """Add random objects to fill object_list to the object count of the scene scale, or else to some random number
+        of objects up to MAX_OBJECTS. If object_list already has more than this number, no new objects are added. Many
+        objects are spread over the room with a jittered grid."""
+        object_count = _scene_scale.object_count
+        if object_count is None:
+            object_count = random.randint(1, MAX_OBJECTS)
+        layout = free_space
+        if object_count - len(object_list) >= MIN_GRID_LAYOUT_OBJECTS:
+            layout = grid_layout.JitteredGrid(object_count - len(object_list))
         for i in range(len(object_list), object_count):
             object_def = self.choose_object_def()
-            obj_location = geometry.calc_obj_pos(performer_position, rectangles, object_def)
+            obj_location = layout.place_object(performer_position, rectangles, object_def)
             obj_info = object_def['info'][-1]
             targets_info = [tgt['info'][-1] for tgt in self._targets]
             if obj_info not in targets_info and obj_location is not None:
@@ -136,7 +177,7 @@ class Goal(ABC):
         info_set = set(goal.get('info_list', []))
         for obj in all_objects:
             info_set |= frozenset(obj.get('info', []))
-        goal['info_list'] = list(info_set)
+        goal['info_list'] = sorted(info_set)
 
     def get_config(self, goal_objects: List[Dict[str, Any]], all_objects: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Get the goal configuration. goal_objects is the objects required for the goal (as returned from
@@ -145,7 +186,9 @@ class Goal(ABC):
 
     def generate_walls(self, material: str, performer_position: Dict[str, Any],
                        bounding_rects: List[List[Dict[str, float]]]) -> List[Dict[str, Any]]:
-        wall_count = random.choices(WALL_COUNTS, weights=WALL_PROBS, k=1)[0]
+        wall_count = _scene_scale.wall_count
+        if wall_count is None:
+            wall_count = random.choices(WALL_COUNTS, weights=WALL_PROBS, k=1)[0]
 
         walls = []
         for x in range(0, wall_count):
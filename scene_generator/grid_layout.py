@@ -0,0 +1,102 @@
+"""
+Spreads many objects over the room in a jittered grid: splits the room into a grid with somewhat more cells than
+objects, and places each object at a random position and rotation that keeps its bounding rectangle inside a random free
+cell. Objects in different cells never touch, so almost every object fits at its first try, and each try is one test
+against the nearby rectangles of the RectIndex. So a scene with many objects takes time linear in their count, whereas
+rejection sampling over the whole room takes more tries (and free_space more work) for each object as the room fills.
+"""
+import collections
+import math
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import free_space
+import geometry
+from separating_axis_theorem import sat_entry
+
+# How many cells the grid has for each object, so some are left for objects that do not fit in the first cell they try.
+CELLS_PER_OBJECT = 1.5
+# How many cells to try for each object before falling back to free_space.place_object.
+CELL_TRIES = 3
+# The gap between the objects in neighboring cells.
+CELL_GAP = 0.02
+
+
+class JitteredGrid:
+    """A grid over the room for placing the given number of objects, each in its own cell."""
+
+    def __init__(self, object_count: int):
+        (min_x, max_x), (min_z, max_z) = geometry.ROOM_DIMENSIONS
+        cell_count = max(1, math.ceil(object_count * CELLS_PER_OBJECT))
+        cell_size = math.sqrt((max_x - min_x) * (max_z - min_z) / cell_count)
+        column_count = math.ceil((max_x - min_x) / cell_size)
+        row_count = math.ceil((max_z - min_z) / cell_size)
+        self._cell_width = (max_x - min_x) / column_count
+        self._cell_depth = (max_z - min_z) / row_count
+        self._origin = (min_x, min_z)
+        cells = [(column, row) for row in range(row_count) for column in range(column_count)]
+        random.shuffle(cells)
+        self._cells = collections.deque(cells)
+
+    def __len__(self) -> int:
+        """Return how many cells are free."""
+        return len(self._cells)
+
+    def get_cell_bounds(self, cell: Tuple[int, int]) -> Tuple[float, float, float, float]:
+        """Return the bounds (min x, min z, max x, max z) within which an object in the cell must be."""
+        half_gap = CELL_GAP / 2.0
+        min_x = self._origin[0] + cell[0] * self._cell_width
+        min_z = self._origin[1] + cell[1] * self._cell_depth
+        return (min_x + half_gap, min_z + half_gap, min_x + self._cell_width - half_gap,
+                min_z + self._cell_depth - half_gap)
+
+    def place_object(self, performer_position: Dict[str, float], other_rects: List[List[Dict[str, float]]],
+                     obj_def: Dict[str, Any], rotations: Sequence[float] = geometry.VALID_ROTATIONS) -> \
+            Optional[Dict[str, Any]]:
+        """Like free_space.place_object: place the object in a free cell if it fits in one at any of the rotations (and
+        does not touch the performer or the other rectangles, like walls or the goal's objects), taking the cell, or
+        otherwise anywhere in the room that it fits. Append its rectangle to other_rects and return its location, or
+        return None if it does not fit."""
+        # Only the rotations at which the object fits in a cell, with the bounds of the footprint at each.
+        footprints = []
+        for rotation in rotations:
+            footprint = free_space.get_footprint(obj_def, rotation)
+            bounds = geometry.rect_bounds(footprint)
+            if bounds[2] - bounds[0] < self._cell_width - CELL_GAP and bounds[3] - bounds[1] < \
+                    self._cell_depth - CELL_GAP:
+                footprints.append((rotation, bounds))
+
+        if len(footprints) > 0:
+            performer_rect = free_space.get_performer_rect(performer_position)
+            rect_index = geometry.get_rect_index(other_rects)
+            for _ in range(min(CELL_TRIES, len(self._cells))):
+                cell = self._cells.popleft()
+                location = self._place_in_cell(cell, obj_def, random.choice(footprints), performer_rect, rect_index)
+                if location is not None:
+                    other_rects.append(location['bounding_box'])
+                    return location
+                # Something else is in the way, but a smaller object may still fit in the cell later.
+                self._cells.append(cell)
+
+        return free_space.place_object(performer_position, other_rects, obj_def, rotations=rotations)
+
+    def _place_in_cell(self, cell: Tuple[int, int], obj_def: Dict[str, Any],
+                       footprint: Tuple[float, Tuple[float, float, float, float]],
+                       performer_rect: List[Dict[str, float]], rect_index: geometry.RectIndex) -> \
+            Optional[Dict[str, Any]]:
+        rotation, footprint_bounds = footprint
+        cell_bounds = self.get_cell_bounds(cell)
+        # Keep the rounded position (which may move by half a digit) in the cell and in the range of random_position.
+        rounding = 0.5 * 10 ** -geometry.POSITION_DIGITS
+        min_x = max(cell_bounds[0] - footprint_bounds[0] + rounding, geometry.MIN_PERFORMER_POSITION)
+        min_z = max(cell_bounds[1] - footprint_bounds[1] + rounding, geometry.MIN_PERFORMER_POSITION)
+        max_x = min(cell_bounds[2] - footprint_bounds[2] - rounding, geometry.MAX_PERFORMER_POSITION)
+        max_z = min(cell_bounds[3] - footprint_bounds[3] - rounding, geometry.MAX_PERFORMER_POSITION)
+        if min_x > max_x or min_z > max_z:
+            return None
+        new_x = round(random.uniform(min_x, max_x), geometry.POSITION_DIGITS)
+        new_z = round(random.uniform(min_z, max_z), geometry.POSITION_DIGITS)
+        rect = free_space.get_footprint(obj_def, rotation, new_x, new_z)
+        if not geometry.rect_within_room(rect) or sat_entry(rect, performer_rect) or rect_index.collides(rect):
+            return None
+        return free_space.create_location(obj_def, rotation, new_x, new_z, rect)
@@ -0,0 +1,53 @@
+import random
+
+import geometry
+from grid_layout import JitteredGrid
+from separating_axis_theorem import sat_entry
+
+OBJECT_DEF = {'dimensions': {'x': 0.4, 'y': 0.4, 'z': 0.2}, 'position_y': 0.2}
+PERFORMER_POSITION = {'x': 0, 'y': 0, 'z': 0}
+
+
+def test_jittered_grid_places_objects_in_cells():
+    random.seed(3)
+    grid = JitteredGrid(100)
+    cell_count = len(grid)
+    assert cell_count >= 150
+    rects = geometry.BoundingRects()
+    for _ in range(100):
+        location = grid.place_object(PERFORMER_POSITION, rects, OBJECT_DEF)
+        assert location is not None
+        assert location['bounding_box'] is rects[-1]
+        assert geometry.rect_within_room(location['bounding_box'])
+    # Each object took its own cell.
+    assert len(grid) == cell_count - 100
+    for i, rect in enumerate(rects):
+        assert not any(sat_entry(rect, other_rect) for other_rect in rects[i + 1:])
+
+
+def test_jittered_grid_avoids_other_rects():
+    random.seed(4)
+    grid = JitteredGrid(40)
+    wall = geometry.calc_obj_coords(1, 1, 2, 0.1, 0, 0, 0)
+    rects = geometry.BoundingRects([wall])
+    for _ in range(40):
+        grid.place_object(PERFORMER_POSITION, rects, OBJECT_DEF)
+    assert len(rects) == 41
+    performer_rect = geometry.calc_obj_coords(0, 0, geometry.PERFORMER_HALF_WIDTH, geometry.PERFORMER_HALF_WIDTH, 0,
+                                              0, 0)
+    for rect in rects[1:]:
+        assert not sat_entry(rect, wall)
+        assert not sat_entry(rect, performer_rect)
+
+
+def test_jittered_grid_places_big_object_anywhere():
+    random.seed(5)
+    grid = JitteredGrid(100)
+    cell_count = len(grid)
+    big_def = {'dimensions': {'x': 3, 'y': 1, 'z': 2}, 'position_y': 0.5}
+    rects = []
+    location = grid.place_object(PERFORMER_POSITION, rects, big_def)
+    assert location is not None
+    assert rects == [location['bounding_box']]
+    # The object did not fit in any cell, so it did not take one.
+    assert len(grid) == cell_count
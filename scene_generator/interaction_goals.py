@@ -5,15 +5,16 @@ from enum import Enum
 import random
 
 import math
-from typing import Dict, Any, AnyStr, List, Tuple
+from typing import Dict, Any, AnyStr, List, Optional, Tuple
 
-from machine_common_sense.mcs_controller_ai2thor import MAX_MOVE_DISTANCE
+from machine_common_sense.mcs_constants import MAX_MOVE_DISTANCE
 
+import free_space
 import geometry
-import objects
+import object_catalog
 from geometry import POSITION_DIGITS
-from goal import GoalException, Goal
-from optimal_path import generatepath
+from goal import GoalException, Goal, get_scene_scale
+from optimal_path import Planner, create_path_planner
 from util import finalize_object_definition, instantiate_object
 
 
@@ -93,54 +94,76 @@ def parse_path_section(path_section: List[List[float]], current_heading: float)
     return actions, current_heading
 
 
-def get_navigation_actions(start_location: Dict[str, Any], goal_object: Dict[str, Any],
-                           all_objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Get the action sequence for going from performer start to the goal_object."""
-    performer = (start_location['position']['x'], start_location['position']['z'])
+def get_path_planner(all_objects: List[Dict[str, Any]]) -> Planner:
+    """Get the path planner of the scene (of the kind set by optimal_path.set_path_planner): each object is an obstacle
+    (with its ID as its key), unless it is inside another object."""
+    return create_path_planner({obj['id']: obj['shows'][0]['bounding_box'] for obj in all_objects
+                                if 'locationParent' not in obj})
+
+
+def get_holder(goal_object: Dict[str, Any], all_objects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Get the object to navigate to for the goal_object: its parent, if it is inside one, or else the object itself."""
     if 'locationParent' in goal_object:
         parent = next((obj for obj in all_objects if obj['id'] == goal_object['locationParent']), None)
         if parent is None:
             raise GoalException(f'object {goal_object["id"]} has parent {goal_object["locationParent"]} that does not exist')
-        goal_object = parent
-    goal = (goal_object['shows'][0]['position']['x'], goal_object['shows'][0]['position']['z'])
-    hole_rects = []
+        return parent
+    return goal_object
 
-    hole_rects.extend(object['shows'][0]['bounding_box'] for object
-                      in all_objects if object['id'] != goal_object['id']
-                      and 'locationParent' not in object)
-    path = generatepath(performer, goal, hole_rects)
-    if path is None:
-        raise GoalException(f'could not find path to target {goal_object["id"]}')
+
+def get_path_actions(path: List[Tuple[float, float]], current_heading: float) -> Tuple[List[Dict[str, Any]], float]:
+    """Compute the actions for following the whole path, starting with current_heading. Returns a tuple: (list of
+    actions, new heading)"""
     actions = []
-    current_heading = start_location['rotation']['y']
     for indx in range(len(path)-1):
         new_actions, current_heading = parse_path_section(path[indx:indx+2], current_heading)
         actions.extend(new_actions)
+    return actions, current_heading
+
+
+def get_navigation_actions(start_location: Dict[str, Any], goal_object: Dict[str, Any],
+                           all_objects: List[Dict[str, Any]],
+                           planner: Optional[Planner] = None) -> List[Dict[str, Any]]:
+    """Get the action sequence for going from performer start to the goal_object, using the planner of the scene (of
+    all_objects) if it is not None."""
+    return navigate(start_location, goal_object, all_objects, planner)[0]
+
 
-    return actions
+def navigate(start_location: Dict[str, Any], goal_object: Dict[str, Any], all_objects: List[Dict[str, Any]],
+             planner: Optional[Planner] = None) -> Tuple[List[Dict[str, Any]], float]:
+    """Like get_navigation_actions, but return a tuple: (list of actions, heading at the end of the path)"""
+    performer = (start_location['position']['x'], start_location['position']['z'])
+    goal_object = get_holder(goal_object, all_objects)
+    goal = (goal_object['shows'][0]['position']['x'], goal_object['shows'][0]['position']['z'])
+    if planner is None:
+        with get_path_planner([obj for obj in all_objects if obj['id'] != goal_object.get('id')]) as new_planner:
+            path = new_planner.find_path(performer, goal)
+    else:
+        path = planner.find_path(performer, goal, [goal_object.get('id')])
+    if path is None:
+        raise GoalException(f'could not find path to target {goal_object.get("id")}')
+    return get_path_actions(path, start_location['rotation']['y'])
 
 
 def move_to_container(target: Dict[str, Any], all_objects: List[Dict[str, Any]],
                       bounding_rects: List[List[Dict[str, float]]], performer_position: Dict[str, float]) -> bool:
     """Try to find a random container that target will fit in. If found, set the target's locationParent, and add
     container to all_objects (and bounding_rects). Return True iff the target was put in a container."""
-    shuffled_containers = objects.get_enclosed_containers().copy()
+    # Only the containers with an enclosed area that the target fits in.
+    shuffled_containers = object_catalog.get_catalog().get_containers(target['dimensions'])
     random.shuffle(shuffled_containers)
-    for container_def in shuffled_containers:
-        container_def = finalize_object_definition(container_def)
-        area_index = geometry.can_contain(container_def, target)
-        if area_index is not None:
-            # try to place the container before we accept it
-            container_location = geometry.calc_obj_pos(performer_position, bounding_rects, container_def)
-            if container_location is not None:
-                found_container = instantiate_object(container_def, container_location)
-                found_area = container_def['enclosed_areas'][area_index]
-                all_objects.append(found_container)
-                target['locationParent'] = found_container['id']
-                target['shows'][0]['position'] = found_area['position'].copy()
-                if 'rotation' not in target['shows'][0]:
-                    target['shows'][0]['rotation'] = geometry.ORIGIN.copy()
-                return True
+    for container_def, area_index in shuffled_containers:
+        # try to place the container before we accept it
+        container_location = free_space.place_object(performer_position, bounding_rects, container_def)
+        if container_location is not None:
+            found_container = instantiate_object(container_def, container_location)
+            found_area = container_def['enclosed_areas'][area_index]
+            all_objects.append(found_container)
+            target['locationParent'] = found_container['id']
+            target['shows'][0]['position'] = found_area['position'].copy()
+            if 'rotation' not in target['shows'][0]:
+                target['shows'][0]['rotation'] = geometry.ORIGIN.copy()
+            return True
     return False
 
 
@@ -152,19 +175,20 @@ class InteractionGoal(Goal, ABC):
 
     def __init__(self):
         super(InteractionGoal, self).__init__()
-        self._bounding_rects = []
+        self._bounding_rects = geometry.BoundingRects()
 
     def _set_performer_start(self) -> None:
         self._performer_start = self.compute_performer_start()
 
     def _set_target_def(self) -> None:
         """Chooses a pickupable object since most interaction goals require that."""
-        pickupable_defs = random.choice(objects.OBJECTS_PICKUPABLE_LISTS)
+        catalog = object_catalog.get_catalog()
+        pickupable_defs = random.choice([catalog.get_definitions(name) for name in object_catalog.PICKUPABLE_LISTS])
         self._target_def = finalize_object_definition(random.choice(pickupable_defs))
 
     def _set_target_location(self) -> None:
         performer_position = self._performer_start['position']
-        self._target_location = geometry.calc_obj_pos(performer_position, self._bounding_rects, self._target_def)
+        self._target_location = free_space.place_object(performer_position, self._bounding_rects, self._target_def)
         if self._target_location is None:
             raise GoalException(f'could not place target object (type={self._target_def["type"]})')
 
@@ -174,15 +198,19 @@ class InteractionGoal(Goal, ABC):
 
     def add_objects(self, all_objects: List[Dict[str, Any]], bounding_rects: List[List[Dict[str, float]]],
                     performer_position: Dict[str, float]) -> None:
-        """Maybe add a container and put the target inside it. If so, maybe put other objects in other objects, too."""
-        if random.random() <= self.TARGET_CONTAINED_CHANCE:
-            if move_to_container(self._target, all_objects, bounding_rects, performer_position):
-                # maybe do it with other objects, too
-                super(InteractionGoal, self).add_objects(all_objects, bounding_rects, performer_position)
-                for obj in all_objects:
-                    if obj != self._target and obj.get('pickupable', False) \
-                            and random.random() <= self.OBJECT_CONTAINED_CHANCE:
-                        move_to_container(obj, all_objects, bounding_rects, performer_position)
+        """Maybe add a container and put the target inside it. If so, add other objects, and maybe put them in other
+        objects, too. If the scene scale has an object count, add the other objects either way."""
+        if random.random() <= self.TARGET_CONTAINED_CHANCE and \
+                move_to_container(self._target, all_objects, bounding_rects, performer_position):
+            # maybe do it with other objects, too
+            super(InteractionGoal, self).add_objects(all_objects, bounding_rects, performer_position)
+            for obj in all_objects:
+                if obj != self._target and obj.get('pickupable', False) \
+                        and random.random() <= self.OBJECT_CONTAINED_CHANCE:
+                    move_to_container(obj, all_objects, bounding_rects, performer_position)
+        elif get_scene_scale().object_count is not None:
+            # The scene scale asks for its own number of objects, so add them anyway.
+            super(InteractionGoal, self).add_objects(all_objects, bounding_rects, performer_position)
 
     def compute_objects(self, wall_material_name: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[List[Dict[str, float]]]]:
         self._set_performer_start()
@@ -269,21 +297,17 @@ class TransferralGoal(InteractionGoal):
         super(TransferralGoal, self).__init__()
 
     def _set_goal_objects(self) -> None:
-        targets = objects.get_all_object_defs()
-        random.shuffle(targets)
-        target2_def = next((tgt for tgt in targets if 'stackTarget' in tgt.get('attributes', [])), None)
-        if target2_def is None:
+        stack_targets = object_catalog.get_catalog().get_variants_with_attribute('stackTarget')
+        if len(stack_targets) == 0:
             raise ValueError(f'No stack targets found for transferral goal')
+        target2_def = random.choice(stack_targets)
         # ensure the targets aren't too close together
-        while True:
-            new_bounding_rects = self._bounding_rects.copy()
-            target2_location = geometry.calc_obj_pos(self._performer_start['position'],
-                                                     new_bounding_rects, target2_def)
-            distance = geometry.position_distance(self._target['shows'][0]['position'],
-                                                  target2_location['position'])
-            if distance >= geometry.MINIMUM_TARGET_SEPARATION:
-                break
-        self._bounding_rects = new_bounding_rects
+        target2_location = free_space.place_object(self._performer_start['position'], self._bounding_rects,
+                                                   target2_def, [free_space.DistanceConstraint(
+                                                       self._target['shows'][0]['position'],
+                                                       geometry.MINIMUM_TARGET_SEPARATION)])
+        if target2_location is None:
+            raise GoalException(f'could not place second target object (type={target2_def["type"]})')
         target2 = instantiate_object(target2_def, target2_location)
         self._goal_objects = [target2]
 
@@ -330,35 +354,29 @@ class TransferralGoal(InteractionGoal):
 
     def find_optimal_path(self, goal_objects: List[Dict[str, Any]], all_objects: List[Dict[str, Any]]) -> \
             List[Dict[str, Any]]:
-        # Goal should be a singleton... I hope
-        actions = get_navigation_actions(self._performer_start, goal_objects[0], all_objects)
-        # TODO: look at the target object (future ticket)
-        actions.append({
-            'action': 'PickupObject',
-            'params': {
-                'objectId': goal_objects[0]['id']
-                }
-            })
-        hole_rects = []
-        hole_rects.extend(object['shows'][0]['bounding_box'] for object
-                          in all_objects if (object['id'] != goal_objects[0]['id']
-                                             and object['id'] != goal_objects[1]['id']
-                                             and 'locationParent' not in object))
-        if 'locationParent' in goal_objects[0]:
-            parent = next((obj for obj in all_objects if obj['id'] == goal_objects[0]['locationParent']))
-            target = (parent['shows'][0]['position']['x'], parent['shows'][0]['position']['z'])
-        else:
-            target = (goal_objects[0]['shows'][0]['position']['x'], goal_objects[0]['shows'][0]['position']['z'])
-        goal = (goal_objects[1]['shows'][0]['position']['x'], goal_objects[1]['shows'][0]['position']['z'])
-        logging.debug(f'TransferralGoal.f_o_p: target = {target}\tgoal = {goal}\tholes = {hole_rects}')
-        path = generatepath(target, goal, hole_rects)
+        holder = get_holder(goal_objects[0], all_objects)
+        with get_path_planner(all_objects) as planner:
+            # Both paths can use the graph without the target (or its parent) and the goal object, unless the first
+            # path would go through the goal object.
+            planner.prepare([holder['id'], goal_objects[1]['id']])
+            # Goal should be a singleton... I hope
+            actions, current_heading = navigate(self._performer_start, goal_objects[0], all_objects, planner)
+            # TODO: look at the target object (future ticket)
+            actions.append({
+                'action': 'PickupObject',
+                'params': {
+                    'objectId': goal_objects[0]['id']
+                    }
+                })
+            target = (holder['shows'][0]['position']['x'], holder['shows'][0]['position']['z'])
+            goal = (goal_objects[1]['shows'][0]['position']['x'], goal_objects[1]['shows'][0]['position']['z'])
+            logging.debug(f'TransferralGoal.f_o_p: target = {target}\tgoal = {goal}')
+            path = planner.find_path(target, goal, [holder['id'], goal_objects[1]['id']])
         if path is None:
             raise GoalException('could not find path from target object to goal')
         logging.debug(f'TransferralGoal.f_o_p: got path = {path}')
-        current_heading = self._performer_start['rotation']['y']
-        for indx in range(len(path)-1):
-            actions, current_heading = parse_path_section(path[indx:indx+2], current_heading)
-            actions.extend(actions)
+        path_actions, current_heading = get_path_actions(path, current_heading)
+        actions.extend(path_actions)
 
         # TODO: maybe look at receptacle part of the parent object (future ticket)
         actions.append({
@@ -390,15 +408,11 @@ class TraversalGoal(Goal):
         performer_start = self.compute_performer_start()
         performer_position = performer_start['position']
         # make sure the target is far enough away from the performer start
-        while True:
-            bounding_rects = []
-            target_location = geometry.calc_obj_pos(performer_position, bounding_rects, target_def)
-            if target_location is None:
-                raise GoalException('could not place target object')
-            distance = geometry.position_distance(performer_start['position'],
-                                                  target_location['position'])
-            if distance >= geometry.MINIMUM_START_DIST_FROM_TARGET:
-                break
+        bounding_rects = geometry.BoundingRects()
+        target_location = free_space.place_object(performer_position, bounding_rects, target_def, [
+            free_space.DistanceConstraint(performer_position, geometry.MINIMUM_START_DIST_FROM_TARGET)])
+        if target_location is None:
+            raise GoalException('could not place target object')
 
         target = instantiate_object(target_def, target_location)
         self._targets.append(target)
@@ -2,8 +2,9 @@ import logging
 import uuid
 
 import math
+import random
 import pytest
-from machine_common_sense.mcs_controller_ai2thor import MAX_MOVE_DISTANCE
+from machine_common_sense.mcs_constants import MAX_MOVE_DISTANCE
 
 import geometry
 import objects
@@ -269,3 +270,18 @@ def test_transferral_targets_not_close_to_each_other():
     distance = geometry.position_distance(target1['shows'][0]['position'],
                                           target2['shows'][0]['position'])
     assert distance >= geometry.MINIMUM_TARGET_SEPARATION
+
+
+def test_TransferralGoal_find_optimal_path():
+    random.seed(2)
+    goal_obj = TransferralGoal()
+    body = scene_generator.generate_body_template('transferral-path')
+    goal_obj.update_body(body, True)
+    actions = body['answer']['actions']
+    action_names = [action['action'] for action in actions]
+    assert action_names.count('PickupObject') == 1
+    assert action_names[-1] == 'PutObject'
+    pickup_index = action_names.index('PickupObject')
+    # Both the path to the target and the path from it to the goal object are kept.
+    assert 'MoveAhead' in action_names[:pickup_index]
+    assert 'MoveAhead' in action_names[pickup_index:]
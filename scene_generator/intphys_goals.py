@@ -8,6 +8,7 @@ from typing import Dict, Any, List, Iterable, Tuple, Optional
 import geometry
 import materials
 import math
+import object_catalog
 import objects
 import ramps
 from goal import MIN_RANDOM_INTERVAL, Goal, GoalException
@@ -261,9 +262,11 @@ class IntPhysGoal(Goal, ABC):
                                    earliest_action_start_step: int = EARLIEST_ACTION_START_STEP,
                                    valid_positions: Iterable = frozenset(Position),
                                    positions = None,
-                                   valid_defs: List[Dict[str, Any]] = objects.OBJECTS_INTPHYS) \
+                                   valid_defs: Optional[List[Dict[str, Any]]] = None) \
                                    -> List[Dict[str, Any]]:
-        """Get objects to move across the scene. Returns objects."""
+        """Get objects to move across the scene (from valid_defs, by default the intphys objects). Returns objects."""
+        if valid_defs is None:
+            valid_defs = object_catalog.get_catalog().get_definitions('intphys')
         num_objects = self._get_num_objects_moving_across()
         # The following x positions start outside the camera viewport
         # and ensure that objects with scale 1 don't collide with each
@@ -302,7 +305,8 @@ class IntPhysGoal(Goal, ABC):
         location_assignments = {}
         new_objects = []
         for i in range(num_objects):
-            location = random.choice(list(available_locations))
+            # Sort the set so the choice does not depend on its (hash-randomized) iteration order.
+            location = random.choice(sorted(available_locations, key=lambda position: position.value))
             available_locations.remove(location)
             for loc in exclusions[location]:
                 available_locations.discard(loc)
@@ -364,16 +368,18 @@ class IntPhysGoal(Goal, ABC):
             else:
                 stepBegin = random.randint(min_step_begin, max_step_begin)
             obj['shows'][0]['stepBegin'] = stepBegin
+            # The option (and its force) is the definition's, so override its values in a copy.
+            force = intphys_option['force'].copy()
             obj['forces'] = [{
                 'stepBegin': stepBegin,
                 'stepEnd': last_action_end_step,
-                'vector': intphys_option['force']
+                'vector': force
             }]
             if location in (IntPhysGoal.Position.RIGHT_FIRST_NEAR, IntPhysGoal.Position.RIGHT_LAST_NEAR, IntPhysGoal.Position.RIGHT_FIRST_FAR, IntPhysGoal.Position.RIGHT_LAST_FAR):
                 obj['forces'][0]['vector']['x'] *= -1
-            intphys_option['position_by_step'] = filtered_position_by_step
-            intphys_option['position_y'] = obj_def['position_y']
-            obj['intphys_option'] = intphys_option
+            obj['intphys_option'] = object_catalog.override(intphys_option, force=force,
+                                                            position_by_step=filtered_position_by_step,
+                                                            position_y=obj_def['position_y'])
             new_objects.append(obj)
             if positions is not None:
                 positions.append(location)
@@ -422,7 +428,7 @@ class IntPhysGoal(Goal, ABC):
                     'z': random.choice((IntPhysGoal.OBJECT_NEAR_Z, IntPhysGoal.OBJECT_FAR_Z))
                 }
             }
-            obj_def = random.choice(objects.OBJECTS_INTPHYS)
+            obj_def = random.choice(object_catalog.get_catalog().get_definitions('intphys'))
             obj = instantiate_object(obj_def, location)
             obj['shows'][0]['stepBegin'] = random.randint(IntPhysGoal.EARLIEST_ACTION_START_STEP,
                                                           IntPhysGoal.LATEST_ACTION_FALL_DOWN_START_STEP)
@@ -518,8 +524,9 @@ class GravityGoal(IntPhysGoal):
         self._scenery_count = random.choices((0, 1, 2, 3, 4, 5),
                                              (50, 10, 10, 10, 10, 10))[0]
         scenery_list = []
-        scenery_rects = []
-        scenery_defs = objects.OBJECTS_MOVEABLE + objects.OBJECTS_IMMOBILE
+        scenery_rects = geometry.BoundingRects()
+        catalog = object_catalog.get_catalog()
+        scenery_defs = catalog.get_definitions('moveable') + catalog.get_definitions('immobile')
         for i in range(self._scenery_count):
             location = None
             while location is None:
@@ -572,12 +579,10 @@ class GravityGoal(IntPhysGoal):
         positions = []
         # only want intphys_options where y == 0
         valid_defs = []
-        for obj_def in objects.OBJECTS_INTPHYS:
-            new_od = obj_def.copy()
+        for obj_def in object_catalog.get_catalog().get_definitions('intphys'):
             valid_intphys = [intphys for intphys in obj_def['intphys_options'] if intphys['y'] == 0]
             if len(valid_intphys) != 0:
-                new_od['intphys_options'] = valid_intphys
-                valid_defs.append(new_od)
+                valid_defs.append(object_catalog.override(obj_def, intphys_options=valid_intphys))
         self._last_step = IntPhysGoal.LAST_STEP_RAMP
         # Add a buffer to the ramp's last step to account for extra steps needed by objects moving up the ramps.
         objs = self._get_objects_moving_across(room_wall_material_name, self._last_step - IntPhysGoal.LAST_STEP_RAMP_BUFFER,
@@ -0,0 +1,201 @@
+"""
+The catalog of the object definitions of objects.py, compiled once (on first use) rather than copied and filtered each
+time an object is chosen. Each definition is resolved into its variants (the definition with each of its choices
+applied, as finalize_object_definition does), which are frozen so every scene shares them, and the variants of the
+objects of the interaction goals are indexed by attribute, type, material category, and enclosed area capacity.
+
+Objects made from the variants share their values (like their dimensions and scale) too, so code that needs to change
+one of those values must replace it with a changed copy (see override) rather than change it.
+"""
+import bisect
+import copy
+from typing import Any, Dict, Iterable, List, Tuple
+
+import objects
+
+# The lists of object definitions of objects.py, by name.
+PICKUPABLE_LISTS = ('pickupable_balls', 'pickupable_blocks', 'pickupable_toys', 'pickupable_misc')
+# The lists of the objects of the interaction goals (like objects.get_all_object_defs), which the catalog indexes.
+INDEXED_LISTS = PICKUPABLE_LISTS + ('moveable', 'immobile')
+
+
+class FrozenException(Exception):
+    """Raised on changing a frozen value. It is not a TypeError or a ValueError, which scene generation retries, so a
+    change that the catalog's users missed stops generation instead of failing every attempt."""
+
+    def __init__(self, message=''):
+        super(FrozenException, self).__init__(message)
+
+
+class FrozenDict(dict):
+    """A dict that cannot be changed. Its copies (by copy, copy.copy, or copy.deepcopy) are plain dicts."""
+
+    def _immutable(self, *args, **kwargs):
+        raise FrozenException(f'{type(self).__name__} cannot be changed; change a copy of it instead')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]:
+        return {copy.deepcopy(key, memo): copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class FrozenList(list):
+    """A list that cannot be changed. Its copies (by copy, copy.copy, copy.deepcopy, or slicing) are plain lists."""
+
+    def _immutable(self, *args, **kwargs):
+        raise FrozenException(f'{type(self).__name__} cannot be changed; change a copy of it instead')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = extend = insert = pop = remove = reverse = \
+        sort = _immutable
+
+    def __copy__(self) -> List[Any]:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Any]:
+        return [copy.deepcopy(item, memo) for item in self]
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Return a frozen copy of the value: its dicts and lists (at any depth) become FrozenDicts and FrozenLists."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def override(value: Dict[str, Any], **overrides: Any) -> Dict[str, Any]:
+    """Return a plain copy of the (maybe frozen) dict with the overrides. Its other values are still shared."""
+    copied = dict(value)
+    copied.update(overrides)
+    return copied
+
+
+def compile_variants(definition: Dict[str, Any]) -> Tuple[FrozenDict, ...]:
+    """Return the frozen variants of the definition: one for each of its choices, in order (or only itself, if it has
+    none). They share the values of the definition that their choices do not replace."""
+    frozen = freeze(definition)
+    if 'choose' not in frozen:
+        return frozen,
+    variants = []
+    for choice in frozen['choose']:
+        variant = dict(frozen)
+        variant.update(choice)
+        del variant['choose']
+        variants.append(FrozenDict(variant))
+    return tuple(variants)
+
+
+class ObjectCatalog:
+    """The object definitions of some named lists, compiled into their variants, with the variants of some of the lists
+    indexed."""
+
+    def __init__(self, definition_lists: Dict[str, List[Dict[str, Any]]], indexed_lists: Iterable[str] = ()):
+        # The variants of each definition (raw or frozen) and of each variant, by its id: (it, its variants). The
+        # catalog keeps all of them, so their ids stay theirs.
+        self._variants = {}
+        # The frozen definition of each raw definition, by its id.
+        self._frozen = {}
+        self._lists = {}
+        for name, definition_list in definition_lists.items():
+            for definition in definition_list:
+                if id(definition) not in self._frozen:
+                    frozen = freeze(definition)
+                    variants = compile_variants(frozen)
+                    self._frozen[id(definition)] = frozen
+                    self._variants[id(definition)] = (definition, variants)
+                    self._variants[id(frozen)] = (frozen, variants)
+                    for variant in variants:
+                        self._variants.setdefault(id(variant), (variant, (variant,)))
+            self._lists[name] = tuple(self._frozen[id(definition)] for definition in definition_list)
+
+        self._by_attribute = {}
+        self._by_type = {}
+        self._by_material_category = {}
+        # Each enclosed area of each variant, sorted by width: (x, y, z, order of the area, variant, index of the area).
+        self._areas = []
+        indexed = {}
+        for name in indexed_lists:
+            for definition in self._lists[name]:
+                for variant in self.get_variants(definition):
+                    indexed.setdefault(id(variant), variant)
+        for variant in indexed.values():
+            for attribute in variant.get('attributes', ()):
+                self._by_attribute.setdefault(attribute, []).append(variant)
+            self._by_type.setdefault(variant['type'], []).append(variant)
+            for category in variant.get('materialCategory', ()):
+                self._by_material_category.setdefault(category, []).append(variant)
+            for index, area in enumerate(variant.get('enclosed_areas', ())):
+                self._areas.append((area['dimensions']['x'], area['dimensions']['y'], area['dimensions']['z'],
+                                    len(self._areas), variant, index))
+        for index in (self._by_attribute, self._by_type, self._by_material_category):
+            for key in index:
+                index[key] = tuple(index[key])
+        self._areas.sort(key=lambda area: (area[0], area[3]))
+        self._area_widths = [area[0] for area in self._areas]
+
+    def get_definitions(self, list_name: str) -> Tuple[FrozenDict, ...]:
+        """Return the frozen definitions (before their choices are applied) of the list with the given name."""
+        return self._lists[list_name]
+
+    def get_variants(self, definition: Dict[str, Any]) -> Tuple[FrozenDict, ...]:
+        """Return the variants of the definition (which may be one of the catalog's definitions or variants, or any
+        other definition, which is compiled now)."""
+        entry = self._variants.get(id(definition), None)
+        if entry is not None and entry[0] is definition:
+            return entry[1]
+        return compile_variants(definition)
+
+    def get_variants_with_attribute(self, attribute: str) -> Tuple[FrozenDict, ...]:
+        """Return the indexed variants with the attribute (like 'pickupable', 'moveable', or 'stackTarget')."""
+        return self._by_attribute.get(attribute, ())
+
+    def get_variants_of_type(self, object_type: str) -> Tuple[FrozenDict, ...]:
+        return self._by_type.get(object_type, ())
+
+    def get_variants_of_material_category(self, category: str) -> Tuple[FrozenDict, ...]:
+        return self._by_material_category.get(category, ())
+
+    def get_containers(self, dimensions: Dict[str, float]) -> List[Tuple[FrozenDict, int]]:
+        """Return each indexed variant with an enclosed area that something of the given dimensions fits in (without
+        rotating it), with the index of the first such area, like geometry.can_contain."""
+        start = bisect.bisect_left(self._area_widths, dimensions['x'])
+        areas = sorted((area for area in self._areas[start:] if area[1] >= dimensions['y'] and
+                        area[2] >= dimensions['z']), key=lambda area: area[3])
+        containers = []
+        for _, _, _, _, variant, index in areas:
+            if len(containers) == 0 or containers[-1][0] is not variant:
+                containers.append((variant, index))
+        return containers
+
+
+_CATALOG = None
+
+
+def get_catalog() -> ObjectCatalog:
+    """Return the catalog of the object definitions of objects.py, compiling it the first time."""
+    global _CATALOG
+    if _CATALOG is None:
+        definition_lists = {
+            'pickupable_balls': objects.OBJECTS_PICKUPABLE_BALLS,
+            'pickupable_blocks': objects.OBJECTS_PICKUPABLE_BLOCKS,
+            'pickupable_toys': objects.OBJECTS_PICKUPABLE_TOYS,
+            'pickupable_misc': objects.OBJECTS_PICKUPABLE_MISC,
+            'pickupable': objects.OBJECTS_PICKUPABLE,
+            'moveable': objects.OBJECTS_MOVEABLE,
+            'immobile': objects.OBJECTS_IMMOBILE,
+            'intphys': objects.OBJECTS_INTPHYS
+        }
+        _CATALOG = ObjectCatalog(definition_lists, INDEXED_LISTS)
+    return _CATALOG
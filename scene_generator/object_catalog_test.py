@@ -0,0 +1,142 @@
+import copy
+import pickle
+import random
+
+import pytest
+
+import geometry
+import objects
+import object_catalog
+from object_catalog import FrozenDict, FrozenException, FrozenList, ObjectCatalog, compile_variants, freeze, override
+from util import finalize_object_definition
+
+
+def _container(object_type, *area_dimensions):
+    return {
+        'type': object_type,
+        'attributes': ['receptacle'],
+        'enclosed_areas': [{'dimensions': {'x': x, 'y': y, 'z': z}} for x, y, z in area_dimensions]
+    }
+
+
+def test_freeze():
+    value = {'a': [1, {'b': 2}], 'c': (3,)}
+    frozen = freeze(value)
+    assert frozen == {'a': [1, {'b': 2}], 'c': [3]}
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen['a'], FrozenList)
+    assert isinstance(frozen['a'][1], FrozenDict)
+    assert freeze(frozen) is frozen
+    with pytest.raises(FrozenException):
+        frozen['d'] = 4
+    with pytest.raises(FrozenException):
+        frozen['a'].append(4)
+    with pytest.raises(FrozenException):
+        frozen['a'][1].update({'b': 5})
+
+
+def test_frozen_copies_are_plain():
+    frozen = freeze({'a': [1, {'b': 2}]})
+    shallow = copy.copy(frozen)
+    deep = copy.deepcopy(frozen)
+    assert type(shallow) is dict
+    assert shallow['a'] is frozen['a']
+    assert type(deep) is dict
+    assert type(deep['a']) is list
+    assert type(deep['a'][1]) is dict
+    deep['a'][1]['b'] = 3
+    assert frozen['a'][1]['b'] == 2
+    assert type(frozen['a'][:]) is list
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+
+def test_override():
+    frozen = freeze({'a': {'b': 1}, 'c': 2})
+    overridden = override(frozen, c=3)
+    assert overridden == {'a': {'b': 1}, 'c': 3}
+    assert type(overridden) is dict
+    assert overridden['a'] is frozen['a']
+    assert frozen['c'] == 2
+
+
+def test_compile_variants():
+    definition = {'type': 'foo', 'mass': 1, 'choose': [{'mass': 2}, {'mass': 3, 'scale': 4}]}
+    variants = compile_variants(definition)
+    assert variants == ({'type': 'foo', 'mass': 2}, {'type': 'foo', 'mass': 3, 'scale': 4})
+    assert all(isinstance(variant, FrozenDict) for variant in variants)
+    assert 'choose' in definition
+    assert compile_variants({'type': 'foo'}) == ({'type': 'foo'},)
+
+
+def test_catalog_variants():
+    definition = {'type': 'foo', 'attributes': [], 'choose': [{'mass': 1}, {'mass': 2}]}
+    catalog = ObjectCatalog({'foo': [definition]})
+    frozen = catalog.get_definitions('foo')[0]
+    assert frozen == definition
+    variants = catalog.get_variants(definition)
+    assert catalog.get_variants(frozen) is variants
+    assert catalog.get_variants(variants[1]) == (variants[1],)
+    assert catalog.get_variants(variants[1])[0] is variants[1]
+    other = {'type': 'bar'}
+    assert catalog.get_variants(other) == (other,)
+
+
+def test_catalog_indexes():
+    pickupable = {'type': 'ball', 'attributes': ['pickupable'], 'materialCategory': ['plastic']}
+    target = {'type': 'table', 'attributes': ['stackTarget'], 'choose': [{'mass': 1}, {'mass': 2}]}
+    unindexed = {'type': 'other', 'attributes': ['pickupable']}
+    catalog = ObjectCatalog({'small': [pickupable], 'big': [target], 'other': [unindexed]}, ('small', 'big'))
+    assert catalog.get_variants_with_attribute('pickupable') == (pickupable,)
+    assert catalog.get_variants_with_attribute('stackTarget') == catalog.get_variants(target)
+    assert catalog.get_variants_with_attribute('missing') == ()
+    assert catalog.get_variants_of_type('table') == catalog.get_variants(target)
+    assert catalog.get_variants_of_type('other') == ()
+    assert catalog.get_variants_of_material_category('plastic') == (pickupable,)
+
+
+def test_catalog_get_containers():
+    small = _container('small', (0.2, 0.2, 0.2))
+    wide = _container('wide', (0.5, 0.1, 0.5), (0.4, 0.4, 0.4))
+    big = _container('big', (1, 1, 1))
+    catalog = ObjectCatalog({'containers': [small, wide, big]}, ('containers',))
+    assert [(variant['type'], index) for variant, index in catalog.get_containers({'x': 0.1, 'y': 0.1, 'z': 0.1})] \
+        == [('small', 0), ('wide', 0), ('big', 0)]
+    assert [(variant['type'], index) for variant, index in catalog.get_containers({'x': 0.3, 'y': 0.3, 'z': 0.3})] \
+        == [('wide', 1), ('big', 0)]
+    assert catalog.get_containers({'x': 2, 'y': 0.1, 'z': 0.1}) == []
+
+
+def test_get_containers_like_can_contain():
+    catalog = object_catalog.get_catalog()
+    for definition in catalog.get_definitions('pickupable'):
+        for variant in catalog.get_variants(definition):
+            containers = catalog.get_containers(variant['dimensions'])
+            expected = []
+            for name in object_catalog.INDEXED_LISTS:
+                for container_def in catalog.get_definitions(name):
+                    for container in catalog.get_variants(container_def):
+                        index = geometry.can_contain(container, variant)
+                        if index is not None and all(container is not found for found, _ in expected):
+                            expected.append((container, index))
+            assert len(containers) == len(expected)
+            assert all(any(container is other and index == other_index for other, other_index in expected)
+                       for container, index in containers)
+
+
+def test_get_catalog():
+    catalog = object_catalog.get_catalog()
+    assert object_catalog.get_catalog() is catalog
+    assert catalog.get_definitions('intphys') == tuple(objects.OBJECTS_INTPHYS)
+    assert catalog.get_definitions('pickupable') == tuple(objects.OBJECTS_PICKUPABLE)
+
+
+def test_finalize_object_definition_uses_catalog():
+    definition = objects.OBJECTS_PICKUPABLE_BALLS[0]
+    variants = object_catalog.get_catalog().get_variants(definition)
+    state = random.getstate()
+    expected = random.choice(definition['choose'])
+    random.setstate(state)
+    variant = finalize_object_definition(definition)
+    assert any(variant is other for other in variants)
+    assert all(variant[key] == value for key, value in expected.items())
+    assert finalize_object_definition(variant) is variant
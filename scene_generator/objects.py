@@ -1,7 +1,8 @@
 import copy
-import uuid
 from typing import Tuple, Dict, Any, List
 
+import util
+
 OBJECTS_PICKUPABLE_BALLS = [{
     "type": "sphere",
     "info": ["tiny", "ball"],
@@ -3895,7 +3896,7 @@ def create_occluder(wall_material: str, pole_material: str,
     WALL = 0
     POLE = 1
 
-    occluder_id = str(uuid.uuid4())
+    occluder_id = util.random_uuid()
     occluder[WALL]['id'] = occluder[WALL]['id'] + occluder_id
     occluder[POLE]['id'] = occluder[POLE]['id'] + occluder_id
 
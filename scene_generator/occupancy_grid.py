@@ -0,0 +1,261 @@
+"""
+Plans paths on an occupancy grid: rasterizes the obstacle rectangles of a scene, dilated by half the performer's width
+like optimal_path.PathPlanner does, into numpy arrays of square cells over the room. Each cell counts the obstacles on
+it, so excluding some obstacles from a query (like the objects at the ends of the path) only subtracts their cells.
+
+Each obstacle is rasterized twice:
+- conservatively, onto every cell it may touch, for A* paths (which are then smoothed into straight sections) that are
+  clear of the obstacles to the resolution of the grid, and
+- optimistically, onto only the cells it covers, for a reachability test: if the source and the target are not
+  connected through the cells that no obstacle covers, there is surely no path between them, so the exact (but much
+  slower to prepare) visibility graph is not needed to reject them.
+"""
+import heapq
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy
+
+import geometry
+from geometry import PERFORMER_WIDTH
+
+# The width of each cell of the grid.
+OCCUPANCY_CELL_SIZE = 0.1
+# The cost of a diagonal step between cells, relative to a step to a side.
+DIAGONAL_COST = math.sqrt(2)
+# How many points to test in each cell along a path section to find whether it is clear.
+LINE_OF_SIGHT_SAMPLES_PER_CELL = 4
+
+
+class OccupancyGrid:
+    """The occupancy grid of the obstacles of one scene: bounding rectangles, each with a key (like the ID of its
+    object). Has the same interface as optimal_path.PathPlanner."""
+
+    def __init__(self, obstacles: Dict[Hashable, List[Dict[str, float]]], agent_width: float = PERFORMER_WIDTH,
+                 cell_size: float = OCCUPANCY_CELL_SIZE):
+        self._dilation = agent_width / 2.0
+        self._cell_size = cell_size
+        # The grid covers the room less the dilation, like the boundary of optimal_path.PathPlanner.
+        (min_x, max_x), (min_z, max_z) = geometry.ROOM_DIMENSIONS
+        self._bounds = (min_x + self._dilation, min_z + self._dilation, max_x - self._dilation,
+                        max_z - self._dilation)
+        self._column_count = max(1, math.ceil((self._bounds[2] - self._bounds[0]) / cell_size))
+        self._row_count = max(1, math.ceil((self._bounds[3] - self._bounds[1]) / cell_size))
+        self._x_centers = self._bounds[0] + (numpy.arange(self._column_count) + 0.5) * cell_size
+        self._z_centers = self._bounds[1] + (numpy.arange(self._row_count) + 0.5) * cell_size
+
+        # A cell may touch an obstacle if its center is within half its diagonal of it, and is surely covered by an
+        # obstacle if its center is that far inside it.
+        half_diagonal = cell_size * math.sqrt(2) / 2.0
+        self._touched_counts = numpy.zeros((self._row_count, self._column_count), dtype=numpy.int32)
+        self._covered_counts = numpy.zeros((self._row_count, self._column_count), dtype=numpy.int32)
+        # The (rows, columns, touched, covered) of each obstacle, to subtract it when it is excluded.
+        self._cells = {}
+        # The dilated (center, axes, half sizes) of each obstacle, to find whether the ends of a path are inside it.
+        self._boxes = {}
+        for key, rect in obstacles.items():
+            self._boxes[key] = self._dilate(rect)
+            rows, columns, touched = self._rasterize(self._boxes[key], half_diagonal)
+            covered = self._rasterize(self._boxes[key], -half_diagonal, rows, columns)[2]
+            self._touched_counts[rows, columns] += touched
+            self._covered_counts[rows, columns] += covered
+            self._cells[key] = (rows, columns, touched, covered)
+        # The cells that extend past the boundary may not be clear.
+        self._touched_counts[:, -1] += (self._x_centers[-1] + cell_size / 2.0 > self._bounds[2])
+        self._touched_counts[-1, :] += (self._z_centers[-1] + cell_size / 2.0 > self._bounds[3])
+
+        # The free cells of each set of excluded keys: (clear, uncovered).
+        self._free_cells = {}
+
+    def __enter__(self) -> 'OccupancyGrid':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, exc_traceback: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._free_cells.clear()
+
+    def _dilate(self, rect: List[Dict[str, float]]) -> Tuple[numpy.ndarray, List[numpy.ndarray], List[float]]:
+        """Return the center, the two unit axes, and the half sizes along them of the dilated rectangle."""
+        points = numpy.array([(point['x'], point['z']) for point in rect], dtype=float)
+        center = points.mean(axis=0)
+        half_sizes = []
+        axes = []
+        for edge in (points[1] - points[0], points[3] - points[0]):
+            length = math.hypot(edge[0], edge[1])
+            half_sizes.append(length / 2.0 + self._dilation)
+            axes.append(edge / length if length > 0 else numpy.array([-edge[1], edge[0]]))
+        if axes[0][0] == 0 and axes[0][1] == 0:
+            axes[0] = numpy.array([axes[1][1], -axes[1][0]])
+        if axes[1][0] == 0 and axes[1][1] == 0:
+            axes[1] = numpy.array([-axes[0][1], axes[0][0]])
+        return center, axes, half_sizes
+
+    def _rasterize(self, box: Tuple[numpy.ndarray, List[numpy.ndarray], List[float]], margin: float,
+                   rows: Optional[slice] = None, columns: Optional[slice] = None) -> Tuple[slice, slice, numpy.ndarray]:
+        """Return the rows and columns of the grid around the dilated rectangle (grown by the margin), and whether the
+        center of each cell in them is inside it."""
+        center, axes, half_sizes = box
+        half_sizes = [max(half_size + margin, 0.0) for half_size in half_sizes]
+        if rows is None:
+            extent_x = half_sizes[0] * abs(axes[0][0]) + half_sizes[1] * abs(axes[1][0])
+            extent_z = half_sizes[0] * abs(axes[0][1]) + half_sizes[1] * abs(axes[1][1])
+            columns = slice(*self._get_index_range(center[0] - extent_x, center[0] + extent_x, self._bounds[0],
+                                                   self._column_count))
+            rows = slice(*self._get_index_range(center[1] - extent_z, center[1] + extent_z, self._bounds[1],
+                                                self._row_count))
+        x_offsets = self._x_centers[columns][numpy.newaxis, :] - center[0]
+        z_offsets = self._z_centers[rows][:, numpy.newaxis] - center[1]
+        inside = numpy.ones((len(z_offsets), x_offsets.shape[1]), dtype=bool)
+        for axis, half_size in zip(axes, half_sizes):
+            inside &= numpy.abs(x_offsets * axis[0] + z_offsets * axis[1]) <= half_size
+        return rows, columns, inside
+
+    def _get_index_range(self, low: float, high: float, origin: float, count: int) -> Tuple[int, int]:
+        start = min(max(int(math.floor((low - origin) / self._cell_size)), 0), count)
+        stop = min(max(int(math.floor((high - origin) / self._cell_size)) + 1, 0), count)
+        return start, max(start, stop)
+
+    def get_cell(self, x: float, z: float) -> Tuple[int, int]:
+        """Return the (row, column) of the cell of the position, or of the nearest cell if it is off the grid."""
+        column = min(max(int((x - self._bounds[0]) / self._cell_size), 0), self._column_count - 1)
+        row = min(max(int((z - self._bounds[1]) / self._cell_size), 0), self._row_count - 1)
+        return row, column
+
+    def prepare(self, excluded: Iterable[Hashable] = ()) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Return the cells that no obstacle without the excluded keys may touch, and that none of them covers, as two
+        boolean arrays."""
+        excluded = frozenset(key for key in excluded if key in self._cells)
+        if excluded not in self._free_cells:
+            touched_counts = self._touched_counts
+            covered_counts = self._covered_counts
+            if len(excluded) > 0:
+                touched_counts = touched_counts.copy()
+                covered_counts = covered_counts.copy()
+                for key in excluded:
+                    rows, columns, touched, covered = self._cells[key]
+                    touched_counts[rows, columns] -= touched
+                    covered_counts[rows, columns] -= covered
+            self._free_cells[excluded] = (touched_counts == 0, covered_counts == 0)
+        return self._free_cells[excluded]
+
+    def _is_blocked(self, loc: Tuple[float, float], excluded: Iterable[Hashable]) -> bool:
+        """Return whether the position is inside any of the dilated obstacles without the excluded keys, like
+        optimal_path._find_blocked_endpoint."""
+        for key, (center, axes, half_sizes) in self._boxes.items():
+            if key not in excluded and all(abs((loc[0] - center[0]) * axis[0] + (loc[1] - center[1]) * axis[1]) <
+                                           half_size for axis, half_size in zip(axes, half_sizes)):
+                return True
+        return False
+
+    def is_reachable(self, source_loc: Tuple[float, float], target_loc: Tuple[float, float],
+                     excluded: Iterable[Hashable] = ()) -> bool:
+        """Return False if there is surely no path from the source to the target around the obstacles without the
+        excluded keys: if their cells are not connected (even diagonally) through cells that none of the obstacles
+        covers."""
+        uncovered = self.prepare(excluded)[1]
+        source = self.get_cell(*source_loc)
+        target = self.get_cell(*target_loc)
+        if not uncovered[source] or not uncovered[target]:
+            return False
+        reached = numpy.zeros_like(uncovered)
+        reached[source] = True
+        reached_count = 1
+        # Grow the reached cells by one cell in every direction at a time until they reach the target or stop growing.
+        while not reached[target]:
+            grown = reached.copy()
+            grown[1:, :] |= reached[:-1, :]
+            grown[:-1, :] |= reached[1:, :]
+            spread = grown.copy()
+            grown[:, 1:] |= spread[:, :-1]
+            grown[:, :-1] |= spread[:, 1:]
+            grown &= uncovered
+            grown_count = numpy.count_nonzero(grown)
+            if grown_count == reached_count:
+                return False
+            reached = grown
+            reached_count = grown_count
+        return True
+
+    def find_path(self, source_loc: Tuple[float, float], target_loc: Tuple[float, float],
+                  excluded: Iterable[Hashable] = ()) -> Optional[List[Tuple[float, float]]]:
+        """Return a short path from the source to the target around the obstacles without the excluded keys, or None
+        if there is none on the grid (or the source or target is in one of them): the A* path through the clear cells
+        (the cells of the source and target are always clear), smoothed into as few straight sections as it can be."""
+        excluded = frozenset(excluded)
+        if self._is_blocked(source_loc, excluded) or self._is_blocked(target_loc, excluded):
+            return None
+        clear = self.prepare(excluded)[0]
+        source = self.get_cell(*source_loc)
+        target = self.get_cell(*target_loc)
+        if source == target:
+            return [source_loc, target_loc]
+
+        def is_clear(cell: Tuple[int, int]) -> bool:
+            return clear[cell] or cell == source or cell == target
+
+        def heuristic(cell: Tuple[int, int]) -> float:
+            # The octile distance, since steps go to the 8 neighboring cells.
+            row_distance = abs(cell[0] - target[0])
+            column_distance = abs(cell[1] - target[1])
+            return max(row_distance, column_distance) + (DIAGONAL_COST - 1) * min(row_distance, column_distance)
+
+        costs = {source: 0.0}
+        previous = {source: None}
+        open_cells = [(heuristic(source), 0.0, source)]
+        while len(open_cells) > 0:
+            _, cost, cell = heapq.heappop(open_cells)
+            if cell == target:
+                break
+            if cost > costs[cell]:
+                continue
+            for row_step in (-1, 0, 1):
+                for column_step in (-1, 0, 1):
+                    neighbor = (cell[0] + row_step, cell[1] + column_step)
+                    if (row_step == 0 and column_step == 0) or not 0 <= neighbor[0] < self._row_count or \
+                            not 0 <= neighbor[1] < self._column_count or not is_clear(neighbor):
+                        continue
+                    step_cost = 1.0
+                    if row_step != 0 and column_step != 0:
+                        # Do not cut the corner of a cell that is not clear.
+                        if not is_clear((cell[0] + row_step, cell[1])) or not is_clear((cell[0], cell[1] + column_step)):
+                            continue
+                        step_cost = DIAGONAL_COST
+                    neighbor_cost = cost + step_cost
+                    if neighbor_cost < costs.get(neighbor, math.inf):
+                        costs[neighbor] = neighbor_cost
+                        previous[neighbor] = cell
+                        heapq.heappush(open_cells, (neighbor_cost + heuristic(neighbor), neighbor_cost, neighbor))
+        if target not in previous:
+            return None
+
+        cells = [target]
+        while previous[cells[-1]] is not None:
+            cells.append(previous[cells[-1]])
+        points = [source_loc] + [(float(self._x_centers[cell[1]]), float(self._z_centers[cell[0]])) for cell in
+                                 reversed(cells[1:-1])] + [target_loc]
+        return self._smooth(points, is_clear)
+
+    def _smooth(self, points: List[Tuple[float, float]], is_clear: Any) -> List[Tuple[float, float]]:
+        """Return the path through the points, skipping each point that the path can go straight past."""
+        path = [points[0]]
+        index = 0
+        while index < len(points) - 1:
+            # Go to the farthest point in sight (the next point always is).
+            next_index = len(points) - 1
+            while next_index > index + 1 and not self._is_in_sight(points[index], points[next_index], is_clear):
+                next_index -= 1
+            path.append(points[next_index])
+            index = next_index
+        return path
+
+    def _is_in_sight(self, start: Tuple[float, float], end: Tuple[float, float], is_clear: Any) -> bool:
+        """Return whether every cell along the straight section from start to end is clear."""
+        distance = math.hypot(end[0] - start[0], end[1] - start[1])
+        sample_count = max(2, math.ceil(distance / self._cell_size * LINE_OF_SIGHT_SAMPLES_PER_CELL) + 1)
+        for fraction in numpy.linspace(0.0, 1.0, sample_count):
+            if not is_clear(self.get_cell(start[0] + (end[0] - start[0]) * fraction,
+                                          start[1] + (end[1] - start[1]) * fraction)):
+                return False
+        return True
@@ -0,0 +1,78 @@
+import math
+
+import optimal_path
+from geometry import PERFORMER_WIDTH
+from occupancy_grid import OccupancyGrid
+from optimal_path import PathPlanner, create_path_planner, set_path_planner
+
+
+def make_rect(x, z, half_width, half_depth=None):
+    half_depth = half_width if half_depth is None else half_depth
+    return [
+        {'x': x - half_width, 'z': z - half_depth},
+        {'x': x - half_width, 'z': z + half_depth},
+        {'x': x + half_width, 'z': z + half_depth},
+        {'x': x + half_width, 'z': z - half_depth}
+    ]
+
+
+def get_length(path):
+    return sum(math.dist(start, end) for start, end in zip(path, path[1:]))
+
+
+def test_occupancy_grid_find_path():
+    with OccupancyGrid({'middle': make_rect(1.5, 1.5, 0.5), 'end': make_rect(3, 3, 0.1)}) as grid:
+        assert grid.find_path((0, 0), (0.01, 0.01)) == [(0, 0), (0.01, 0.01)]
+        # An open path is smoothed into one straight section.
+        assert grid.find_path((0, 0), (3, 0)) == [(0, 0), (3, 0)]
+        path = grid.find_path((0, 0), (3, 3), ['end'])
+        assert path[0] == (0, 0) and path[-1] == (3, 3)
+        assert 3 <= len(path) <= 4
+        # A little longer than the shortest path, which goes past the corner of the dilated obstacle.
+        shortest = 2 * math.dist((0, 0), (2.05, 0.95))
+        assert shortest <= get_length(path) < shortest + 0.2
+        assert grid.find_path((0, 0), (3, 3), ['end', 'middle']) == [(0, 0), (3, 3)]
+
+
+def test_occupancy_grid_rejects_blocked_endpoints():
+    obstacles = {'box': make_rect(0, 0, 0.5)}
+    with OccupancyGrid(obstacles) as grid, PathPlanner(obstacles) as planner:
+        # Inside the box, and inside its dilation (but not in a cell that the dilated box covers).
+        for source in ((0, 0), (0.5 + PERFORMER_WIDTH / 2.0 - 0.01, 0)):
+            assert grid.find_path(source, (3, 3)) is None
+            assert grid.find_path((3, 3), source) is None
+            assert planner.find_path(source, (3, 3)) is None
+            assert grid.find_path(source, (3, 3), ['box']) is not None
+        assert grid.find_path((0.5 + PERFORMER_WIDTH / 2.0 + 0.01, 0), (3, 3)) is not None
+
+
+def test_occupancy_grid_is_reachable():
+    # A wall across the room, with a gap only in the second one.
+    walls = {'wall': make_rect(0, 0, 10, 0.2), 'split': make_rect(-2.5, 2, 2.5, 0.2), 'gap': make_rect(3, 2, 2, 0.2)}
+    with OccupancyGrid(walls) as grid:
+        assert grid.is_reachable((0, -3), (0, -1))
+        assert not grid.is_reachable((0, -3), (0, 3))
+        assert not grid.is_reachable((0, 0), (0, 3))
+        assert grid.is_reachable((0, -3), (0, 3), ['wall'])
+        assert grid.find_path((0, -3), (0, 3)) is None
+        path = grid.find_path((0, -3), (0, 3), ['wall'])
+        assert path is not None and path[0] == (0, -3) and path[-1] == (0, 3)
+
+
+def test_path_planner_rejects_unreachable_targets():
+    walls = {'wall': make_rect(0, 0, 10, 0.2)}
+    with PathPlanner(walls) as planner:
+        assert planner.find_path((0, -3), (0, 3)) is None
+        # The visibility graph is never prepared.
+        assert len(planner._environments) == 0
+        assert planner.find_path((0, -3), (0, 3), ['wall']) == [(0, -3), (0, 3)]
+
+
+def test_set_path_planner():
+    try:
+        assert isinstance(create_path_planner({}), PathPlanner)
+        set_path_planner('grid')
+        assert optimal_path.get_path_planner_name() == 'grid'
+        assert isinstance(create_path_planner({}), OccupancyGrid)
+    finally:
+        set_path_planner(optimal_path.DEFAULT_PATH_PLANNER)
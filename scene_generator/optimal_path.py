@@ -1,17 +1,33 @@
 import logging
 import traceback
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
-from shapely.geometry import Polygon, Point
+from shapely.geometry import JOIN_STYLE, LineString, Point, Polygon
+from shapely.geometry.polygon import orient
 from shapely.ops import unary_union
 
 from extremitypathfinder.extremitypathfinder import PolygonEnvironment as Environment
-from geometry import ROOM_DIMENSIONS, PERFORMER_WIDTH
+import geometry
+from geometry import PERFORMER_WIDTH
+from occupancy_grid import OccupancyGrid
 
-MIN_X = ROOM_DIMENSIONS[0][0]
-MAX_X = ROOM_DIMENSIONS[0][1]
-MIN_Z = ROOM_DIMENSIONS[1][0]
-MAX_Z = ROOM_DIMENSIONS[1][1]
+
+def _dilate_rect(rect: List[Dict[str, float]], dilation: float) -> Polygon:
+    """Grow the passed rectangle by dilation amount and return the resulting polygon. Mitred corners keep it a
+    rectangle (just outside the rounded one), so the visibility graph has only 4 vertices for it."""
+    return Polygon([(point['x'], point['z']) for point in rect]).buffer(dilation, join_style=JOIN_STYLE.mitre)
+
+
+def _find_blocked_endpoint(polygons: Iterable[Polygon], source: Point, target: Point) -> bool:
+    """Return True iff the source or target is in any of the passed polygons."""
+    for poly in polygons:
+        if poly.contains(source):
+            logging.debug(f'source is inside something: source={source}\tpoly={poly}')
+            return True
+        if poly.contains(target):
+            logging.debug(f'target is inside something: target={target}\tpoly={poly}')
+            return True
+    return False
 
 
 def _dilate_polygons(rects: List[List[Dict[str, float]]], dilation: float,
@@ -21,17 +37,9 @@ def _dilate_polygons(rects: List[List[Dict[str, float]]], dilation: float,
     polygons, or None if the source or target are in any of the new,
     dilated polygons.
     """
-    polygons = []
-    for rect in rects:
-        poly = Polygon([(point['x'], point['z']) for point in rect])
-        poly.buffer(dilation, resolution=4)
-        if poly.contains(source):
-            logging.debug(f'source is inside something: source={source}\tpoly={poly}')
-            return None
-        if poly.contains(target):
-            logging.debug(f'target is inside something: target={target}\tpoly={poly}')
-            return None
-        polygons.append(poly)
+    polygons = [_dilate_rect(rect, dilation) for rect in rects]
+    if _find_blocked_endpoint(polygons, source, target):
+        return None
     return polygons
 
 
@@ -42,9 +50,9 @@ def _unify_and_clean_polygons(polygons: List[Polygon]) \
     """
     unified_polygons = unary_union(polygons)
     # unary_union can return Polygon or MultiPolygon
-    if isinstance(unified_polygons, Polygon):
-        unified_polygons = [unified_polygons]
-    poly_coords = [list(poly.exterior.coords) for poly in unified_polygons]
+    unified_polygons = getattr(unified_polygons, 'geoms', [unified_polygons])
+    # The path finding algorithm needs the holes to be clockwise.
+    poly_coords = [list(orient(poly, sign=-1.0).exterior.coords) for poly in unified_polygons if not poly.is_empty]
     # The polygons we get back from unary_union can have the same
     # first and last point, which the shortest path algorithm doesn't
     # like.
@@ -58,6 +66,178 @@ def _unify_and_clean_polygons(polygons: List[Polygon]) \
     return poly_coords
 
 
+class PathPlanner:
+    """Finds shortest paths around the obstacles of one scene: bounding rectangles, each with a key (like the ID of its
+    object). Each query may exclude some of the obstacles (like the objects at the ends of the path, whose positions are
+    inside them). The obstacles are dilated once, and the visibility graph of the obstacles left by each set of excluded
+    keys is prepared once and reused by every later query.
+
+    A query also reuses the graph of a set that excludes more keys (call prepare with it first), if the path found with
+    it does not go through the obstacles that the query does not exclude: removing obstacles never makes a path longer,
+    so that path is also the shortest one with them.
+
+    Before it prepares a graph, a query tests whether the target is reachable at all on an occupancy grid of the same
+    obstacles, which takes much less time, so unreachable targets are rejected early."""
+
+    def __init__(self, obstacles: Dict[Hashable, List[Dict[str, float]]], agent_width: float = PERFORMER_WIDTH):
+        self._dilation = agent_width / 2.0
+        self._rects = obstacles
+        self._agent_width = agent_width
+        self._grid = None
+        self._polygons = {key: _dilate_rect(rect, self._dilation) for key, rect in obstacles.items()}
+        # Read the room's dimensions now, since geometry.set_room_size may have changed them.
+        (min_x, max_x), (min_z, max_z) = geometry.ROOM_DIMENSIONS
+        self._boundary_coordinates = [(max_x - self._dilation, max_z - self._dilation),
+                                      (min_x + self._dilation, max_z - self._dilation),
+                                      (min_x + self._dilation, min_z + self._dilation),
+                                      (max_x - self._dilation, min_z + self._dilation)]
+        # The prepared environment of each set of excluded keys, or None if it could not be prepared.
+        self._environments = {}
+
+    def __enter__(self) -> 'PathPlanner':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, exc_traceback: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Free the prepared environments."""
+        for environment in self._environments.values():
+            # Work around a bug in the DirectedHeuristicGraph class
+            # defined by older versions of the extremitypathfinder module.
+            # It causes the graph to keep growing across successive
+            # Environments. See
+            # https://github.com/MrMinimal64/extremitypathfinder/issues/10
+            if environment is not None and hasattr(environment.graph, 'all_nodes'):
+                environment.graph.all_nodes.clear()
+        self._environments.clear()
+        if self._grid is not None:
+            self._grid.close()
+
+    def _get_excluded(self, excluded: Iterable[Hashable]) -> frozenset:
+        """Return the set of excluded keys that are obstacles."""
+        return frozenset(key for key in excluded if key in self._polygons)
+
+    def _get_polygons(self, excluded: frozenset) -> List[Polygon]:
+        return [polygon for key, polygon in self._polygons.items() if key not in excluded]
+
+    def prepare(self, excluded: Iterable[Hashable] = ()) -> Optional[Environment]:
+        """Return the environment of the obstacles without the excluded keys, preparing it if it is new, or None if it
+        could not be prepared."""
+        excluded = self._get_excluded(excluded)
+        if excluded in self._environments:
+            return self._environments[excluded]
+        # they may intersect now, so unify any that do
+        poly_coords = _unify_and_clean_polygons(self._get_polygons(excluded))
+        environment = Environment()
+        try:
+            environment.store(self._boundary_coordinates, poly_coords, validate=True)
+            # Newer versions of extremitypathfinder prepare the graph when it is stored.
+            if not environment.prepared:
+                environment.prepare()
+        except Exception:
+            logging.warning('unexpected error in path finding')
+            traceback.print_exc()
+            logging.warning({
+                'boundary': self._boundary_coordinates,
+                'holes': poly_coords
+            })
+            environment = None
+        self._environments[excluded] = environment
+        return environment
+
+    def find_path(self, source_loc: Tuple[float, float], target_loc: Tuple[float, float],
+                  excluded: Iterable[Hashable] = ()) -> Optional[List[Tuple[float, float]]]:
+        """Return the shortest path from the source to the target around the obstacles without the excluded keys, or
+        None if there is none (or the source or target is in one of them)."""
+        excluded = self._get_excluded(excluded)
+        polygons = self._get_polygons(excluded)
+        if _find_blocked_endpoint(polygons, Point(*source_loc), Point(*target_loc)):
+            return None
+        if self._grid is None:
+            self._grid = OccupancyGrid(self._rects, self._agent_width)
+        if not self._grid.is_reachable(source_loc, target_loc, excluded):
+            logging.info('path finding failed (unreachable on the occupancy grid)')
+            return None
+
+        # Try the environment excluding the fewest other keys first, since its path is the likeliest to be valid.
+        supersets = sorted((other for other in self._environments if other > excluded and
+                            self._environments[other] is not None), key=len)
+        for other in supersets:
+            path = self._find_shortest_path(self._environments[other], source_loc, target_loc)
+            if path is None:
+                continue
+            # The path must stay out of (but may touch) the obstacles that this query does not exclude.
+            extra_polygons = unary_union([self._polygons[key] for key in other - excluded])
+            if not LineString(path).relate_pattern(extra_polygons, 'T********'):
+                logging.debug(f'reusing the path finding environment excluding {len(other)} obstacles')
+                return path
+
+        environment = self.prepare(excluded)
+        if environment is None:
+            return None
+        return self._find_shortest_path(environment, source_loc, target_loc)
+
+    def _find_shortest_path(self, environment: Environment, source_loc: Tuple[float, float],
+                            target_loc: Tuple[float, float]) -> Optional[List[Tuple[float, float]]]:
+        try:
+            path, length = environment.find_shortest_path(source_loc, target_loc)
+        except TypeError as e:
+            # We sometimes get "TypeError: unsupported operand type(s) for
+            # +: 'NoneType' and 'float'" and "'<' not supported between
+            # instances of 'generator' and 'generator'", but I don't know
+            # why.
+            logging.info(f'path finding failed (maybe impossible?): {e}')
+            return None
+        except Exception:
+            # We shouldn't get other exceptions from the path finder, but
+            # just in case...
+            logging.warning('unexpected error in path finding')
+            traceback.print_exc()
+            logObject = {
+                'boundary': self._boundary_coordinates,
+                'start': source_loc,
+                'target': target_loc
+            }
+            logging.warning(logObject)
+            return None
+        if len(path) == 0:
+            logging.info('path finding failed (impossible)')
+            return None
+        return [(float(point[0]), float(point[1])) for point in path]
+
+
+# The path planners that can be chosen with set_path_planner: the shortest paths of the visibility graph, or the A* paths
+# of an occupancy grid, which are a little longer and only clear to the resolution of the grid, but take much less time
+# to find around many obstacles.
+PATH_PLANNERS = {
+    'visibility': PathPlanner,
+    'grid': OccupancyGrid
+}
+DEFAULT_PATH_PLANNER = 'visibility'
+Planner = Union[PathPlanner, OccupancyGrid]
+
+_path_planner = DEFAULT_PATH_PLANNER
+
+
+def set_path_planner(name: str) -> None:
+    """Set which of the PATH_PLANNERS create_path_planner creates."""
+    if name not in PATH_PLANNERS:
+        raise ValueError(f'unknown path planner {name}, must be one of {", ".join(PATH_PLANNERS)}')
+    global _path_planner
+    _path_planner = name
+
+
+def get_path_planner_name() -> str:
+    return _path_planner
+
+
+def create_path_planner(obstacles: Dict[Hashable, List[Dict[str, float]]],
+                        agent_width: float = PERFORMER_WIDTH) -> Planner:
+    """Create a path planner of the kind set by set_path_planner for the obstacles."""
+    return PATH_PLANNERS[_path_planner](obstacles, agent_width)
+
+
 # passing the other_rects from my  calculations previously
 # This is the source for extremitypathfinder: https://github.com/MrMinimal64/extremitypathfinder
 # target_loc will probably contain the target- we'll see
@@ -67,47 +247,5 @@ def generatepath(source_loc: Tuple[float, float],
                  agent_width: float = PERFORMER_WIDTH) \
         -> Optional[List[Tuple[float, float]]]:
     """Boundary has to be CCW, Holes CW"""
-    # dilate all the polygons based on the agent width
-    dilation = agent_width / 2.0
-    polygons = _dilate_polygons(other_rects, dilation, Point(*source_loc), Point(*target_loc))
-    if polygons is None:
-        return None
-
-    # they may intersect now, so unify any that do
-    poly_coords = _unify_and_clean_polygons(polygons)
-
-    environment = Environment()
-    boundary_coordinates = [(MAX_X - dilation, MAX_Z - dilation),
-                            (MIN_X + dilation, MAX_Z - dilation),
-                            (MIN_X + dilation, MIN_Z + dilation),
-                            (MAX_X - dilation, MIN_Z + dilation)]
-    try:
-        environment.store(boundary_coordinates, poly_coords, validate=True)
-        environment.prepare()
-        path, length = environment.find_shortest_path(source_loc, target_loc)
-        # Work around a bug in the DirectedHeuristicGraph class
-        # defined by the extremitypathfinder module. It causes the
-        # graph to keep growing across successive Environments. See
-        # https://github.com/MrMinimal64/extremitypathfinder/issues/10
-        environment.graph.all_nodes.clear()
-    except TypeError as e:
-        # We sometimes get "TypeError: unsupported operand type(s) for
-        # +: 'NoneType' and 'float'" and "'<' not supported between
-        # instances of 'generator' and 'generator'", but I don't know
-        # why.
-        logging.info(f'path finding failed (maybe impossible?): {e}')
-        return None
-    except Exception:
-        # We shouldn't get other exceptions from the path finder, but
-        # just in case...
-        logging.warning('unexpected error in path finding')
-        traceback.print_exc()
-        logObject = {
-            'boundary': boundary_coordinates,
-            'holes': poly_coords,
-            'start': source_loc,
-            'target': target_loc
-        }
-        logging.warning(logObject)
-        return None
-    return path
+    with PathPlanner(dict(enumerate(other_rects)), agent_width) as planner:
+        return planner.find_path(source_loc, target_loc)
@@ -1,6 +1,15 @@
 from shapely.geometry import Point, Polygon
 
-from optimal_path import _dilate_polygons, _unify_and_clean_polygons
+from optimal_path import PathPlanner, _dilate_polygons, _unify_and_clean_polygons, generatepath
+
+
+def make_rect(x, z, half_width):
+    return [
+        {'x': x - half_width, 'z': z - half_width},
+        {'x': x - half_width, 'z': z + half_width},
+        {'x': x + half_width, 'z': z + half_width},
+        {'x': x + half_width, 'z': z - half_width}
+    ]
 
 
 def test__dilate_polygons():
@@ -18,6 +27,10 @@ def test__dilate_polygons():
     invalid = _dilate_polygons([rect], dilation, Point(0, 0), outside)
     assert invalid is None
 
+    # The rectangle really grows.
+    invalid = _dilate_polygons([rect], dilation, Point(1.25, 1.25), outside)
+    assert invalid is None
+
 
 def test__unify_and_clean_polygons():
     coords = [
@@ -27,3 +40,37 @@ def test__unify_and_clean_polygons():
     polygons = [Polygon(c) for c in coords]
     unified_coords = _unify_and_clean_polygons(polygons)
     assert len(unified_coords) == 1
+
+
+def test_generatepath():
+    rects = [make_rect(1.5, 1.5, 0.5)]
+    assert generatepath((0, 0), (0.1, 0.1), []) == [(0, 0), (0.1, 0.1)]
+    path = generatepath((0, 0), (3, 3), rects)
+    assert len(path) == 3
+    assert path[0] == (0, 0) and path[-1] == (3, 3)
+    assert generatepath((1.5, 1.5), (3, 3), rects) is None
+
+
+def test_path_planner_excludes_obstacles():
+    planner = PathPlanner({'middle': make_rect(1.5, 1.5, 0.5), 'end': make_rect(3, 3, 0.1)})
+    # The end of the path is inside an obstacle unless it is excluded.
+    assert planner.find_path((0, 0), (3, 3)) is None
+    assert len(planner.find_path((0, 0), (3, 3), ['end'])) == 3
+    assert planner.find_path((0, 0), (3, 3), ['end', 'middle']) == [(0, 0), (3, 3)]
+    # Keys that are not obstacles are ignored.
+    assert len(planner.find_path((0, 0), (3, 3), ['end', 'missing'])) == 3
+    planner.close()
+
+
+def test_path_planner_reuses_environments():
+    with PathPlanner({'middle': make_rect(1.5, 1.5, 0.5), 'end': make_rect(3, 3, 0.1)}) as planner:
+        environment = planner.prepare(['middle', 'end'])
+        assert environment is not None
+        assert planner.prepare(['end', 'middle']) is environment
+        # The straight path does not go near the excluded obstacle, so it is still the shortest path with it.
+        assert planner.find_path((0, 0), (3, 0), ['end']) == [(0, 0), (3, 0)]
+        assert planner.find_path((3, 0), (3, 3), ['end']) == [(3, 0), (3, 3)]
+        assert len(planner._environments) == 1
+        # This path would go through the obstacle, so the planner prepares the environment with it.
+        assert len(planner.find_path((0, 0), (3, 3), ['end'])) == 3
+        assert len(planner._environments) == 2
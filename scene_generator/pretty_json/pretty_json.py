@@ -1,6 +1,6 @@
-from _ctypes import PyObj_FromPtr
 import json
 import re
+from typing import Any, Dict, Optional, Sequence, TextIO, Tuple
 
 # From https://stackoverflow.com/questions/13249415/how-to-implement-custom-indentation-when-pretty-printing-with-the-json-module
 
@@ -11,33 +11,126 @@ class PrettyJsonNoIndent(object):
 
 class PrettyJsonEncoder(json.JSONEncoder):
     FORMAT_SPEC = '@@{}@@'
-    regex = re.compile(FORMAT_SPEC.format(r'(\d+)'))
+    regex = re.compile('"' + FORMAT_SPEC.format(r'(\d+)') + '"')
 
     def __init__(self, **kwargs):
         # Save copy of any keyword argument values needed for use here.
         self.__sort_keys = kwargs.get('sort_keys', None)
+        # The wrapped values by their ids, which stay the same while encode holds them.
+        self.__no_indent_values = {}
         super(PrettyJsonEncoder, self).__init__(**kwargs)
 
     def default(self, obj):
-        return (self.FORMAT_SPEC.format(id(obj)) if isinstance(obj, PrettyJsonNoIndent)
-                else super(PrettyJsonEncoder, self).default(obj))
+        if isinstance(obj, PrettyJsonNoIndent):
+            self.__no_indent_values[id(obj)] = obj
+            return self.FORMAT_SPEC.format(id(obj))
+        return super(PrettyJsonEncoder, self).default(obj)
 
     def encode(self, obj):
-        format_spec = self.FORMAT_SPEC  # Local var to expedite access.
         json_repr = super(PrettyJsonEncoder, self).encode(obj)  # Default JSON.
 
         # Replace any marked-up object ids in the JSON repr with the
         # value returned from the json.dumps() of the corresponding
-        # wrapped Python object.
-        for match in self.regex.finditer(json_repr):
-            # see https://stackoverflow.com/a/15012814/355230
-            id = int(match.group(1))
-            no_indent = PyObj_FromPtr(id)
-            json_obj_repr = json.dumps(no_indent.value, cls=PrettyJsonEncoder, sort_keys=self.__sort_keys, separators=(',', ':'))
-
-            # Replace the matched id string with json formatted representation
-            # of the corresponding Python object.
-            json_repr = json_repr.replace('"{}"'.format(format_spec.format(id)), json_obj_repr)
-
-        return json_repr
-        
+        # wrapped Python object, all in one pass.
+        def replace(match):
+            no_indent = self.__no_indent_values[int(match.group(1))]
+            return json.dumps(no_indent.value, cls=PrettyJsonEncoder, sort_keys=self.__sort_keys, separators=(',', ':'))
+
+        try:
+            return self.regex.sub(replace, json_repr)
+        finally:
+            self.__no_indent_values.clear()
+
+
+# The key of a pattern that matches every key of a dict, or every index of a list.
+ANY_KEY = '*'
+
+
+class PrettyJsonWriter(object):
+    """Writes JSON in the same layout as json.dumps(obj, cls=PrettyJsonEncoder, indent=indent) with the values at the
+    no_indent pattern wrapped in PrettyJsonNoIndent, without wrapping (or copying) them: streaming it straight to the
+    files in one pass over the object.
+
+    A pattern is a dict of the keys (or list indexes, or ANY_KEY) down to the values it matches, which map to True. Each
+    file may also have a pattern of the values to leave out of it, so files with more or fewer values (like the debug
+    file of a scene and the scene file itself) are written from the same pass. Values without indents are written
+    whole."""
+
+    def __init__(self, no_indent: Optional[Dict[Any, Any]] = None, indent: int = 2):
+        self._no_indent = no_indent
+        self._indent = ' ' * indent
+        self._indent_encoder = json.JSONEncoder(indent=indent)
+        self._compact_encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dump(self, obj: Any, outputs: Sequence[Tuple[TextIO, Optional[Dict[Any, Any]]]]) -> None:
+        """Write the object to each file of the outputs: (file, pattern of the values to leave out of it, or None)."""
+        self._write(obj, self._no_indent, [output[0].write for output in outputs], [output[1] for output in outputs],
+                    '\n')
+
+    def dumps(self, obj: Any, omit: Optional[Dict[Any, Any]] = None) -> str:
+        """Return the JSON of the object, without the values of the omit pattern."""
+        chunks = []
+        self._write(obj, self._no_indent, [chunks.append], [omit], '\n')
+        return ''.join(chunks)
+
+    def _write(self, value: Any, no_indent: Any, writes: list, omits: list, newline: str) -> None:
+        """Write the value to each file, leaving out the values of its omit pattern, where each new line starts with the
+        given newline (and indent)."""
+        if no_indent is True:
+            text = self._compact_encoder.encode(value)
+            for write in writes:
+                write(text)
+            return
+        if not isinstance(value, (dict, list, tuple)) or len(value) == 0:
+            # Indents only matter inside containers.
+            text = self._compact_encoder.encode(value)
+            for write in writes:
+                write(text)
+            return
+        if no_indent is None and all(omit is None for omit in omits):
+            # Nothing below is special, so write it like the json module does. Strings never hold a raw new line.
+            text = self._indent_encoder.encode(value)
+            if newline != '\n':
+                text = text.replace('\n', newline)
+            for write in writes:
+                write(text)
+            return
+
+        if isinstance(value, dict):
+            items = value.items()
+            start, end = '{', '}'
+        else:
+            items = enumerate(value)
+            start, end = '[', ']'
+        item_newline = newline + self._indent
+        # Whether each file has any item yet.
+        started = [False] * len(writes)
+        for key, item in items:
+            item_no_indent = self._get_child(no_indent, key)
+            item_writes = []
+            item_omits = []
+            for index, (write, omit) in enumerate(zip(writes, omits)):
+                item_omit = self._get_child(omit, key)
+                if item_omit is True:
+                    continue
+                write((',' if started[index] else start) + item_newline)
+                if end == '}':
+                    write(self._encode_key(key) + ': ')
+                started[index] = True
+                item_writes.append(write)
+                item_omits.append(item_omit)
+            if len(item_writes) > 0:
+                self._write(item, item_no_indent, item_writes, item_omits, item_newline)
+        for index, write in enumerate(writes):
+            write(newline + end if started[index] else start + end)
+
+    def _get_child(self, pattern: Optional[Dict[Any, Any]], key: Any) -> Any:
+        if pattern is None:
+            return None
+        return pattern.get(key, pattern.get(ANY_KEY, None))
+
+    def _encode_key(self, key: Any) -> str:
+        if not isinstance(key, str):
+            # Like the json module, write keys of the other basic types as strings of their JSON.
+            key = self._compact_encoder.encode(key)
+        return self._compact_encoder.encode(key)
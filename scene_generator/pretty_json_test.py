@@ -0,0 +1,59 @@
+import io
+import json
+
+from pretty_json.pretty_json import ANY_KEY, PrettyJsonEncoder, PrettyJsonNoIndent, PrettyJsonWriter
+
+
+def create_data():
+    return {
+        'name': 'scene',
+        'empty': {},
+        'objects': [
+            {'id': 'a', 'info': ['big', 'red'], 'shows': [{'stepBegin': 0, 'bounding_box': [{'x': 1.5, 'z': -2}]}]},
+            {'id': 'b', 'info': [], 'position': {'x': 0.25, 'y': None, 'z': True}}
+        ],
+        'goal': {'image': [[[0, 1], [2, 3]]], 'note': 'café'}
+    }
+
+
+def encode_wrapped(data):
+    """Encode the data the old way, wrapping the values to write on one line."""
+    for obj in data['objects']:
+        obj['info'] = PrettyJsonNoIndent(obj['info'])
+    data['goal']['image'] = PrettyJsonNoIndent(data['goal']['image'])
+    return json.dumps(data, cls=PrettyJsonEncoder, indent=2)
+
+
+NO_INDENT = {'objects': {ANY_KEY: {'info': True}}, 'goal': {'image': True}}
+
+
+def test_pretty_json_encoder():
+    text = json.dumps({'list': PrettyJsonNoIndent([1, 2]), 'dict': PrettyJsonNoIndent({'a': [3]})},
+                      cls=PrettyJsonEncoder, indent=2)
+    assert text == '{\n  "list": [1,2],\n  "dict": {"a":[3]}\n}'
+
+
+def test_pretty_json_writer_matches_encoder():
+    writer = PrettyJsonWriter(NO_INDENT)
+    assert writer.dumps(create_data()) == encode_wrapped(create_data())
+    # Without any patterns, it writes like the json module.
+    assert PrettyJsonWriter().dumps(create_data()) == json.dumps(create_data(), indent=2)
+
+
+def test_pretty_json_writer_omits_values():
+    writer = PrettyJsonWriter(NO_INDENT)
+    omit = {'objects': {ANY_KEY: {'info': True, 'shows': {0: {'bounding_box': True}}}}, 'goal': {'image': True}}
+    data = create_data()
+    full = io.StringIO()
+    stripped = io.StringIO()
+    writer.dump(data, [(full, None), (stripped, omit)])
+    assert data == create_data()
+    assert full.getvalue() == encode_wrapped(create_data())
+
+    expected = create_data()
+    for obj in expected['objects']:
+        del obj['info']
+    del expected['objects'][0]['shows'][0]['bounding_box']
+    del expected['goal']['image']
+    assert stripped.getvalue() == json.dumps(expected, indent=2)
+    assert writer.dumps(data, omit) == stripped.getvalue()
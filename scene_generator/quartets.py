@@ -6,7 +6,7 @@ from typing import Dict, Any, List, Type, Optional, Tuple
 
 import goal
 import intphys_goals
-import objects
+import object_catalog
 import util
 
 
@@ -347,7 +347,7 @@ class ShapeConstancyQuartet(Quartet):
         if a['type'] == 'cylinder':
             normalized_scale = normalized_scale.copy()
             normalized_scale['y'] *= 2
-        for obj_def in objects.OBJECTS_INTPHYS:
+        for obj_def in object_catalog.get_catalog().get_definitions('intphys'):
             if obj_def['type'] != a['type']:
                 def_scale = obj_def['scale']
                 if obj_def['type'] == 'cylinder':
@@ -5,9 +5,10 @@
 import copy
 from enum import Enum, auto
 import random
-import uuid
 from typing import Tuple, List, Dict, Any
 
+import util
+
 RAMP_30_TEMPLATE = [{
     "id": "ramp_part1_",
     "type": "cube",
@@ -337,7 +338,7 @@ def create_ramp(material_string: str, x_position_percent: float, left_to_right:
     x_term = x_position_percent * template_info[1]
     for obj_template in template_info[0]:
         obj = copy.deepcopy(obj_template)
-        obj['id'] += str(uuid.uuid4())
+        obj['id'] += util.random_uuid()
         obj['materials'].append(material_string)
         obj['shows'][0]['position']['x'] += x_term
         if left_to_right:
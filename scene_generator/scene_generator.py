@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 #
+import base64
+import functools
+import hashlib
 import logging
+import multiprocessing
+import re
 import sys
 import argparse
 import os
@@ -8,13 +13,15 @@ import os.path
 import json
 import copy
 import random
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 import quartets
 from materials import *
-from pretty_json.pretty_json import PrettyJsonEncoder, PrettyJsonNoIndent
+from pretty_json.pretty_json import ANY_KEY, PrettyJsonWriter
+import geometry
 import goal
 import goals
+import optimal_path
 
 # no public way to find this, apparently :(
 LOG_LEVELS = logging._nameToLevel.keys()
@@ -42,30 +49,72 @@ OUTPUT_TEMPLATE_JSON = """
 
 OUTPUT_TEMPLATE = json.loads(OUTPUT_TEMPLATE_JSON)
 
+# How to write each goal target image: as the nested list of pixels, as a base64 PNG data URI, or as the relative path
+# of the PNG file.
+IMAGE_ENCODINGS = ['list', 'png', 'file']
+
+# The manifest status of an index whose files were all written, and of an index that failed max_attempts times.
+MANIFEST_OK = 'ok'
+MANIFEST_FAILED = 'failed'
+
+
+# The goal metadata keys of the targets.
+TARGET_KEYS = ('target', 'target_1', 'target_2')
+# The properties of an object that we do not want TA1s to have access to, as a pattern (see PrettyJsonWriter).
+OBJECT_DEBUG_PROPERTIES = {
+    'info': True,
+    'dimensions': True,
+    'intphys_option': True,
+    'materials_list': True,
+    'original_location': True,
+    'shows': {0: {'bounding_box': True}}
+}
+# The properties of a scene that are only for our internal use (e.g., for debugging), which only its debug file has.
+DEBUG_PROPERTIES = {
+    'objects': {ANY_KEY: OBJECT_DEBUG_PROPERTIES},
+    'goal': {
+        'domain_list': True,
+        'type_list': True,
+        'task_list': True,
+        'info_list': True,
+        'metadata': {'objects': True, **{target_key: {'info': True} for target_key in TARGET_KEYS}}
+    }
+}
+# The properties of a scene written on one line, because the indentation from the normal Python JSON module spaces them
+# out far too much.
+NO_INDENT_PROPERTIES = {
+    'objects': {ANY_KEY: {'info': True, 'materials': True, 'salientMaterials': True}},
+    'goal': {
+        'action_list': True,
+        'domain_list': True,
+        'type_list': True,
+        'task_list': True,
+        'info_list': True,
+        'metadata': {target_key: {'info': True, 'image': True} for target_key in TARGET_KEYS}
+    }
+}
+SCENE_WRITER = PrettyJsonWriter(NO_INDENT_PROPERTIES)
+
+
+def remove_properties(data: Any, pattern: Dict[Any, Any]) -> None:
+    """Remove the properties of the pattern (see PrettyJsonWriter) from the data."""
+    keys = reversed(range(len(data))) if isinstance(data, list) else list(data.keys())
+    for key in keys:
+        child = pattern.get(key, pattern.get(ANY_KEY, None))
+        if child is True:
+            del data[key]
+        elif child is not None and isinstance(data[key], (dict, list)):
+            remove_properties(data[key], child)
+
 
 def strip_debug_info(body: Dict[str, Any]) -> None:
     """Remove info that's only for our internal use (e.g., for debugging)"""
-    for obj in body['objects']:
-        clean_object(obj)
-    for goal_key in ('domain_list', 'type_list', 'task_list', 'info_list'):
-        body['goal'].pop(goal_key, None)
-    if 'metadata' in body['goal']:
-        metadata = body['goal']['metadata']
-        metadata.pop('objects', None)
-        for target_key in ('target', 'target_1', 'target_2'):
-            if target_key in metadata:
-                metadata[target_key].pop('info', None)
+    remove_properties(body, DEBUG_PROPERTIES)
 
 
 def clean_object(obj: Dict[str, Any]) -> None:
     """Remove properties we do not want TA1s to have access to."""
-    obj.pop('info', None)
-    obj.pop('dimensions', None)
-    obj.pop('intphys_option', None)
-    obj.pop('materials_list', None)
-    obj.pop('original_location', None)
-    if 'shows' in obj:
-        obj['shows'][0].pop('bounding_box', None)
+    remove_properties(obj, OBJECT_DEBUG_PROPERTIES)
 
 
 def generate_body_template(name: str) -> Dict[str, Any]:
@@ -86,115 +135,371 @@ def generate_scene(name: str, goal_type: str, find_path: bool) -> Dict[str, Any]
     return body
 
 
-def generate_file(name: str, goal_type: str, find_path: bool) -> None:
+def generate_file(name: str, goal_type: str, find_path: bool, image_encoding: str = 'list') -> None:
     """Create a new scenery file and a debug file. name must end with '.json'."""
     body = generate_scene(name, goal_type, find_path)
-    write_file(name, body)
-
+    write_file(name, body, image_encoding)
+
+
+def encode_goal_images(name: str, body: Dict[str, Any], image_encoding: str) -> None:
+    """Replace the pixel list of each goal target image with the PNG from the images folder, either embedded as a
+    base64 data URI ('png') or referenced by its path relative to the scene file ('file'), so the scene file stays
+    small."""
+    if image_encoding == 'list' or 'metadata' not in body['goal']:
+        return
+    metadata = body['goal']['metadata']
+    for target_key in TARGET_KEYS:
+        target = metadata.get(target_key, None)
+        if target is None or 'image_name' not in target:
+            continue
+        image_file_name = os.path.join('images', target['image_name'])
+        if not os.path.exists(image_file_name):
+            logging.warning('Image file could not be found, so keeping the pixel list: ' + image_file_name)
+            continue
+        if image_encoding == 'png':
+            with open(image_file_name, 'rb') as image_file:
+                target['image'] = 'data:image/png;base64,' + base64.b64encode(image_file.read()).decode('ascii')
+        else:
+            target['image'] = os.path.relpath(os.path.abspath(image_file_name),
+                                              os.path.dirname(os.path.abspath(name)))
+
+
+def get_debug_name(name: str) -> str:
+    return name[:-5] + '-debug.json'
+
+
+def write_file(name: str, body: Dict[str, Any], image_encoding: str = 'list') -> None:
+    """Write the scene file, without the debug info, and the debug file, with it, both in one pass over the body.
+    Only the goal images of the body change (see encode_goal_images)."""
+    encode_goal_images(name, body, image_encoding)
+    with open(get_debug_name(name), 'w') as debug_out, open(name, 'w') as out:
+        SCENE_WRITER.dump(body, [(debug_out, None), (out, DEBUG_PROPERTIES)])
 
-def write_file(name: str, body: Dict[str, Any]) -> None:
-    debug_name = name[:-5] + '-debug.json'
-    write_scene(debug_name, body)
-    strip_debug_info(body)
-    write_scene(name, body)
-    
 
 def write_scene(name: str, scene: Dict[str, Any]) -> None:
-    # Use PrettyJsonNoIndent on some of the lists and dicts in the
-    # output body because the indentation from the normal Python JSON
-    # module spaces them out far too much.
-    body = copy.deepcopy(scene)
-
-    # Use PrettyJsonNoIndent on some of the lists and dicts in the
-    # output body because the indentation from the normal Python JSON
-    # module spaces them out far too much.
-    wrap_with_json_no_indent(body['goal'], ['action_list', 'domain_list', 'type_list', 'task_list', 'info_list'])
-    if 'metadata' in body['goal']:
-        for target in ['target', 'target_1', 'target_2']:
-            if target in body['goal']['metadata']:
-                wrap_with_json_no_indent(body['goal']['metadata'][target], ['info', 'image'])
-
-    for object_config in body['objects']:
-        wrap_with_json_no_indent(object_config, ['info', 'materials', 'salientMaterials'])
-
     with open(name, 'w') as out:
-        # PrettyJsonEncoder doesn't work with json.dump so use json.dumps here instead.
-        out.write(json.dumps(body, cls=PrettyJsonEncoder, indent=2))
+        SCENE_WRITER.dump(scene, [(out, None)])
+
+
+def find_free_indexes(prefix: str, count: int, quartet: bool = False) -> List[int]:
+    """Return the first count file indexes (starting at 1) not used by any existing file with the given prefix, listing
+    the output directory once rather than checking each file name."""
+    dirname = os.path.dirname(prefix) or '.'
+    pattern = re.compile(re.escape(os.path.basename(prefix)) + (r'-(\d+)-[1-4]\.json$' if quartet else
+                                                                 r'-(\d+)\.json$'))
+    used = set()
+    if os.path.isdir(dirname):
+        for file_name in os.listdir(dirname):
+            match = pattern.match(file_name)
+            if match:
+                used.add(int(match.group(1)))
+    indexes = []
+    index = 1
+    while len(indexes) < count:
+        if index not in used:
+            indexes.append(index)
+        index += 1
+    return indexes
 
 
-def wrap_with_json_no_indent(data: Dict[str, Any], prop_list: List[str]) -> None:
-    for prop in prop_list:
-        if prop in data:
-            data[prop] = PrettyJsonNoIndent(data[prop])
+def index_seed(seed: Any, index: int) -> int:
+    """Return the random seed of the scene (or quartet) with the given index, derived from the seed of the whole
+    fileset, so each scene is the same no matter which process generates it or in which order."""
+    digest = hashlib.sha256(f'{seed}-{index}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
 
 
-def generate_scene_fileset(prefix: str, count: int, goal_type: str, find_path: bool,
-                           stop_on_error: bool) -> None:
-    # skip existing files
-    index = 1
+def failure_reason(name: str, error: Exception) -> str:
+    return f'{os.path.basename(name)}: {type(error).__name__}: {error}'
 
-    while count > 0:
-        while True:
-            name = f'{prefix}-{index:04}.json'
-            file_exists = os.path.exists(name)
-            if not file_exists:
-                break
-            index += 1
+
+def create_manifest_entry(index: int, status: str, files: List[str], failures: List[str]) -> Dict[str, Any]:
+    """Return the manifest entry of the scene (or quartet) with the given index. The files (each scene file and its
+    debug file) are relative to the manifest, which is written next to them."""
+    return {
+        'index': index,
+        'status': status,
+        'files': [os.path.basename(name) for name in files],
+        'failures': failures
+    }
+
+
+def log_failed_entry(entry: Dict[str, Any]) -> None:
+    """Log a warning if the given manifest entry is of an index that failed max_attempts times."""
+    if entry['status'] == MANIFEST_FAILED:
+        logging.warning(f'skipped index {entry["index"]} after {len(entry["failures"])} failed attempts')
+
+
+def generate_indexed_file(prefix: str, goal_type: str, find_path: bool, stop_on_error: bool, image_encoding: str,
+                          seed: Optional[Any], index: int, max_attempts: Optional[int] = None,
+                          scene_scale: Optional[goal.SceneScale] = None,
+                          path_planner: Optional[str] = None) -> Dict[str, Any]:
+    """Generate the scene file with the given index, retrying until it succeeds (unless stop_on_error) or has failed
+    max_attempts times. If seed is not None, first seed the random module with the seed of the index. If scene_scale or
+    path_planner (one of optimal_path.PATH_PLANNERS) is not None, first set it (in this process, which may be a worker).
+    Return its manifest entry."""
+    if scene_scale is not None:
+        goal.set_scene_scale(scene_scale)
+    if path_planner is not None:
+        optimal_path.set_path_planner(path_planner)
+    if seed is not None:
+        random.seed(index_seed(seed, index))
+    name = f'{prefix}-{index:04}.json'
+    failures = []
+    while True:
         try:
-            generate_file(name, goal_type, find_path)
-            count -= 1
+            generate_file(name, goal_type, find_path, image_encoding)
+            return create_manifest_entry(index, MANIFEST_OK, [name, get_debug_name(name)], failures)
         except (RuntimeError, ZeroDivisionError, TypeError, goal.GoalException, ValueError) as e:
             if stop_on_error:
                 raise
             logging.warning(f'failed to create a file: {e}')
+            failures.append(failure_reason(name, e))
+            if max_attempts is not None and len(failures) >= max_attempts:
+                return create_manifest_entry(index, MANIFEST_FAILED, [], failures)
+
+
+def generate_indexed_quartet(prefix: str, quartet_name: str, find_path: bool, stop_on_error: bool,
+                             image_encoding: str, seed: Optional[Any], index: int,
+                             max_attempts: Optional[int] = None) -> Dict[str, Any]:
+    """Generate the quartet with the given index. If seed is not None, first seed the random module with the seed of
+    the index. Return its manifest entry."""
+    if seed is not None:
+        random.seed(index_seed(seed, index))
+    return generate_quartet(prefix, index, quartet_name, find_path, stop_on_error, image_encoding, max_attempts)
+
+
+def run_indexed(function: Any, indexes: List[int], jobs: int, callback: Optional[Any] = None) -> None:
+    """Call the given function with each index, in a pool of the given number of processes if more than 1. Each file
+    is written by the process that generates it. If callback is not None, call it (in this process) with each return
+    value as soon as it is ready."""
+    if jobs <= 1 or len(indexes) <= 1:
+        for index in indexes:
+            result = function(index)
+            if callback is not None:
+                callback(result)
+        return
+    with multiprocessing.Pool(min(jobs, len(indexes))) as pool:
+        for result in pool.imap_unordered(function, indexes):
+            if callback is not None:
+                callback(result)
+        pool.close()
+        pool.join()
+
+
+def generate_scene_fileset(prefix: str, count: int, goal_type: str, find_path: bool,
+                           stop_on_error: bool, image_encoding: str = 'list', seed: Optional[Any] = None,
+                           jobs: int = 1, scene_scale: Optional[goal.SceneScale] = None,
+                           path_planner: Optional[str] = None, max_attempts: Optional[int] = None) -> None:
+    # skip existing files
+    indexes = find_free_indexes(prefix, count)
+    run_indexed(functools.partial(generate_indexed_file, prefix, goal_type, find_path, stop_on_error, image_encoding,
+                                  seed, max_attempts=max_attempts, scene_scale=scene_scale, path_planner=path_planner),
+                indexes, jobs, log_failed_entry)
 
 
 def generate_quartet(prefix: str, index: int, quartet_name: str,
-                     find_path: bool, stop_on_error: bool) -> None:
+                     find_path: bool, stop_on_error: bool, image_encoding: str = 'list',
+                     max_attempts: Optional[int] = None) -> Dict[str, Any]:
+    """Generate the quartet with the given index, retrying each scene until it succeeds (unless stop_on_error) or has
+    failed max_attempts times. Return its manifest entry."""
     template = generate_body_template('')
     quartet_class = quartets.get_quartet_class(quartet_name)
     quartet = quartet_class(template, find_path)
+    files = []
+    failures = []
     for q in range(1, 5):
         name = f'{prefix}-{index:04}-{q}.json'
         logging.debug(f'starting generation of\t{name}')
+        attempts = 0
         while True:
             try:
                 scene = quartet.get_scene(q)
                 scene['name'] = name
-                scene_copy = copy.deepcopy(scene)
-                write_file(name, scene_copy)
+                # write_file leaves the scene as it is (except for its goal images, which it encodes the same way every
+                # time), so the quartet may reuse it.
+                write_file(name, scene, image_encoding)
+                files.extend([name, get_debug_name(name)])
                 break
             except (RuntimeError, ZeroDivisionError, TypeError, goal.GoalException, ValueError) as e:
                 if stop_on_error:
                     raise
                 logging.warning(f'failed to create a quartet member: {e}')
+                failures.append(failure_reason(name, e))
+                attempts += 1
+                if max_attempts is not None and attempts >= max_attempts:
+                    return create_manifest_entry(index, MANIFEST_FAILED, files, failures)
         logging.debug(f'end generation of\t{name}')
+    return create_manifest_entry(index, MANIFEST_OK, files, failures)
 
 
 def generate_quartets(prefix: str, count: int, quartet_name: str,
-                      find_path: bool, stop_on_error: bool) -> None:
-    index = 1
-    while count > 0:
-        while True:
-            name = f'{prefix}-{index:04}-1.json'
-            file_exists = os.path.exists(name)
-            if not file_exists:
-                break
-            index += 1
-        generate_quartet(prefix, index, quartet_name, find_path, stop_on_error)
-        count -= 1
+                      find_path: bool, stop_on_error: bool, image_encoding: str = 'list', seed: Optional[Any] = None,
+                      jobs: int = 1, max_attempts: Optional[int] = None) -> None:
+    indexes = find_free_indexes(prefix, count, quartet=True)
+    run_indexed(functools.partial(generate_indexed_quartet, prefix, quartet_name, find_path, stop_on_error,
+                                  image_encoding, seed, max_attempts=max_attempts), indexes, jobs, log_failed_entry)
 
 
 def generate_fileset(prefix: str, count: int, type_name: str, find_path: bool, stop_on_error: bool,
-                     gen_quartet: bool) -> None:
+                     gen_quartet: bool, image_encoding: str = 'list', seed: Optional[Any] = None,
+                     jobs: int = 1, scene_scale: Optional[goal.SceneScale] = None,
+                     path_planner: Optional[str] = None, max_attempts: Optional[int] = None) -> None:
+    """Generate count scenes (or quartets) with the given prefix. If seed is not None, each scene is generated from its
+    own seed derived from seed and its index, so the fileset is reproducible no matter how many jobs generate it. If
+    scene_scale is not None, the scenes (but not quartets) have its room size and numbers of objects and walls. If
+    path_planner is not None, the scenes (but not quartets) find their paths with it. If max_attempts is not None, an
+    index that fails max_attempts times is skipped, so it has no file."""
     dirname = os.path.dirname(prefix)
     if dirname != '':
         os.makedirs(dirname, exist_ok=True)
 
     if gen_quartet:
-        generate_quartets(prefix, count, type_name, find_path, stop_on_error)
+        generate_quartets(prefix, count, type_name, find_path, stop_on_error, image_encoding, seed, jobs, max_attempts)
     else:
-        generate_scene_fileset(prefix, count, type_name, find_path, stop_on_error)
+        generate_scene_fileset(prefix, count, type_name, find_path, stop_on_error, image_encoding, seed, jobs,
+                               scene_scale, path_planner, max_attempts)
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse a shard like '3/16' (the third of 16 shards) into (3, 16)."""
+    match = re.match(r'^(\d+)/(\d+)$', text)
+    if match is None or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f'invalid shard {text!r} (should be like 3/16, from 1/N to N/N)')
+    return int(match.group(1)), int(match.group(2))
+
+
+def get_shard_indexes(count: int, shard: int, shard_count: int) -> List[int]:
+    """Return the file indexes of the given shard (from 1 to shard_count) of a fileset of count scenes (or quartets)
+    numbered from 1. The shards split the indexes into contiguous ranges whose sizes differ by at most 1."""
+    return list(range((shard - 1) * count // shard_count + 1, shard * count // shard_count + 1))
+
+
+def get_shard_manifest_name(prefix: str, shard: int, shard_count: int) -> str:
+    width = len(str(shard_count))
+    return f'{prefix}-shard-{shard:0{width}}-of-{shard_count}.jsonl'
+
+
+def read_manifest(name: str) -> List[Dict[str, Any]]:
+    """Return the lines of the given JSON lines manifest (if it exists), skipping a last line that was only partly
+    written when its shard stopped."""
+    lines = []
+    if not os.path.isfile(name):
+        return lines
+    with open(name) as manifest_file:
+        for line in manifest_file:
+            try:
+                lines.append(json.loads(line))
+            except ValueError:
+                pass
+    return lines
+
+
+def append_manifest_line(manifest_file: Any, line: Dict[str, Any]) -> None:
+    # Save each line immediately so it survives a crash.
+    manifest_file.write(json.dumps(line) + '\n')
+    manifest_file.flush()
+    os.fsync(manifest_file.fileno())
+
+
+def generate_shard(prefix: str, count: int, type_name: str, find_path: bool, stop_on_error: bool, gen_quartet: bool,
+                   image_encoding: str, seed: Any, shard: int, shard_count: int, jobs: int = 1,
+                   max_attempts: Optional[int] = None,
+                   scene_scale: Optional[goal.SceneScale] = None,
+                   path_planner: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Generate the given shard of a fileset of count scenes (or quartets) with the given prefix and seed, and append
+    the manifest entry of each index to the shard's manifest as soon as it is done. Each index has the same seed (and so
+    the same scenes) in any shard, so every shard of the fileset must use the same count and seed. If the manifest
+    already exists (because the shard stopped), only generate the indexes without a successful entry, rather than
+    checking the existing files. Return the new manifest entries."""
+    dirname = os.path.dirname(prefix)
+    if dirname != '':
+        os.makedirs(dirname, exist_ok=True)
+
+    manifest_name = get_shard_manifest_name(prefix, shard, shard_count)
+    header = {
+        'type': type_name,
+        'quartet': gen_quartet,
+        'seed': seed,
+        'count': count,
+        'shard': shard,
+        'shard_count': shard_count
+    }
+    if scene_scale is not None:
+        header['scale'] = scene_scale._asdict()
+    if path_planner is not None:
+        header['path_planner'] = path_planner
+    lines = read_manifest(manifest_name)
+    if len(lines) > 0 and lines[0] != header:
+        raise ValueError(f'{manifest_name} is the manifest of a different fileset: {lines[0]}')
+    done = set(entry['index'] for entry in lines[1:] if entry['status'] == MANIFEST_OK)
+    indexes = [index for index in get_shard_indexes(count, shard, shard_count) if index not in done]
+
+    # Write a newline first if the last line was only partly written so the next entry starts on its own line.
+    needs_newline = False
+    if os.path.isfile(manifest_name) and os.path.getsize(manifest_name) > 0:
+        with open(manifest_name, 'rb') as manifest_file:
+            manifest_file.seek(-1, os.SEEK_END)
+            needs_newline = manifest_file.read(1) != b'\n'
+
+    if gen_quartet:
+        function = functools.partial(generate_indexed_quartet, prefix, type_name, find_path, stop_on_error,
+                                     image_encoding, seed, max_attempts=max_attempts)
+    else:
+        function = functools.partial(generate_indexed_file, prefix, type_name, find_path, stop_on_error,
+                                     image_encoding, seed, max_attempts=max_attempts, scene_scale=scene_scale,
+                                     path_planner=path_planner)
+    entries = []
+    with open(manifest_name, 'a') as manifest_file:
+        if needs_newline:
+            manifest_file.write('\n')
+        if len(lines) == 0:
+            append_manifest_line(manifest_file, header)
+
+        def save(entry: Dict[str, Any]) -> None:
+            append_manifest_line(manifest_file, entry)
+            entries.append(entry)
+            logging.info(f'shard {shard}/{shard_count}: index {entry["index"]} {entry["status"]}')
+
+        run_indexed(function, indexes, jobs, save)
+    return entries
+
+
+def merge_manifests(prefix: str, manifest_names: List[str]) -> Dict[str, Any]:
+    """Combine the given shard manifests of one fileset into the manifest named prefix + '-manifest.jsonl': a header
+    line (with the indexes that are missing or failed in every shard) followed by the latest entry of each index,
+    sorted by index. Return the header."""
+    header = None
+    shards = set()
+    entries = {}
+    for name in manifest_names:
+        lines = read_manifest(name)
+        if len(lines) == 0:
+            raise ValueError(f'{name} is not a shard manifest')
+        shard_header = dict(lines[0])
+        shards.add(shard_header.pop('shard'))
+        if header is None:
+            header = shard_header
+        elif shard_header != header:
+            raise ValueError(f'{name} is the manifest of a different fileset: {lines[0]}')
+        for entry in lines[1:]:
+            # A successful entry replaces any failure of the same index, as when a stopped shard was resumed.
+            if entry['status'] == MANIFEST_OK or entry['index'] not in entries:
+                entries[entry['index']] = entry
+
+    if header is None:
+        raise ValueError('no manifests to merge')
+    header['shards'] = sorted(shards)
+    header['missing_shards'] = [shard for shard in range(1, header['shard_count'] + 1) if shard not in shards]
+    header['missing'] = [index for index in range(1, header['count'] + 1) if index not in entries]
+    header['failed'] = [index for index in sorted(entries) if entries[index]['status'] != MANIFEST_OK]
+    header['file_count'] = sum(len(entry['files']) for entry in entries.values())
+
+    with open(f'{prefix}-manifest.jsonl', 'w') as manifest_file:
+        manifest_file.write(json.dumps(header) + '\n')
+        for index in sorted(entries):
+            manifest_file.write(json.dumps(entries[index]) + '\n')
+    return header
 
 
 def main(argv):
@@ -211,9 +516,35 @@ def main(argv):
                        'goals are categories; capitalized goals are specific goals.')
     parser.add_argument('--find_path', default=False, action='store_true',
                         help='Whether to run the pathfinding for interaction goals')
+    parser.add_argument('--path-planner', default=None, choices=optimal_path.PATH_PLANNERS.keys(),
+                        help='With --find_path, how to find the paths: the shortest paths of a visibility graph, or the '
+                             'A* paths of an occupancy grid (faster with many objects, but only as exact as its cells) '
+                             f'[default={optimal_path.DEFAULT_PATH_PLANNER}]')
     parser.add_argument('--stop-on-error', default=False, action='store_true',
                         help='Stop immediately if there is an error generating a file [default is print a warning but '
                              'do not stop]')
+    parser.add_argument('--image-encoding', default='list', choices=IMAGE_ENCODINGS,
+                        help='How to write goal target images: as a pixel list, as an embedded base64 PNG, or as the '
+                             'relative path of the PNG in the images folder [default=list]')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='How many processes generate scenes at once [default=1]. With --seed, the scenes are the '
+                             'same for any number of jobs.')
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        help='Generate only this shard of the fileset, like 3/16, with --count the size of the whole '
+                             'fileset (requires --seed). The shard writes a manifest of its files and failures, and '
+                             'resumes from it when rerun.')
+    parser.add_argument('--max-attempts', type=int, default=None,
+                        help='How many times to try to generate a scene before skipping it (with --shard, recording it '
+                             'as failed in the manifest) [default is to retry until it succeeds]')
+    parser.add_argument('--merge', nargs='+', default=None, metavar='MANIFEST',
+                        help='Instead of generating scenes, combine the given shard manifests into the manifest '
+                             '<prefix>-manifest.jsonl')
+    parser.add_argument('--objects', type=int, default=None,
+                        help='How many objects (including the goal\'s objects) each scene has, if they fit [default is '
+                             f'a random number up to {goal.MAX_OBJECTS}]')
+    parser.add_argument('--walls', type=int, default=None,
+                        help=f'How many walls each scene has, if they fit [default is a random number up to '
+                             f'{max(goal.WALL_COUNTS)}]')
     parser.add_argument('--loglevel', choices=LOG_LEVELS, help='set logging level')
 
     args = parser.parse_args(argv[1:])
@@ -222,6 +553,12 @@ def main(argv):
     if args.loglevel:
         logging.getLogger().setLevel(args.loglevel)
 
+    if args.merge is not None:
+        header = merge_manifests(args.prefix, args.merge)
+        print(f'merged {len(header["shards"])} of {header["shard_count"]} shards: {header["file_count"]} files, '
+              f'{len(header["failed"])} failed and {len(header["missing"])} missing of {header["count"]} indexes')
+        return
+
     if args.goal is not None:
         type_name = args.goal
         is_quartet = False
@@ -231,8 +568,35 @@ def main(argv):
     else:
         type_name = None
         is_quartet = False
-        
-    generate_fileset(args.prefix, args.count, type_name, args.find_path, args.stop_on_error, is_quartet)
+
+    scene_scale = None
+    if args.objects is not None or args.walls is not None:
+        if is_quartet:
+            parser.error('--objects and --walls do not apply to quartets')
+        if (args.objects is not None and args.objects < 0) or (args.walls is not None and args.walls < 0):
+            parser.error('--objects and --walls must not be negative')
+        # The simulator does not read a room size from the scene, so the scenes always have its room size (larger
+        # rooms are only for benchmark.py).
+        scene_scale = goal.SceneScale(geometry.DEFAULT_ROOM_SIZE, args.objects, args.walls)
+    if args.path_planner is not None and (is_quartet or not args.find_path):
+        parser.error('--path-planner requires --find_path and does not apply to quartets')
+
+    seed = args.seed
+    if seed is None and args.jobs > 1:
+        # Give each process its own random seed, since otherwise forked processes share the same random state.
+        seed = random.randrange(2 ** 32)
+        logging.info(f'using random seed {seed}')
+
+    if args.shard is not None:
+        if args.seed is None:
+            parser.error('--shard requires --seed, which every shard of the fileset must share')
+        generate_shard(args.prefix, args.count, type_name, args.find_path, args.stop_on_error, is_quartet,
+                       args.image_encoding, args.seed, args.shard[0], args.shard[1], args.jobs, args.max_attempts,
+                       scene_scale, args.path_planner)
+        return
+
+    generate_fileset(args.prefix, args.count, type_name, args.find_path, args.stop_on_error, is_quartet,
+                     args.image_encoding, seed, args.jobs, scene_scale, args.path_planner, args.max_attempts)
 
 
 if __name__ == '__main__':
@@ -1,4 +1,16 @@
-from scene_generator import generate_scene, clean_object
+import base64
+import copy
+import json
+import random
+
+import pytest
+
+import goal
+import object_catalog
+import scene_generator
+from separating_axis_theorem import sat_entry
+from scene_generator import generate_scene, clean_object, encode_goal_images, find_free_indexes, index_seed, \
+    parse_shard, get_shard_indexes, generate_shard, main, merge_manifests, strip_debug_info, write_file
 
 
 def find_object(id, obj_list):
@@ -55,3 +67,179 @@ def test_clean_object():
     }
     clean_object(obj)
     assert obj == expected
+
+
+def create_body_with_target_image():
+    return {
+        'goal': {
+            'metadata': {
+                'target': {
+                    'id': 'thing1',
+                    'image': '[[[1, 2, 3]]]',
+                    'image_name': 'thing_red.png'
+                },
+                'target_2': {
+                    'id': 'thing2',
+                    'image': '[[[4, 5, 6]]]',
+                    'image_name': 'missing.png'
+                }
+            }
+        }
+    }
+
+
+def test_encode_goal_images(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'thing_red.png').write_bytes(b'png data')
+
+    body = create_body_with_target_image()
+    encode_goal_images('test.json', body, 'list')
+    assert body == create_body_with_target_image()
+
+    body = create_body_with_target_image()
+    encode_goal_images('test.json', body, 'png')
+    assert body['goal']['metadata']['target']['image'] == 'data:image/png;base64,' + \
+        base64.b64encode(b'png data').decode('ascii')
+    # Keep the pixel list if the PNG file does not exist.
+    assert body['goal']['metadata']['target_2']['image'] == '[[[4, 5, 6]]]'
+
+    body = create_body_with_target_image()
+    encode_goal_images('output/test.json', body, 'file')
+    assert body['goal']['metadata']['target']['image'] == '../images/thing_red.png'
+
+
+def test_find_free_indexes(tmp_path):
+    (tmp_path / 'scene-0001.json').write_text('{}')
+    (tmp_path / 'scene-0003-debug.json').write_text('{}')
+    (tmp_path / 'other-0002.json').write_text('{}')
+    assert find_free_indexes(str(tmp_path / 'scene'), 3) == [2, 3, 4]
+    assert find_free_indexes(str(tmp_path / 'missing' / 'scene'), 2) == [1, 2]
+
+
+def test_generate_scene_is_reproducible_from_index_seed():
+    assert index_seed(7, 3) == index_seed(7, 3)
+    assert index_seed(7, 3) != index_seed(7, 4)
+    assert index_seed(7, 3) != index_seed(8, 3)
+
+    random.seed(index_seed(7, 2))
+    expected = generate_scene('test', 'interaction', False)
+    # The scene does not depend on the scenes generated before it.
+    random.seed(index_seed(7, 1))
+    generate_scene('test', 'interaction', False)
+    random.seed(index_seed(7, 2))
+    assert generate_scene('test', 'interaction', False) == expected
+
+
+def test_parse_shard():
+    assert parse_shard('3/16') == (3, 16)
+    for text in ('0/2', '3/2', '1', 'a/b'):
+        with pytest.raises(Exception):
+            parse_shard(text)
+
+
+def test_get_shard_indexes():
+    shards = [get_shard_indexes(10, shard, 4) for shard in range(1, 5)]
+    assert shards == [[1, 2], [3, 4, 5], [6, 7], [8, 9, 10]]
+    assert get_shard_indexes(2, 1, 3) == []
+
+
+def mock_generate_file(failing_names):
+    def generate_file(name, goal_type, find_path, image_encoding='list'):
+        if name in failing_names:
+            raise goal.GoalException('no room')
+        with open(name, 'w') as out:
+            out.write(json.dumps({'seed': random.random()}))
+    return generate_file
+
+
+def test_generate_shard_resumes_and_merges(tmp_path, monkeypatch):
+    prefix = str(tmp_path / 'scene')
+    monkeypatch.setattr(scene_generator, 'generate_file', mock_generate_file([prefix + '-0004.json']))
+    entries = generate_shard(prefix, 5, None, False, False, False, 'list', 7, 2, 2, max_attempts=2)
+    assert [(entry['index'], entry['status']) for entry in entries] == [(3, 'ok'), (4, 'failed'), (5, 'ok')]
+    assert entries[0]['files'] == ['scene-0003.json', 'scene-0003-debug.json']
+    assert entries[1]['failures'] == ['scene-0004.json: GoalException: no room'] * 2
+
+    # Only the failed index is generated again, with the same seed as in any other shard.
+    monkeypatch.setattr(scene_generator, 'generate_file', mock_generate_file([]))
+    entries = generate_shard(prefix, 5, None, False, False, False, 'list', 7, 2, 2)
+    assert [(entry['index'], entry['status']) for entry in entries] == [(4, 'ok')]
+    random.seed(index_seed(7, 4))
+    assert json.loads((tmp_path / 'scene-0004.json').read_text()) == {'seed': random.random()}
+
+    with pytest.raises(ValueError):
+        generate_shard(prefix, 6, None, False, False, False, 'list', 7, 2, 2)
+
+    header = merge_manifests(prefix, [prefix + '-shard-2-of-2.jsonl'])
+    assert header['shards'] == [2]
+    assert header['missing_shards'] == [1]
+    assert header['missing'] == [1, 2]
+    assert header['failed'] == []
+    lines = (tmp_path / 'scene-manifest.jsonl').read_text().splitlines()
+    assert [json.loads(line)['index'] for line in lines[1:]] == [3, 4, 5]
+
+
+def test_generate_scene_at_scale():
+    random.seed(11)
+    try:
+        goal.set_scene_scale(goal.SceneScale(20, 60, 8))
+        body = generate_scene('test', 'Traversal', False)
+    finally:
+        goal.set_scene_scale(goal.SceneScale())
+    walls = [obj for obj in body['objects'] if obj['id'].startswith('wall_')]
+    assert len(walls) == 8
+    assert len(body['objects']) - len(walls) >= 55
+    rects = [obj['shows'][0]['bounding_box'] for obj in body['objects']]
+    for i, rect in enumerate(rects):
+        assert all(-10 <= point['x'] <= 10 and -10 <= point['z'] <= 10 for point in rect)
+        assert not any(sat_entry(rect, other_rect) for other_rect in rects[i + 1:])
+
+
+def test_main_has_no_room_size(tmp_path):
+    # The simulator's room has a fixed size, so only benchmark.py generates larger rooms.
+    with pytest.raises(SystemExit):
+        main(['scene_generator.py', '--prefix', str(tmp_path / 'scene'), '--goal', 'Traversal', '--room-size', '20'])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_main_skips_indexes_after_max_attempts(tmp_path, monkeypatch):
+    attempts = []
+
+    def fail(name, goal_type, find_path, image_encoding):
+        attempts.append(name)
+        raise goal.GoalException('no room')
+    monkeypatch.setattr(scene_generator, 'generate_file', fail)
+    main(['scene_generator.py', '--prefix', str(tmp_path / 'scene'), '--goal', 'Traversal', '--count', '2',
+          '--objects', '200', '--max-attempts', '3'])
+    assert len(attempts) == 6
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_file(tmp_path):
+    random.seed(5)
+    body = generate_scene('test', 'Retrieval', False)
+    expected_body = copy.deepcopy(body)
+    write_file(str(tmp_path / 'test.json'), body)
+    # The body is left as it is.
+    assert body == expected_body
+
+    debug_text = (tmp_path / 'test-debug.json').read_text()
+    assert json.loads(debug_text) == json.loads(json.dumps(body))
+    # The goal's lists and the objects' info and materials are each on one line.
+    assert '"info": [' + ','.join(json.dumps(info) for info in body['objects'][0]['info']) + ']' in debug_text
+    assert '"type_list": ' + json.dumps(body['goal']['type_list'], separators=(',', ':')) in debug_text
+
+    strip_debug_info(expected_body)
+    assert json.loads((tmp_path / 'test.json').read_text()) == json.loads(json.dumps(expected_body))
+    assert 'info' not in expected_body['objects'][0]
+    assert 'bounding_box' not in expected_body['objects'][0]['shows'][0]
+
+
+def test_generate_indexed_file_does_not_retry_changes_to_frozen_values(tmp_path, monkeypatch):
+    def change_frozen_value(name, goal_type, find_path, image_encoding):
+        object_catalog.freeze({'dimensions': {'x': 1}})['dimensions']['x'] = 2
+    monkeypatch.setattr(scene_generator, 'generate_file', change_frozen_value)
+    with pytest.raises(object_catalog.FrozenException):
+        scene_generator.generate_indexed_file(str(tmp_path / 'scene'), 'Traversal', False, False, 'none', 1, 1,
+                                              max_attempts=1)
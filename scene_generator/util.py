@@ -5,19 +5,23 @@ import random
 from typing import Dict, Any, Optional, List, Tuple
 
 import materials
+import object_catalog
 
 
-def finalize_object_definition(object_def: Dict[str, Any]) -> Dict[str, Any]:
-    object_def_copy = copy.deepcopy(object_def)
+def random_uuid() -> str:
+    """Return a random version 4 UUID string. Unlike uuid.uuid4, it comes from the random module, so the IDs in a
+    scene are reproducible from its random seed."""
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
 
-    # apply choice if necessary
-    if 'choose' in object_def_copy:
-        choice = random.choice(object_def_copy['choose'])
-        for key in choice:
-            object_def_copy[key] = choice[key]
-        del object_def_copy['choose']
 
-    return object_def_copy
+def finalize_object_definition(object_def: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the definition with one of its choices (if it has any) applied: one of its variants from the object
+    catalog, which is frozen and shared (see object_catalog)."""
+    variants = object_catalog.get_catalog().get_variants(object_def)
+    # apply choice if necessary
+    if 'choose' in object_def:
+        return random.choice(variants)
+    return variants[0]
 
 
 def instantiate_object(object_def: Dict[str, Any],
@@ -25,15 +29,16 @@ def instantiate_object(object_def: Dict[str, Any],
                        materials_list: Optional[List[Tuple[str, List[str]]]] = None) \
                        -> Dict[str, Any]:
     """Create a new object from an object definition (as from the objects.json file). object_location will be modified
-    by this function."""
+    by this function. The object shares the values of the definition's variant (like its dimensions and scale), which
+    are frozen, so replace them rather than change them."""
     if object_def is None or object_location is None:
         raise ValueError('instantiate_object cannot take None parameters')
 
-    # Call the finalize function here in case it wasn't called before now (calling it twice shouldn't hurt anything).
+    # Call the finalize function here in case it wasn't called before now (calling it twice returns the same variant).
     object_def = finalize_object_definition(object_def)
 
     new_object = {
-        'id': str(uuid.uuid4()),
+        'id': random_uuid(),
         'type': object_def['type'],
         'info': object_def['info'],
         'mass': object_def['mass']
@@ -59,7 +64,7 @@ def instantiate_object(object_def: Dict[str, Any],
     new_object['shows'] = shows
     object_location['stepBegin'] = 0
     object_location['scale'] = object_def['scale']
-    colors = set()
+    colors = []
     if materials_list is None and 'materialCategory' in object_def:
         materials_list = [random.choice(getattr(materials, name.upper() + '_MATERIALS')) for name in
                           object_def['materialCategory']]
@@ -69,7 +74,8 @@ def instantiate_object(object_def: Dict[str, Any],
         new_object['materials'] = [mat[0] for mat in materials_list]
         for material in materials_list:
             for color in material[1]:
-                colors.add(color)
+                if color not in colors:
+                    colors.append(color)
 
     # specific ordering of adjectives for the info list:
     # size weight color(s) material(s) object
@@ -79,7 +85,7 @@ def instantiate_object(object_def: Dict[str, Any],
         new_object['salientMaterials'] = salient_materials
         info = info[:1] + salient_materials + info[1:]
 
-    info = info[:1] + list(colors) + info[1:]
+    info = info[:1] + colors + info[1:]
 
     if 'pickupable' in object_def['attributes']:
         size = 'light'
@@ -0,0 +1,74 @@
+"""
+Collision tests of convex polygons by the separating axis theorem (like separating_axis_theorem.sat_entry) between
+whole arrays of polygons at once with numpy. A polygon array has the shape (count, vertex_count, 2), holding the x and z
+of each vertex in order (clockwise or counterclockwise), and every polygon in it must have the same vertex count (like
+the 4 of a bounding rectangle).
+
+The axes and projections are computed with the same floating point operations as separating_axis_theorem, so each
+pair of polygons collides here iff it collides there.
+"""
+from typing import Dict, List
+
+import numpy
+
+
+def rects_to_array(rects: List[List[Dict[str, float]]]) -> numpy.ndarray:
+    """Convert a list of rectangles (or polygons) of {x, z} dict points to a polygon array."""
+    return numpy.array([[(point['x'], point['z']) for point in rect] for rect in rects], dtype=float).reshape(
+        len(rects), len(rects[0]) if len(rects) > 0 else 0, 2)
+
+
+def polygon_bounds(polygons: numpy.ndarray) -> numpy.ndarray:
+    """Return the axis-aligned bounds (min x, min z, max x, max z) of each polygon in the polygon array."""
+    return numpy.concatenate([polygons.min(axis=1), polygons.max(axis=1)], axis=1)
+
+
+def _edge_normals(polygons: numpy.ndarray) -> numpy.ndarray:
+    """Return the unit normal of each edge of each polygon. A degenerate (zero length) edge gets a zero normal, which
+    never separates anything."""
+    edges = numpy.roll(polygons, -1, axis=1) - polygons
+    normals = numpy.stack([edges[..., 1], -edges[..., 0]], axis=-1)
+    norms = numpy.sqrt(normals[..., 0] ** 2 + normals[..., 1] ** 2)
+    return normals / numpy.where(norms > 0, norms, 1.0)[..., numpy.newaxis]
+
+
+def _project(polygons: numpy.ndarray, axes: numpy.ndarray) -> numpy.ndarray:
+    """Project each vertex of each polygon (P, V, 2) onto each of its axes (P, A, 2), returning (P, A, V)."""
+    return polygons[:, numpy.newaxis, :, 0] * axes[:, :, numpy.newaxis, 0] + \
+        polygons[:, numpy.newaxis, :, 1] * axes[:, :, numpy.newaxis, 1]
+
+
+def sat_pairs(polygons_a: numpy.ndarray, polygons_b: numpy.ndarray) -> numpy.ndarray:
+    """Return whether each polygon in polygons_a collides with (overlaps or touches) the polygon at the same index in
+    polygons_b, as a boolean array of their shared count."""
+    if len(polygons_a) == 0:
+        return numpy.zeros(0, dtype=bool)
+    axes = numpy.concatenate([_edge_normals(polygons_a), _edge_normals(polygons_b)], axis=1)
+    projection_a = _project(polygons_a, axes)
+    projection_b = _project(polygons_b, axes)
+    overlapping = (projection_a.min(axis=2) <= projection_b.max(axis=2)) & \
+        (projection_b.min(axis=2) <= projection_a.max(axis=2))
+    return overlapping.all(axis=1)
+
+
+def sat_one_to_many(polygon: numpy.ndarray, polygons: numpy.ndarray) -> numpy.ndarray:
+    """Return whether the polygon (V, 2) collides with each of the polygons (N, W, 2), as a boolean array (N,)."""
+    return sat_many_to_many(polygon[numpy.newaxis], polygons)[0]
+
+
+def sat_many_to_many(candidates: numpy.ndarray, polygons: numpy.ndarray) -> numpy.ndarray:
+    """Return whether each of the candidates (K, V, 2) collides with each of the polygons (N, W, 2), as a boolean array
+    (K, N). Only the pairs whose axis-aligned bounds overlap run the full separating axis test."""
+    collisions = numpy.zeros((len(candidates), len(polygons)), dtype=bool)
+    if len(candidates) == 0 or len(polygons) == 0:
+        return collisions
+    candidate_bounds = polygon_bounds(candidates)
+    bounds = polygon_bounds(polygons)
+    nearby = (candidate_bounds[:, numpy.newaxis, 0] <= bounds[numpy.newaxis, :, 2]) & \
+        (bounds[numpy.newaxis, :, 0] <= candidate_bounds[:, numpy.newaxis, 2]) & \
+        (candidate_bounds[:, numpy.newaxis, 1] <= bounds[numpy.newaxis, :, 3]) & \
+        (bounds[numpy.newaxis, :, 1] <= candidate_bounds[:, numpy.newaxis, 3])
+    candidate_indexes, polygon_indexes = numpy.nonzero(nearby)
+    collisions[candidate_indexes, polygon_indexes] = sat_pairs(candidates[candidate_indexes],
+                                                               polygons[polygon_indexes])
+    return collisions
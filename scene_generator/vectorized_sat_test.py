@@ -0,0 +1,43 @@
+import random
+
+import numpy
+
+from geometry import calc_obj_coords, VALID_ROTATIONS
+from separating_axis_theorem import sat_entry
+from vectorized_sat import polygon_bounds, rects_to_array, sat_many_to_many, sat_one_to_many, sat_pairs
+
+
+def random_rect():
+    return calc_obj_coords(round(random.uniform(-3, 3), 2), round(random.uniform(-3, 3), 2),
+                           random.choice([0.25, 0.5, round(random.uniform(0.05, 1.5), 3)]),
+                           random.choice([0.25, 0.5, round(random.uniform(0.05, 1.5), 3)]), 0, 0,
+                           random.choice(VALID_ROTATIONS))
+
+
+def test_rects_to_array():
+    rect = [{'x': 1, 'y': 0, 'z': 2}, {'x': 3, 'y': 0, 'z': 4}, {'x': 5, 'y': 0, 'z': 6}, {'x': 7, 'y': 0, 'z': 8}]
+    actual = rects_to_array([rect, rect])
+    assert actual.shape == (2, 4, 2)
+    assert actual[1].tolist() == [[1, 2], [3, 4], [5, 6], [7, 8]]
+    assert rects_to_array([]).shape == (0, 0, 2)
+    assert polygon_bounds(actual)[0].tolist() == [1, 2, 7, 8]
+
+
+def test_sat_pairs():
+    a = rects_to_array([calc_obj_coords(0, 0, 0.5, 0.5, 0, 0, 0)] * 3)
+    b = rects_to_array([calc_obj_coords(0.5, 0.5, 0.5, 0.5, 0, 0, 45), calc_obj_coords(1, 0, 0.5, 0.5, 0, 0, 0),
+                        calc_obj_coords(2, 2, 0.5, 0.5, 0, 0, 0)])
+    # Rectangles that only touch collide, as with sat_entry.
+    assert sat_pairs(a, b).tolist() == [True, True, False]
+    assert sat_pairs(a[:0], b[:0]).shape == (0,)
+
+
+def test_sat_many_to_many_matches_sat_entry():
+    random.seed(4)
+    candidates = [random_rect() for _ in range(50)]
+    rects = [random_rect() for _ in range(60)]
+    actual = sat_many_to_many(rects_to_array(candidates), rects_to_array(rects))
+    assert actual.shape == (50, 60)
+    assert actual.tolist() == [[sat_entry(candidate, rect) for rect in rects] for candidate in candidates]
+    assert sat_one_to_many(rects_to_array(candidates)[3], rects_to_array(rects)).tolist() == actual[3].tolist()
+    assert sat_many_to_many(rects_to_array(candidates), numpy.zeros((0, 4, 2))).shape == (50, 0)
@@ -28,7 +28,11 @@ setuptools.setup(
     entry_points={
         'console_scripts':[
             'mcs_run_in_human_input_mode=machine_common_sense.run_mcs_human_input:main',
-            'mcs_run_scene_timer=machine_common_sense.run_mcs_scene_timer:main'
+            'mcs_run_scene_timer=machine_common_sense.run_mcs_scene_timer:main',
+            'mcs_run_benchmark=machine_common_sense.run_mcs_benchmark:main',
+            'mcs_run_batch=machine_common_sense.run_mcs_batch:main',
+            'mcs_run_intphys_submission=machine_common_sense.run_mcs_intphys_submission:main',
+            'mcs_run_controller_server=machine_common_sense.run_mcs_controller_server:main'
         ]
     }
 )